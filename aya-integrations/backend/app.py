@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
 from flask_sock import Sock
 import base64
@@ -10,12 +10,18 @@ import logging
 import json
 import time
 import torch
-import torchaudio
 import numpy as np
 import threading
 import struct
 import requests
-from faster_whisper import WhisperModel
+from session_manager import SessionManager
+from runtime_profiles import PROFILES, MODEL_PROFILES, get_profile, resolve_profile
+from longform import LONG_FORM_THRESHOLD_SECONDS
+from seamless_languages import check_tgt_lang
+from audio_decoding import DEFAULT_RESAMPLE_QUALITY, decode_stream, load_audio_file
+from transcription_cache import TranscriptionCache, cache_key
+from jobs import JobStore, JobWorkerPool, LiveTrafficGate, TERMINAL_STATES, job_summary, parse_worker_counts
+import model_runner
 from dotenv import load_dotenv
 from gtts import gTTS  # Google Text-to-Speech
 
@@ -31,14 +37,19 @@ CORS(app, resources={
 sock = Sock(app)
 logging.basicConfig(level=logging.INFO)
 
-# Initialize models - lazy loading for efficiency
-models = {
-    "faster_whisper": None,
-    "whisper": None,
-    "wav2vec2": None,
-    "nemo": None,
+# Transcription models - lazy loading for efficiency, the loaded variants (size, runtime profile)
+# are cached by model_runner
+models = ("faster_whisper", "whisper", "wav2vec2", "nemo", "seamless")
+
+# Size used when a request doesn't specify one, /set-model overrides it per model
+DEFAULT_MODEL_SIZES = {
+    "faster_whisper": "base",
+    "whisper": "base",
+    "wav2vec2": "facebook/wav2vec2-base-960h",
+    "nemo": "stt_en_conformer_ctc_small",
     "seamless": None
 }
+model_sizes = {}
 
 # Default model to use
 DEFAULT_MODEL = "faster_whisper"
@@ -51,78 +62,62 @@ CURRENT_TTS_MODEL = DEFAULT_TTS_MODEL
 # Available TTS models
 TTS_MODELS = ["gtts", "groqtts", "groqasr"]
 
-# Store active sessions
-active_sessions = {}
+# Store active sessions, idle ones are evicted in the background (see start_background_services)
+session_manager = SessionManager.from_env()
 
-class AudioBuffer:
-    def __init__(self, sample_rate=16000):
-        self.buffer = np.array([], dtype=np.float32)
-        self.sample_rate = sample_rate
-        self.lock = threading.Lock()
-    
-    def add_audio(self, audio_bytes):
-        with self.lock:
-            try:
-                # Use little-endian int16, which is what the client sends
-                audio_np = np.frombuffer(audio_bytes, dtype='<i2').astype(np.float32) / 32768.0
-                self.buffer = np.concatenate((self.buffer, audio_np))
-                logging.debug(f"Added {len(audio_np)} samples to buffer")
-            except Exception as e:
-                logging.error(f"Failed to decode audio bytes: {e}")
-    
-    def get_audio(self, clear=True):
-        with self.lock:
-            audio = self.buffer.copy()
-            if clear:
-                self.buffer = np.array([], dtype=np.float32)
-            return audio
-    
-    def get_length_seconds(self):
-        with self.lock:
-            return len(self.buffer) / self.sample_rate
+# How often a streaming connection wakes up to check whether its session was evicted
+SESSION_POLL_SECONDS = 5
+
+# Live streaming inference, background transcription jobs wait for it to finish
+live_traffic = LiveTrafficGate()
+
+# Results and denoised audio of /transcribe uploads, keyed by the decoded PCM
+transcription_cache = TranscriptionCache.from_env()
+# Bump when the preprocessing changes so stale cache entries aren't reused
+PREPROCESSING_SETTINGS = {"noise_reduction": "spectral_subtraction", "frame_size": 2048, "hop_length": 512}
+
+# "adaptive" picks none / vad / denoise per clip from its estimated SNR, the other modes force one path
+PREPROCESSING_MODES = ("none", "vad", "denoise")
+PREPROCESSING_MODE = os.getenv("PREPROCESSING_MODE", "adaptive")
+CLEAN_SNR_DB = float(os.getenv("PREPROCESSING_CLEAN_SNR_DB", "30"))
+NOISY_SNR_DB = float(os.getenv("PREPROCESSING_NOISY_SNR_DB", "15"))
+preprocessing_counts = {mode: 0 for mode in PREPROCESSING_MODES}
+preprocessing_lock = threading.Lock()
+
+# Optional worker processes for denoise/VAD (see preprocessing_pool.py), 0 runs them in the calling thread.
+# The pool is created by start_background_services.
+PREPROCESSING_WORKERS = int(os.getenv("PREPROCESSING_WORKERS", "0"))
+preprocessing_pool = None
+
+# Resampler used for audio files that aren't 16 kHz: "linear", "polyphase" or "soxr"
+RESAMPLE_QUALITY = os.getenv("RESAMPLE_QUALITY", DEFAULT_RESAMPLE_QUALITY)
+
+# Optional dedicated inference server (see inference_server.py). When set, models are
+# loaded and run in the server process and this process only decodes and forwards audio.
+INFERENCE_SERVER_ADDRESS = os.getenv("INFERENCE_SERVER_ADDRESS")
+inference_pool = None
+if INFERENCE_SERVER_ADDRESS:
+    from inference_server import InferenceClientPool
+    inference_pool = InferenceClientPool(
+        INFERENCE_SERVER_ADDRESS,
+        max_clients=int(os.getenv("INFERENCE_SERVER_MAX_CLIENTS", "8"))
+    )
 
-def load_model(model_name, model_size=None):
+def resolve_model_size(model_name, model_size=None):
     """
-    Lazy load the specified model
+    Size a request runs with: the requested one, the one set with /set-model or the default
+    """
+    return model_size or model_sizes.get(model_name) or DEFAULT_MODEL_SIZES.get(model_name)
+
+def load_model(model_name, model_size=None, profile=None):
+    """
+    Lazy load the specified model variant (size and runtime profile).
+    Engines are cached by model_runner, so the API and the scripts built on model_runner share them.
     """
     if model_name not in models:
         raise ValueError(f"Unknown model: {model_name}")
-        
-    if models[model_name] is not None:
-        return models[model_name]
-        
-    if model_name == "faster_whisper":
-        size = model_size or "base"
-        logging.info(f"Loading faster-whisper model: {size}")
-        models[model_name] = WhisperModel(size, device="cpu")  # Use "cuda" if you have a compatible GPU
-    
-    elif model_name == "whisper":
-        import whisper
-        size = model_size or "base"
-        logging.info(f"Loading whisper model: {size}")
-        models[model_name] = whisper.load_model(size)
-    
-    elif model_name == "wav2vec2":
-        from transformers import Wav2Vec2ForCTC, Wav2Vec2Tokenizer
-        model_id = model_size or "facebook/wav2vec2-base-960h"
-        logging.info(f"Loading wav2vec2 model: {model_id}")
-        tokenizer = Wav2Vec2Tokenizer.from_pretrained(model_id)
-        model = Wav2Vec2ForCTC.from_pretrained(model_id)
-        models[model_name] = {"model": model, "tokenizer": tokenizer}
-    
-    elif model_name == "nemo":
-        from nemo.collections.asr.models import ASRModel
-        model_id = model_size or "stt_en_conformer_ctc_small"
-        logging.info(f"Loading NeMo model: {model_id}")
-        models[model_name] = ASRModel.from_pretrained(model_name=model_id)
-    
-    elif model_name == "seamless":
-        from models.seamless_inference import get_seamless_default_config, load_model as load_seamless_model
-        logging.info("Loading Seamless model")
-        models[model_name] = load_seamless_model(model_config=get_seamless_default_config())
-    
-    
-    return models[model_name]
+    # every model is loaded as an STTBackend (see stt_backend.py)
+    return model_runner.get_engine(model_name, resolve_model_size(model_name, model_size), profile)
 
 @app.route('/set-model', methods=['POST'])
 def set_model():
@@ -132,21 +127,31 @@ def set_model():
     data = request.json
     model_name = data.get('model', DEFAULT_MODEL)
     model_size = data.get('size')
+    profile = data.get('profile')
     
     global CURRENT_MODEL
     
     try:
         if model_name not in models:
             return jsonify({'error': f'Unknown model: {model_name}'}), 400
+        if profile and profile not in PROFILES:
+            return jsonify({'error': f'Unknown runtime profile: {profile}'}), 400
+        
+        if model_size:
+            model_sizes[model_name] = model_size
+        if profile:
+            MODEL_PROFILES[model_name] = profile
             
-        # Load the model if not already loaded
-        load_model(model_name, model_size)
+        # Load the model if not already loaded (the inference server loads its own models)
+        if inference_pool is None:
+            load_model(model_name, model_size, profile)
         CURRENT_MODEL = model_name
         
         return jsonify({
             'success': True,
             'message': f'Model set to {model_name}',
-            'model': model_name
+            'model': model_name,
+            'profile': resolve_profile(model_name, profile)
         })
     except Exception as e:
         logging.error(f"Error setting model: {str(e)}")
@@ -158,8 +163,10 @@ def get_available_models():
     Return the list of available transcription models
     """
     return jsonify({
-        'models': list(models.keys()),
-        'current_model': CURRENT_MODEL
+        'models': list(models),
+        'current_model': CURRENT_MODEL,
+        'profiles': list(PROFILES.keys()),
+        'current_profile': resolve_profile(CURRENT_MODEL)
     })
 
 @app.route('/available-tts-models', methods=['GET'])
@@ -197,6 +204,20 @@ def set_tts_model():
         logging.error(f"Error setting TTS model: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Return runtime metrics for the streaming sessions
+    """
+    return jsonify({
+        'sessions': session_manager.stats(),
+        'transcription_cache': transcription_cache.stats(),
+        'preprocessing': {
+            'mode': PREPROCESSING_MODE,
+            **get_preprocessing_counts()
+        }
+    })
+
 @sock.route('/stream-audio')
 def stream_audio(ws):
     """
@@ -206,11 +227,18 @@ def stream_audio(ws):
     
     # Create a unique session ID for this connection
     session_id = str(uuid.uuid4())
-    active_sessions[session_id] = AudioBuffer()
+    session_manager.create(session_id)
     
     try:
         while True:
-            data = ws.receive()
+            data = ws.receive(timeout=SESSION_POLL_SECONDS)
+            
+            # The reaper evicts sessions that stopped sending audio
+            if session_manager.get(session_id) is None:
+                logging.info(f"Session {session_id} expired, closing WebSocket")
+                ws.close(reason=1000, message="Session expired")
+                break
+            
             if not data:
                 continue
                 
@@ -218,20 +246,45 @@ def stream_audio(ws):
                 json_data = json.loads(data)
                 audio_data = json_data.get('audio_data')
                 model_name = json_data.get('model', CURRENT_MODEL)
+                profile = json_data.get('profile')
+                # target language of the Seamless translation, defaults to the model's
+                tgt_lang = json_data.get('tgt_lang')
+                check_tgt_lang(tgt_lang)
+                if profile and profile not in PROFILES:
+                    raise ValueError(f"Unknown runtime profile: {profile}")
+                
+                # Seamless streams incrementally, every text segment is sent as soon as the model emits it
+                if model_name == "seamless" and inference_pool is None:
+                    if audio_data:
+                        texts = process_seamless_stream(base64.b64decode(audio_data), session_id, profile, tgt_lang)
+                    elif json_data.get('end_of_stream'):
+                        texts = finish_seamless_stream(session_id)
+                    else:
+                        texts = []
+                    for text in texts:
+                        ws.send(json.dumps({
+                            'transcription': text,
+                            'timestamp': time.time(),
+                            'model': model_name,
+                            'preprocessing': None
+                        }))
+                    continue
                 
                 if audio_data:
                     # Decode base64 audio data
                     audio_bytes = base64.b64decode(audio_data)
                     
                     # Process with selected STT model
-                    transcription = process_audio(audio_bytes, session_id, model_name)
+                    transcription = process_audio(audio_bytes, session_id, model_name, profile, tgt_lang)
                     
                     # Only send back if there's actual transcription
                     if transcription:
+                        session = session_manager.get(session_id)
                         ws.send(json.dumps({
                             'transcription': transcription,
                             'timestamp': time.time(),
-                            'model': model_name
+                            'model': model_name,
+                            'preprocessing': session.preprocessing if session else None
                         }))
             except Exception as e:
                 logging.error(f"Error processing audio chunk: {str(e)}")
@@ -242,39 +295,195 @@ def stream_audio(ws):
         logging.error(f"WebSocket error: {str(e)}")
     finally:
         # Clean up session
-        if session_id in active_sessions:
-            del active_sessions[session_id]
+        session_manager.release(session_id)
 
 @app.route('/transcribe', methods=['POST'])
 def transcribe():
     """
     HTTP endpoint for full audio file transcription (alternative to WebSocket)
     """
-    if 'audio' not in request.files:
+    # Raw audio/* (or octet-stream) bodies are decoded as they arrive, options then come from the query string
+    raw_upload = request.mimetype.startswith('audio/') or request.mimetype == 'application/octet-stream'
+    if not raw_upload and 'audio' not in request.files:
         return jsonify({'error': 'No audio file provided'}), 400
-        
-    audio_file = request.files['audio']
-    model_name = request.form.get('model', CURRENT_MODEL)
-    model_size = request.form.get('size')
     
-    # Create a temporary file
-    temp_file_path = os.path.join(tempfile.gettempdir(), f"{uuid.uuid4()}.webm")
-    audio_file.save(temp_file_path)
+    params = request.args if raw_upload else request.form
+    model_name = params.get('model', CURRENT_MODEL)
+    model_size = params.get('size')
+    profile = params.get('profile')
+    # "true"/"false" forces long-form mode on or off, by default it's used for long uploads
+    long_form = params.get('long_form')
+    # "ndjson" or "sse" streams the segments as they are decoded
+    stream_format = params.get('stream')
+    word_timestamps = params.get('word_timestamps', 'false').lower() in ('1', 'true', 'yes')
+    # "adaptive", "none", "vad" or "denoise", defaults to PREPROCESSING_MODE
+    requested_preprocessing = params.get('preprocessing')
+    # target language of the Seamless translation, defaults to the model's
+    tgt_lang = params.get('tgt_lang')
+    
+    if stream_format and stream_format not in ('ndjson', 'sse'):
+        return jsonify({'error': f'Unknown stream format: {stream_format}'}), 400
+    if requested_preprocessing and requested_preprocessing not in ('adaptive',) + PREPROCESSING_MODES:
+        return jsonify({'error': f'Unknown preprocessing mode: {requested_preprocessing}'}), 400
+    if profile and profile not in PROFILES:
+        return jsonify({'error': f'Unknown runtime profile: {profile}'}), 400
+    try:
+        check_tgt_lang(tgt_lang)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     try:
+        upload = request.stream if raw_upload else request.files['audio'].stream
+        audio = decode_upload(upload)
+        if long_form is None:
+            use_long_form = len(audio) / 16000 > LONG_FORM_THRESHOLD_SECONDS
+        else:
+            use_long_form = long_form.lower() in ('1', 'true', 'yes')
+        if stream_format and word_timestamps and inference_pool is not None and not use_long_form:
+            # the inference server returns only the text of short uploads
+            return jsonify({'error': 'word_timestamps needs long_form=true when an inference server is used'}), 400
+        preprocessing, snr_db = select_preprocessing(audio, requested_preprocessing)
+        
+        if stream_format:
+            mimetype = 'text/event-stream' if stream_format == 'sse' else 'application/x-ndjson'
+            events = stream_transcription(audio, stream_format, model_name, model_size, profile,
+                                          use_long_form, word_timestamps, preprocessing, tgt_lang)
+            return Response(stream_with_context(events), mimetype=mimetype)
+        
+        # Resubmitted audio is answered from the cache
+        key = cache_key(
+            audio,
+            model=model_name,
+            size=resolve_model_size(model_name, model_size),
+            profile=resolve_profile(model_name, profile),
+            long_form=use_long_form,
+            preprocessing=PREPROCESSING_SETTINGS,
+            preprocessing_mode=preprocessing,
+            tgt_lang=tgt_lang
+        )
+        response = transcription_cache.get_result(key)
+        if response is not None:
+            return jsonify({**response, 'cached': True})
+        
         # Process with the selected STT model
-        transcription = process_audio_file(temp_file_path, model_name, model_size)
-        return jsonify({
-            'transcription': transcription,
-            'model': model_name
-        })
+        result = run_transcription(audio, model_name, model_size, profile, long_form=use_long_form,
+                                   preprocessing=preprocessing, tgt_lang=tgt_lang)
+        response = {
+            'model': model_name,
+            'profile': resolve_profile(model_name, profile),
+            'long_form': use_long_form,
+            'preprocessing': preprocessing,
+            'snr_db': snr_db
+        }
+        if use_long_form:
+            response.update(result)
+        else:
+            response['transcription'] = result
+        transcription_cache.put_result(key, response)
+        return jsonify({**response, 'cached': False})
     except Exception as e:
         logging.error(f"Error transcribing audio: {str(e)}")
         return jsonify({'error': str(e)}), 500
-    finally:
-        # Clean up temporary file
-        if os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
+
+
+@app.route('/jobs', methods=['POST'])
+def submit_jobs():
+    """
+    Queue one or more audio files for asynchronous transcription, returns the job ids
+    """
+    audio_files = request.files.getlist('audio')
+    if not audio_files:
+        return jsonify({'error': 'No audio file provided'}), 400
+    
+    model_name = request.form.get('model', CURRENT_MODEL)
+    model_size = request.form.get('size')
+    profile = request.form.get('profile')
+    
+    if model_name not in job_workers.workers_per_model:
+        return jsonify({'error': f'No job workers for model: {model_name}'}), 400
+    if profile and profile not in PROFILES:
+        return jsonify({'error': f'Unknown runtime profile: {profile}'}), 400
+    
+    try:
+        priority = int(request.form.get('priority', 0))
+    except ValueError:
+        return jsonify({'error': 'priority must be an integer'}), 400
+    
+    submitted = []
+    for audio_file in audio_files:
+        job_id = job_store.create(audio_file, model_name, model_size, profile, priority)
+        submitted.append({'id': job_id, 'filename': audio_file.filename, 'status': 'queued'})
+    job_workers.notify(model_name)
+    
+    return jsonify({'jobs': submitted}), 202
+
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    """
+    Return the most recent transcription jobs
+    """
+    limit = request.args.get('limit', 100, type=int)
+    return jsonify({'jobs': [job_summary(job) for job in job_store.list(limit)]})
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Return the status and progress of a transcription job
+    """
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job_summary(job))
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """
+    Cancel a queued or running transcription job
+    """
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if not job_store.cancel(job_id):
+        return jsonify({'error': f'Job is already {job["status"]}'}), 409
+    return jsonify(job_summary(job_store.get(job_id)))
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """
+    Return the transcription of a job, partial while the job is still running
+    """
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({
+        **job_summary(job),
+        'transcription': " ".join(segment["text"] for segment in job["segments"]),
+        'segments': job["segments"],
+        'partial': job["status"] != 'done'
+    })
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """
+    Server-sent progress events for a job until it reaches a final state
+    """
+    if job_store.get(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    def events():
+        last_update = None
+        while True:
+            job = job_store.get(job_id)
+            if job is None:
+                return
+            if job["updated_at"] != last_update:
+                last_update = job["updated_at"]
+                yield format_stream_event({'type': 'progress', **job_summary(job)}, 'sse')
+            if job["status"] in TERMINAL_STATES:
+                return
+            time.sleep(1.0)
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream')
 
 
 def synthesize_speech(text, lang='en', slow=False, model=None):
@@ -304,7 +513,6 @@ def synthesize_speech(text, lang='en', slow=False, model=None):
             tts.save(audio_path)
         elif model == "groqtts":
             # Use Groq TTS model
-            import model_runner
             model_runner.synthesize_speech(text, "groqtts", output_filename=audio_path)
         else:
             # Default to gTTS if model is not recognized
@@ -534,19 +742,21 @@ def format_chat_history(chat_history):
     return formatted
 
 
-def process_audio(audio_bytes, session_id, model_name=CURRENT_MODEL):
+def process_audio(audio_bytes, session_id, model_name=CURRENT_MODEL, profile=None, tgt_lang=None):
     """
     Process audio bytes with the selected STT model
     For streaming, we accumulate chunks and process when enough data is available
     """
-    buffer = active_sessions.get(session_id)
-    if not buffer:
+    session = session_manager.get(session_id)
+    if not session:
         logging.error(f"Session {session_id} not found")
         return "Error: Session not found"
+    buffer = session.buffer
     
     try:
-        # Add the new audio to the buffer
-        buffer.add_audio(audio_bytes)
+        # Add the new audio to the buffer, chunks over the memory budget are dropped
+        if not session_manager.add_audio(session_id, audio_bytes):
+            return ""
     except Exception as e:
         logging.error(f"Error adding audio to buffer: {str(e)}")
         return ""
@@ -555,22 +765,20 @@ def process_audio(audio_bytes, session_id, model_name=CURRENT_MODEL):
     if buffer.get_length_seconds() < 1.0:
         return ""  # Not enough audio yet
     
-    # Get audio from buffer and process
-    audio_np = buffer.get_audio()
+    # Get audio from buffer and process, at most one session buffer's worth at a time
+    audio_np = buffer.get_audio(max_samples=session_manager.max_buffer_samples)
     
     try:
         # Make sure the audio is not empty after getting from buffer
         if len(audio_np) == 0:
             return ""
             
-        # Apply preprocessing for noise reduction if needed
-        cleaned_audio = audio_np
-        
-        # Save as temporary file for models to process
-        temp_file_path = os.path.join(tempfile.gettempdir(), f"{uuid.uuid4()}.wav")
+        # Pick the preprocessing from the window's SNR, sessions with a streaming denoiser
+        # buffer already-cleaned audio and at most need the VAD filter
+        session.preprocessing, _ = select_preprocessing(audio_np, denoised=buffer.denoiser is not None)
         
-        # Ensure audio is in correct format for saving
-        audio_tensor = torch.tensor(cleaned_audio).unsqueeze(0)
+        # Replace NaN/Inf samples before inference
+        audio_tensor = torch.tensor(audio_np).unsqueeze(0)
         if torch.isnan(audio_tensor).any() or torch.isinf(audio_tensor).any():
             logging.warning("Audio contains NaN or Inf values, replacing with zeros")
             audio_tensor = torch.nan_to_num(audio_tensor, nan=0.0, posinf=0.0, neginf=0.0)
@@ -578,100 +786,360 @@ def process_audio(audio_bytes, session_id, model_name=CURRENT_MODEL):
         # Normalize audio to prevent clipping
         if audio_tensor.abs().max() > 1.0:
             audio_tensor = audio_tensor / audio_tensor.abs().max()
-            
-        torchaudio.save(temp_file_path, audio_tensor, 16000)
         
         # Process with the selected model
-        transcription = process_audio_file(temp_file_path, model_name)
-        
-        # Clean up
-        if os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
+        with live_traffic.active():
+            transcription = run_transcription(audio_tensor.squeeze(0).numpy(), model_name, profile=profile,
+                                              preprocessing=session.preprocessing, tgt_lang=tgt_lang)
             
         return transcription.strip()
     except Exception as e:
         logging.error(f"Error in process_audio: {str(e)}")
         return ""
 
-def process_audio_file(file_path, model_name=CURRENT_MODEL, model_size=None):
+def process_seamless_stream(audio_bytes, session_id, profile=None, tgt_lang=None):
+    """
+    Push a chunk of client audio into the session's Seamless stream and yield the text segments
+    as soon as they are produced. The source is not finished between chunks, so the streaming
+    encoder/decoder context carries over for the whole WebSocket session.
+    tgt_lang selects the output language, changing it starts a new stream.
+    """
+    session = session_manager.get(session_id)
+    if not session:
+        logging.error(f"Session {session_id} not found")
+        return
+    session.touch()
+    
+    # Use little-endian int16, which is what the client sends
+    audio_np = np.frombuffer(audio_bytes, dtype='<i2').astype(np.float32) / 32768.0
+    if session.buffer.denoiser is not None:
+        with session.buffer.lock:
+            audio_np = session.buffer.denoiser.process(audio_np)
+    
+    model = load_model("seamless", profile=profile)
+    if session.stream is not None and tgt_lang and session.stream.tgt_lang != tgt_lang:
+        session.detach_stream()
+    if session.stream is None:
+        session.attach_stream(model.acquire_session(tgt_lang), model.release_session)
+    
+    with live_traffic.active():
+        for text in model.push_audio(session.stream, 16000, audio_np):
+            if text.strip():
+                yield text.strip()
+
+def finish_seamless_stream(session_id):
+    """
+    End the session's Seamless stream (client sent end_of_stream) and yield the remaining text segments
+    """
+    session = session_manager.get(session_id)
+    if not session or session.stream is None:
+        return
+    
+    model = load_model("seamless")
+    with live_traffic.active():
+        for text in model.finish_stream(session.stream):
+            if text.strip():
+                yield text.strip()
+    session.detach_stream()
+
+def load_waveform(file_path):
+    """
+    Load an audio file as a 16 kHz mono float32 numpy array
+    """
+    return load_audio_file(file_path, 16000, RESAMPLE_QUALITY)
+
+def decode_upload(stream):
+    """
+    Decode an uploaded audio stream to a 16 kHz mono float32 numpy array in memory.
+    Containers ffmpeg can't read from a pipe (e.g. mp4 with the index at the end) fall back
+    to a temporary file when the upload is seekable.
+    """
+    try:
+        return decode_stream(stream)
+    except ValueError as e:
+        if not (hasattr(stream, 'seekable') and stream.seekable()):
+            raise
+        logging.info(f"Decoding from pipe failed, retrying from a temporary file: {str(e)}")
+    
+    stream.seek(0)
+    temp_file_path = os.path.join(tempfile.gettempdir(), f"{uuid.uuid4()}.audio")
+    try:
+        with open(temp_file_path, 'wb') as f:
+            f.write(stream.read())
+        return load_waveform(temp_file_path)
+    finally:
+        if os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
+
+def run_transcription(audio, model_name=CURRENT_MODEL, model_size=None, profile=None, long_form=False,
+                      preprocessing="denoise", tgt_lang=None, word_timestamps=False):
+    """
+    Transcribe a 16 kHz mono waveform, either on the inference server or in this process.
+    Returns the transcription text, or a dict with the text and timestamped segments in long-form mode.
+    preprocessing is one of PREPROCESSING_MODES (see select_preprocessing), tgt_lang the Seamless output language.
+    word_timestamps adds the words to the long-form segments (the plain text result has none).
+    """
+    if inference_pool is not None:
+        # resolved here so the size and profile chosen with /set-model in this process reach the server
+        return inference_pool.transcribe(audio, model_name, model_size=resolve_model_size(model_name, model_size),
+                                         profile=resolve_profile(model_name, profile), long_form=long_form,
+                                         preprocessing=preprocessing, tgt_lang=tgt_lang,
+                                         word_timestamps=word_timestamps)
+    if long_form:
+        return transcribe_long_form(audio, model_name, model_size, profile, preprocessing, tgt_lang, word_timestamps)
+    return transcribe_waveform(audio, model_name, model_size, profile, preprocessing, tgt_lang)
+
+def process_audio_file(file_path, model_name=CURRENT_MODEL, model_size=None, profile=None, long_form=False):
     """
     Process a complete audio file with the selected STT model
     """
     try:
-        # Load and preprocess audio
-        waveform, sample_rate = torchaudio.load(file_path)
-        
-        # Convert to mono if stereo
-        if waveform.shape[0] > 1:
-            waveform = torch.mean(waveform, dim=0, keepdim=True)
-        
-        # Resample to 16kHz if needed
-        if sample_rate != 16000:
-            resampler = torchaudio.transforms.Resample(orig_freq=sample_rate, new_freq=16000)
-            waveform = resampler(waveform)
-            sample_rate = 16000
-        
-        # Save preprocessed audio to temporary file
-        temp_file_path = os.path.join(tempfile.gettempdir(), f"{uuid.uuid4()}.wav")
-        torchaudio.save(temp_file_path, waveform, sample_rate)
+        audio = load_waveform(file_path)
+        return run_transcription(audio, model_name, model_size, profile, long_form)
+    except Exception as e:
+        logging.error(f"Error in process_audio_file with model {model_name}: {str(e)}")
+        raise
+
+def select_preprocessing(audio, requested=None, denoised=False):
+    """
+    Choose the preprocessing of a 16 kHz mono waveform: "none" for clean audio, "vad" to only drop
+    the pauses, "denoise" for spectral subtraction plus VAD. In "adaptive" mode the choice follows
+    the clip's estimated SNR. denoised=True means the audio already went through the streaming denoiser.
+    Returns the mode and the SNR estimate in dB (None if it wasn't needed or the clip is too short).
+    """
+    mode = requested or PREPROCESSING_MODE
+    snr_db = None
+    if mode == "adaptive":
+        from preprocessing_noisy_audio import estimate_snr, choose_preprocessing
+        snr_db = estimate_snr(audio, 16000)
+        mode = choose_preprocessing(snr_db, CLEAN_SNR_DB, NOISY_SNR_DB)
+    elif mode not in PREPROCESSING_MODES:
+        raise ValueError(f"Unknown preprocessing mode: {mode}")
+    
+    if denoised and mode == "denoise":
+        mode = "vad"
+    
+    with preprocessing_lock:
+        preprocessing_counts[mode] += 1
+    return mode, snr_db
+
+def get_preprocessing_counts():
+    with preprocessing_lock:
+        total = sum(preprocessing_counts.values())
+        return {
+            'counts': dict(preprocessing_counts),
+            'ratios': {mode: count / total if total else 0.0 for mode, count in preprocessing_counts.items()}
+        }
+
+def preprocess_waveform(audio, apply_vad_filter=True, use_cache=True, preprocessing="denoise"):
+    """
+    Denoise a 16 kHz mono waveform (and drop non-speech frames unless apply_vad_filter is False).
+    The result is cached by content, so transcribing the same clip with another model skips this step.
+    preprocessing="vad" only drops the non-speech frames and "none" returns the audio unchanged.
+    With PREPROCESSING_WORKERS set, the work runs in the preprocessing process pool.
+    """
+    from preprocessing_noisy_audio import preprocess
+    
+    if preprocessing == "none" or (preprocessing == "vad" and not apply_vad_filter):
+        return np.asarray(audio, dtype=np.float32)
+    
+    # the VAD filter alone is cheap, only denoised audio is worth caching
+    use_cache = use_cache and preprocessing == "denoise"
+    if use_cache:
+        key = cache_key(audio, stage="preprocess", vad=apply_vad_filter, preprocessing=PREPROCESSING_SETTINGS)
+        cleaned_audio = transcription_cache.get_audio(key)
+        if cleaned_audio is not None:
+            return cleaned_audio
+    
+    if preprocessing_pool is not None:
+        cleaned_audio = preprocessing_pool.preprocess(audio, preprocessing, apply_vad_filter)
+    else:
+        cleaned_audio = preprocess(audio, 16000, preprocessing, apply_vad_filter)
+    if use_cache:
+        transcription_cache.put_audio(key, cleaned_audio)
+    return cleaned_audio
+
+def transcription_options(model_name, profile=None, **options):
+    """
+    transcribe_batch options of a model (see stt_backend.py) from its runtime profile, plus the given ones
+    """
+    settings = get_profile(resolve_profile(model_name, profile))
+    return {
+        "beam_size": settings["beam_size"],
+        "num_workers": settings["num_workers"],
+        **options
+    }
+
+def transcribe_waveform(audio, model_name=CURRENT_MODEL, model_size=None, profile=None, preprocessing="denoise",
+                        tgt_lang=None):
+    """
+    Apply noise reduction to a 16 kHz mono waveform and transcribe it with the selected STT model
+    """
+    try:
+        cleaned_audio = preprocess_waveform(audio, preprocessing=preprocessing)
         
-        # Apply noise reduction preprocessing if needed
-        from preprocessing_noisy_audio import save_audio
-        cleaned_path = os.path.join(tempfile.gettempdir(), f"{uuid.uuid4()}_cleaned.wav")
-        cleaned_path = save_audio(temp_file_path, output_path=cleaned_path)
+        if model_name == "groqasr":
+            # sent to the Groq API as an in-memory wav, see groq_client.py
+            import groq_client
+            return groq_client.translate_waveform(cleaned_audio, 16000).strip()
         
         # Load or get the model
-        model = load_model(model_name, model_size)
+        model = load_model(model_name, model_size, profile)
         
         # Transcribe with the selected model
-        if model_name == "faster_whisper":
-            segments, info = model.transcribe(cleaned_path, beam_size=5)
-            transcription = " ".join([segment.text for segment in segments])
-        
-        elif model_name == "whisper":
-            result = model.transcribe(cleaned_path)
-            transcription = result["text"]
-        
-        elif model_name == "wav2vec2":
-            waveform, sample_rate = torchaudio.load(cleaned_path)
-            if sample_rate != 16000:
-                resampler = torchaudio.transforms.Resample(orig_freq=sample_rate, new_freq=16000)
-                waveform = resampler(waveform)
-            
-            if waveform.shape[0] > 1:
-                waveform = torch.mean(waveform, dim=0, keepdim=True)
-                
-            input_values = model["tokenizer"](waveform.squeeze().numpy(), return_tensors="pt").input_values
-            with torch.no_grad():
-                logits = model["model"](input_values).logits
-            
-            predicted_ids = torch.argmax(logits, dim=-1)
-            transcription = model["tokenizer"].decode(predicted_ids[0])
-        
-        elif model_name == "nemo":
-            transcription = model.transcribe([cleaned_path])[0]
-        
-        elif model_name == "seamless":
-            transcription = model.transcribe_file(file_path=cleaned_path)
+        result = model.transcribe(cleaned_audio, 16000, transcription_options(model_name, profile, tgt_lang=tgt_lang))
+        return result["text"]
+    except Exception as e:
+        logging.error(f"Error in transcribe_waveform with model {model_name}: {str(e)}")
+        raise
 
-        elif model_name == "groqasr":
-            from model_runner import transcribe
-            transcription = transcribe(audio_path=cleaned_path, model="groqasr")
-        
-        else:
-            raise ValueError(f"Unknown model: {model_name}")
+def transcribe_long_form(audio, model_name=CURRENT_MODEL, model_size=None, profile=None, preprocessing="denoise",
+                         tgt_lang=None, word_timestamps=False):
+    """
+    Transcribe a long 16 kHz mono waveform in VAD-bounded chunks that are batched per model.
+    Returns the stitched transcription and its timestamped segments.
+    """
+    from longform import transcribe_long_form as run_long_form
+    
+    try:
+        model = load_model(model_name, model_size, profile)
+        settings = get_profile(resolve_profile(model_name, profile))
         
-        # Clean up temporary files
-        for path in [temp_file_path, cleaned_path]:
-            if os.path.exists(path):
-                os.remove(path)
-                
-        return transcription.strip()
+        # Denoise without the VAD filter so the timeline of the upload is preserved
+        cleaned_audio = preprocess_waveform(audio, apply_vad_filter=False, preprocessing=preprocessing)
+        return run_long_form(model_name, model, cleaned_audio, settings=settings, tgt_lang=tgt_lang,
+                             word_timestamps=word_timestamps)
     except Exception as e:
-        logging.error(f"Error in process_audio_file with model {model_name}: {str(e)}")
+        logging.error(f"Error in transcribe_long_form with model {model_name}: {str(e)}")
         raise
 
+def iter_transcription_segments(audio, model_name=CURRENT_MODEL, model_size=None, profile=None, long_form=False,
+                                word_timestamps=False, preprocessing="denoise", tgt_lang=None):
+    """
+    Yield timestamped segments of a 16 kHz mono waveform as soon as they are decoded.
+    faster-whisper decodes its segments lazily and long-form mode produces one batch of chunks at a time,
+    the other models (and the inference server) return the whole transcription at once.
+    Segment times are relative to the start of the waveform, the VAD filter is never applied here.
+    """
+    if inference_pool is not None:
+        result = run_transcription(audio, model_name, model_size, profile, long_form, preprocessing, tgt_lang,
+                                   word_timestamps)
+        if long_form:
+            yield from result["segments"]
+        elif result:
+            yield {"start": 0.0, "end": len(audio) / 16000, "text": result}
+        return
+    
+    if long_form:
+        from longform import iter_long_form
+        model = load_model(model_name, model_size, profile)
+        settings = get_profile(resolve_profile(model_name, profile))
+        cleaned_audio = preprocess_waveform(audio, apply_vad_filter=False, preprocessing=preprocessing)
+        yield from iter_long_form(model_name, model, cleaned_audio, settings=settings,
+                                  word_timestamps=word_timestamps, tgt_lang=tgt_lang)
+        return
+    
+    if model_name != "faster_whisper":
+        transcription = transcribe_waveform(audio, model_name, model_size, profile, preprocessing, tgt_lang)
+        if transcription:
+            yield {"start": 0.0, "end": len(audio) / 16000, "text": transcription}
+        return
+    
+    # without the VAD filter, so the segment and word times match the upload
+    cleaned_audio = preprocess_waveform(audio, apply_vad_filter=False, preprocessing=preprocessing)
+    model = load_model(model_name, model_size, profile)
+    yield from model.iter_segments(cleaned_audio, transcription_options(model_name, profile,
+                                                                        word_timestamps=word_timestamps))
+
+def format_stream_event(event, stream_format):
+    """
+    Serialize a streaming event as one NDJSON line or one server-sent event
+    """
+    if stream_format == 'sse':
+        return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    return json.dumps(event) + "\n"
+
+def stream_transcription(audio, stream_format, model_name, model_size=None, profile=None, long_form=False,
+                         word_timestamps=False, preprocessing="denoise", tgt_lang=None):
+    """
+    Generator behind the streaming mode of /transcribe: one event per segment, then a final "done" event
+    """
+    texts = []
+    try:
+        for segment in iter_transcription_segments(audio, model_name, model_size, profile, long_form, word_timestamps,
+                                                   preprocessing, tgt_lang):
+            texts.append(segment["text"])
+            yield format_stream_event({'type': 'segment', **segment}, stream_format)
+        yield format_stream_event({
+            'type': 'done',
+            'transcription': " ".join(texts),
+            'model': model_name,
+            'profile': resolve_profile(model_name, profile),
+            'long_form': long_form,
+            'preprocessing': preprocessing
+        }, stream_format)
+    except Exception as e:
+        logging.error(f"Error streaming transcription: {str(e)}")
+        yield format_stream_event({'type': 'error', 'error': str(e)}, stream_format)
+
+def prepare_job_audio(audio_path):
+    """
+    Decode and denoise the audio of a transcription job (without VAD, so chunk times match the upload)
+    """
+    audio = load_waveform(audio_path)
+    preprocessing, _ = select_preprocessing(audio)
+    # job audio is large and already persisted with the job, keep it out of the cache
+    return preprocess_waveform(audio, apply_vad_filter=False, use_cache=False, preprocessing=preprocessing)
+
+def transcribe_job_chunks(audio, chunks, model_name, model_size=None, profile=None):
+    """
+    Transcribe one batch of job chunks, batched in this process or chunk by chunk on the inference server
+    """
+    if inference_pool is not None:
+        return [
+            {"start": start / 16000, "end": end / 16000,
+             "text": run_transcription(audio[start:end], model_name, model_size, profile, preprocessing="none")}
+            for start, end in chunks
+        ]
+    
+    from longform import transcribe_chunks
+    model = load_model(model_name, model_size, profile)
+    settings = get_profile(resolve_profile(model_name, profile))
+    return transcribe_chunks(model_name, model, audio, chunks, settings=settings)
+
+# Persistent queue and per-model worker pools for /jobs, started by start_background_services
+job_store = JobStore()
+job_workers = JobWorkerPool(
+    job_store,
+    prepare_job_audio,
+    transcribe_job_chunks,
+    parse_worker_counts(os.getenv("JOB_WORKERS", ""), models),
+    live_traffic=live_traffic
+)
+
+def start_background_services():
+    """
+    Start the background work of the API process: the session reaper, the preprocessing pool and
+    the /jobs workers.
+
+    Only the API entry point calls this. Importing the module has no side effects, the spawned
+    preprocessing workers re-import the main script (as __mp_main__) and the inference server imports
+    it as well, neither of them must start services of their own.
+    """
+    global preprocessing_pool
+    session_manager.start_reaper()
+    if PREPROCESSING_WORKERS > 0 and preprocessing_pool is None:
+        from preprocessing_pool import PreprocessingPool
+        preprocessing_pool = PreprocessingPool(max_workers=PREPROCESSING_WORKERS)
+    if os.getenv("ENABLE_JOB_WORKERS", "true").lower() == "true":
+        job_workers.start()
+
 if __name__ == '__main__':
-    # Initialize the default model at startup
-    load_model(DEFAULT_MODEL)
+    # debug=True runs this script in a reloader process and a serving child process,
+    # only the serving one starts the services and loads the default model
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_background_services()
+        # Initialize the default model at startup
+        if inference_pool is None:
+            model_runner.warmup(DEFAULT_MODEL, resolve_model_size(DEFAULT_MODEL))
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,176 @@
+"""
+Decoding front end for uploaded audio and audio files.
+
+Uploads are piped into an ffmpeg subprocess that outputs 16 kHz mono float32 PCM.
+A feeder thread writes the upload into ffmpeg while the caller reads the decoded
+samples back, so decoding overlaps with receiving the upload and nothing is written
+to a temporary file.
+
+Files are read with soundfile; 16 kHz mono input is returned as is, other sample
+rates are resampled with a selectable quality and formats libsndfile can't read
+go through ffmpeg. Nothing here imports librosa.
+"""
+import threading
+
+import numpy as np
+import soundfile as sf
+
+SAMPLE_RATE = 16000
+READ_CHUNK_BYTES = 64 * 1024
+# float32 output samples
+_SAMPLE_BYTES = 4
+
+# "linear" interpolation is the cheapest, "polyphase" (scipy) is the default tradeoff,
+# "soxr" is the high quality resampler librosa uses by default
+RESAMPLE_QUALITIES = ("linear", "polyphase", "soxr")
+DEFAULT_RESAMPLE_QUALITY = "polyphase"
+
+
+def _feed(stream, stdin, chunk_size):
+    """
+    Copy the upload into ffmpeg's stdin, stops quietly if ffmpeg exits early
+    """
+    try:
+        while True:
+            data = stream.read(chunk_size)
+            if not data:
+                break
+            stdin.write(data)
+    except (BrokenPipeError, ValueError, OSError):
+        pass
+    finally:
+        try:
+            stdin.close()
+        except OSError:
+            pass
+
+
+def _drain(pipe, chunks):
+    chunks.append(pipe.read())
+
+
+def iter_decoded_pcm(stream, sample_rate=SAMPLE_RATE, chunk_size=READ_CHUNK_BYTES):
+    """
+    Decode a readable byte stream (any container/codec ffmpeg understands) and yield
+    mono float32 numpy chunks at sample_rate as soon as ffmpeg produces them.
+
+    Raises:
+        ValueError if ffmpeg can't decode the input. Some containers (mp4 with the index at
+        the end) can't be read from a pipe: ffmpeg then exits cleanly without output and only
+        reports the problem on stderr, so no samples or error output count as a failure too.
+    """
+    import ffmpeg
+
+    process = (
+        ffmpeg
+        .input("pipe:0")
+        .output("pipe:1", format="f32le", acodec="pcm_f32le", ac=1, ar=sample_rate)
+        .global_args("-loglevel", "error")
+        .run_async(pipe_stdin=True, pipe_stdout=True, pipe_stderr=True)
+    )
+
+    stderr_chunks = []
+    feeder = threading.Thread(target=_feed, args=(stream, process.stdin, chunk_size), daemon=True)
+    stderr_reader = threading.Thread(target=_drain, args=(process.stderr, stderr_chunks), daemon=True)
+    feeder.start()
+    stderr_reader.start()
+
+    decoded_samples = 0
+    try:
+        remainder = b""
+        while True:
+            data = process.stdout.read(chunk_size)
+            if not data:
+                break
+            data = remainder + data
+            usable = len(data) - len(data) % _SAMPLE_BYTES
+            remainder = data[usable:]
+            if usable:
+                decoded_samples += usable // _SAMPLE_BYTES
+                yield np.frombuffer(data[:usable], dtype=np.float32)
+    finally:
+        process.stdout.close()
+        returncode = process.wait()
+        feeder.join()
+        stderr_reader.join()
+
+    error = b"".join(stderr_chunks).decode("utf-8", errors="replace").strip()
+    if returncode != 0 or error or decoded_samples == 0:
+        raise ValueError(f"ffmpeg could not decode the audio: {error or 'no audio samples in the input'}")
+
+
+def decode_stream(stream, sample_rate=SAMPLE_RATE):
+    """
+    Decode a whole byte stream into one mono float32 array at sample_rate
+    """
+    chunks = list(iter_decoded_pcm(stream, sample_rate))
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(chunks)
+
+
+def decode_file(path, sample_rate=SAMPLE_RATE):
+    """
+    Decode an audio file into one mono float32 array at sample_rate. ffmpeg reads the file itself,
+    so it can seek, which containers with the index at the end (mp4, m4a) need.
+
+    Raises:
+        ValueError if ffmpeg can't decode the file
+    """
+    import ffmpeg
+
+    try:
+        out, err = (
+            ffmpeg
+            .input(path)
+            .output("pipe:1", format="f32le", acodec="pcm_f32le", ac=1, ar=sample_rate)
+            .global_args("-loglevel", "error")
+            .run(capture_stdout=True, capture_stderr=True)
+        )
+    except ffmpeg.Error as e:
+        out, err = b"", e.stderr or b"ffmpeg failed"
+
+    error = err.decode("utf-8", errors="replace").strip()
+    usable = len(out) - len(out) % _SAMPLE_BYTES
+    if error or usable == 0:
+        raise ValueError(f"ffmpeg could not decode the audio: {error or 'no audio samples in the input'}")
+    return np.frombuffer(out, dtype=np.float32, count=usable // _SAMPLE_BYTES).copy()
+
+
+def resample(audio, orig_sr, target_sr=SAMPLE_RATE, quality=DEFAULT_RESAMPLE_QUALITY):
+    """
+    Resample a mono float32 waveform with one of RESAMPLE_QUALITIES
+    """
+    if orig_sr == target_sr:
+        return audio
+    if quality not in RESAMPLE_QUALITIES:
+        raise ValueError(f"Unknown resample quality: {quality}")
+
+    if quality == "linear":
+        num_samples = int(round(len(audio) * target_sr / orig_sr))
+        positions = np.arange(num_samples, dtype=np.float64) * (orig_sr / target_sr)
+        return np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+
+    if quality == "soxr":
+        import soxr
+        return soxr.resample(audio, orig_sr, target_sr, quality="HQ").astype(np.float32, copy=False)
+
+    from math import gcd
+    from scipy.signal import resample_poly
+    divisor = gcd(int(orig_sr), int(target_sr))
+    return resample_poly(audio, target_sr // divisor, orig_sr // divisor).astype(np.float32, copy=False)
+
+
+def load_audio_file(path, sr=SAMPLE_RATE, resample_quality=DEFAULT_RESAMPLE_QUALITY):
+    """
+    Load an audio file as a mono float32 numpy array at sr
+    """
+    try:
+        audio, file_sr = sf.read(path, dtype="float32", always_2d=False)
+    except RuntimeError:
+        # containers libsndfile doesn't know (webm, mp4, ...) are decoded and resampled by ffmpeg
+        return decode_file(path, sr)
+
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1, dtype=np.float32)
+    return resample(audio, file_sr, sr, resample_quality)
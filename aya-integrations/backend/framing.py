@@ -0,0 +1,163 @@
+"""
+Shared framing utilities for the audio preprocessing stages.
+
+Frames are read-only strided views into the signal, nothing is copied. Every stage
+uses the same semantics: frame i covers samples [i * hop_length, i * hop_length + frame_length)
+and only complete frames are returned. stft/istft are built on the same views and
+process the frames in blocks, so the only large allocation is the spectrogram itself.
+
+Everything stays in single precision (float32 samples, complex64 spectra; scipy.fft
+keeps the input precision where numpy.fft promotes to double). Intermediate arrays
+come from per-thread scratch buffers that are reused across calls.
+"""
+import os
+import threading
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import fft as sp_fft
+
+# frames transformed per FFT call in stft/istft, bounds the temporary buffers
+FFT_BLOCK_FRAMES = 512
+
+# scratch buffers larger than this are allocated per call instead of being kept around
+SCRATCH_MAX_BYTES = int(float(os.getenv("PREPROCESSING_SCRATCH_MB", "64")) * 1024 * 1024)
+
+_scratch = threading.local()
+
+
+def scratch_buffer(name, shape, dtype=np.float32):
+    """
+    Uninitialized array of the given shape backed by a per-thread buffer that is reused by the
+    next call with the same name. The contents are only valid until then, don't return it to callers.
+    """
+    dtype = np.dtype(dtype)
+    shape = (shape,) if np.isscalar(shape) else tuple(shape)
+    size = int(np.prod(shape))
+    if size * dtype.itemsize > SCRATCH_MAX_BYTES:
+        return np.empty(shape, dtype=dtype)
+
+    buffers = getattr(_scratch, "buffers", None)
+    if buffers is None:
+        buffers = _scratch.buffers = {}
+    buffer = buffers.get((name, dtype))
+    if buffer is None or buffer.size < size:
+        buffer = buffers[(name, dtype)] = np.empty(size, dtype=dtype)
+    return buffer[:size].reshape(shape)
+
+
+def hann_window(frame_length):
+    """
+    Periodic Hann window (the one librosa and torch use for STFTs)
+    """
+    return np.hanning(frame_length + 1)[:-1].astype(np.float32)
+
+
+def frame_count(num_samples, frame_length, hop_length):
+    if num_samples < frame_length:
+        return 0
+    return 1 + (num_samples - frame_length) // hop_length
+
+
+def frame_signal(audio, frame_length, hop_length=None):
+    """
+    View a 1-D signal as (num_frames, frame_length) frames advancing by hop_length
+    (frame_length when hop_length is None). The view is read-only and shares memory with audio.
+    """
+    hop_length = hop_length or frame_length
+    audio = np.asarray(audio)
+    num_frames = frame_count(len(audio), frame_length, hop_length)
+    if num_frames == 0:
+        return np.empty((0, frame_length), dtype=audio.dtype)
+    return sliding_window_view(audio, frame_length)[::hop_length][:num_frames]
+
+
+def frame_energy(frames):
+    """
+    Sum of squares of every row (frames of samples or of spectral magnitudes)
+    """
+    return np.einsum("ij,ij->i", frames, frames)
+
+
+def stft(audio, n_fft=2048, hop_length=512, window=None, out=None):
+    """
+    Centered STFT with zero padding, like librosa.stft's defaults.
+
+    Args:
+        out: optional complex64 array of shape (num_frames, n_fft // 2 + 1) to write into
+
+    Returns:
+        complex64 array of shape (num_frames, n_fft // 2 + 1)
+    """
+    window = hann_window(n_fft) if window is None else window
+    audio = np.asarray(audio, dtype=np.float32)
+    pad = n_fft // 2
+    padded = scratch_buffer("stft_padded", len(audio) + 2 * pad)
+    padded[:pad] = 0.0
+    padded[pad:pad + len(audio)] = audio
+    padded[pad + len(audio):] = 0.0
+    frames = frame_signal(padded, n_fft, hop_length)
+
+    spectrum = out if out is not None else np.empty((len(frames), n_fft // 2 + 1), dtype=np.complex64)
+    windowed = scratch_buffer("stft_windowed", (FFT_BLOCK_FRAMES, n_fft))
+    for start in range(0, len(frames), FFT_BLOCK_FRAMES):
+        block = frames[start:start + FFT_BLOCK_FRAMES]
+        block_windowed = np.multiply(block, window, out=windowed[:len(block)])
+        spectrum[start:start + len(block)] = sp_fft.rfft(block_windowed, axis=1, overwrite_x=True)
+    return spectrum
+
+
+def stft_frame_count(num_samples, n_fft=2048, hop_length=512):
+    """
+    Number of frames stft returns for num_samples of audio
+    """
+    return frame_count(num_samples + 2 * (n_fft // 2), n_fft, hop_length)
+
+
+def _overlap_add(output, frames, first_frame, hop_length):
+    frame_length = frames.shape[1]
+    if frame_length % hop_length == 0:
+        # view the output as hop-sized blocks, every frame spans `overlap` consecutive blocks
+        overlap = frame_length // hop_length
+        blocks = output.reshape(-1, hop_length)
+        frame_blocks = frames.reshape(len(frames), overlap, hop_length)
+        for k in range(overlap):
+            blocks[first_frame + k:first_frame + k + len(frames)] += frame_blocks[:, k]
+    else:
+        for i, frame in enumerate(frames):
+            start = (first_frame + i) * hop_length
+            output[start:start + frame_length] += frame
+
+
+def istft(spectrum, hop_length=512, window=None, length=None):
+    """
+    Inverse of stft: windowed overlap-add normalized by the summed squared window.
+
+    Args:
+        spectrum: (num_frames, n_fft // 2 + 1) array from stft
+        length: number of samples to return, defaults to the padded length minus the centering
+    """
+    num_frames = spectrum.shape[0]
+    n_fft = 2 * (spectrum.shape[1] - 1)
+    window = hann_window(n_fft) if window is None else window
+
+    output = np.zeros(n_fft + hop_length * max(num_frames - 1, 0), dtype=np.float32)
+    window_sum = scratch_buffer("istft_window_sum", len(output))
+    window_sum[:] = 0.0
+    squared_window = (window * window)[np.newaxis]
+    for start in range(0, num_frames, FFT_BLOCK_FRAMES):
+        block = sp_fft.irfft(spectrum[start:start + FFT_BLOCK_FRAMES], n=n_fft, axis=1)
+        block *= window
+        _overlap_add(output, block, start, hop_length)
+        _overlap_add(window_sum, np.broadcast_to(squared_window, block.shape), start, hop_length)
+
+    # samples without window coverage are zero in output as well, clamping keeps them at zero
+    np.maximum(window_sum, np.finfo(np.float32).tiny, out=window_sum)
+    output /= window_sum
+
+    output = output[n_fft // 2:]
+    if length is None:
+        return output[:len(output) - n_fft // 2]
+    if len(output) < length:
+        return np.pad(output, (0, length - len(output)))
+    return output[:length]
@@ -0,0 +1,154 @@
+"""
+Shared Groq client behind the groqasr and groqtts models.
+
+One client per process keeps its HTTP connections alive between calls. Requests time out after
+GROQ_TIMEOUT_S, and the SDK retries connection errors, 429 and 5xx responses GROQ_MAX_RETRIES times
+with backoff. At most GROQ_MAX_CONCURRENCY requests are in flight at once; callers wait for a slot
+for up to GROQ_TIMEOUT_S. GROQ_BASE_URL points the client at another server, e.g. the local
+stand-in of benchmarks/STT/groq_stand_in.py.
+
+Audio is sent from memory (bytes, buffers or waveforms), nothing is written to disk.
+"""
+import io
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import soundfile as sf
+
+ASR_MODEL = "whisper-large-v3"
+TTS_MODEL = "playai-tts"
+
+_settings = {
+    "base_url": os.getenv("GROQ_BASE_URL") or None,
+    "timeout_s": float(os.getenv("GROQ_TIMEOUT_S", "30")),
+    "max_retries": int(os.getenv("GROQ_MAX_RETRIES", "2")),
+    "max_concurrency": int(os.getenv("GROQ_MAX_CONCURRENCY", "8"))
+}
+_client = None
+_client_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(_settings["max_concurrency"])
+
+
+def configure(**settings):
+    """
+    Change the client settings (base_url, timeout_s, max_retries, max_concurrency),
+    the next call builds a new client with them
+    """
+    global _slots
+    unknown = set(settings) - set(_settings)
+    if unknown:
+        raise ValueError(f"Unknown Groq client settings: {', '.join(sorted(unknown))}")
+    with _client_lock:
+        _settings.update(settings)
+        _slots = threading.BoundedSemaphore(_settings["max_concurrency"])
+    close()
+
+
+def get_client():
+    """
+    The process-wide Groq client, created on first use
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            import httpx
+            from groq import Groq
+
+            api_key = os.getenv("GROQ_API_KEY")
+            if not api_key:
+                raise EnvironmentError("GROQ_API_KEY not set in environment variables.")
+
+            limits = httpx.Limits(
+                max_connections=_settings["max_concurrency"],
+                max_keepalive_connections=_settings["max_concurrency"]
+            )
+            _client = Groq(
+                api_key=api_key,
+                base_url=_settings["base_url"],
+                timeout=_settings["timeout_s"],
+                max_retries=_settings["max_retries"],
+                http_client=httpx.Client(limits=limits, timeout=_settings["timeout_s"])
+            )
+        return _client
+
+
+def close():
+    """
+    Close the pooled connections, the next call opens new ones
+    """
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
+
+
+@contextmanager
+def _slot():
+    slots = _slots
+    if not slots.acquire(timeout=_settings["timeout_s"]):
+        raise TimeoutError(f"No free Groq request slot after {_settings['timeout_s']:g} s "
+                           f"({_settings['max_concurrency']} requests in flight)")
+    try:
+        yield
+    finally:
+        slots.release()
+
+
+def wav_bytes(audio, sample_rate=16000):
+    """
+    Encode a mono float32 waveform as WAV in memory
+    """
+    buffer = io.BytesIO()
+    sf.write(buffer, np.asarray(audio, dtype=np.float32), sample_rate, format="WAV")
+    return buffer.getvalue()
+
+
+def _read(audio):
+    # bytes are kept as they are so a retried request can send them again
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        return bytes(audio)
+    if hasattr(audio, "getvalue"):
+        return audio.getvalue()
+    return audio.read()
+
+
+def translate(audio, filename="audio.wav", model=ASR_MODEL, prompt="Specify context or spelling", temperature=0.0):
+    """
+    English transcription of encoded audio (bytes or a binary buffer/file object)
+    """
+    data = _read(audio)
+    client = get_client()
+    with _slot():
+        translation = client.audio.translations.create(
+            file=(filename, data),
+            model=model,
+            prompt=prompt,  # Optional
+            response_format="json",
+            temperature=temperature
+        )
+    return translation.text
+
+
+def translate_waveform(audio, sample_rate=16000, **kwargs):
+    """
+    translate() for a mono float32 waveform
+    """
+    return translate(wav_bytes(audio, sample_rate), **kwargs)
+
+
+def synthesize(text, voice="Aaliyah-PlayAI", model=TTS_MODEL, response_format="wav"):
+    """
+    Synthesize speech, returns the encoded audio bytes
+    """
+    client = get_client()
+    with _slot():
+        response = client.audio.speech.create(
+            model=model,
+            voice=voice,
+            response_format=response_format,
+            input=text,
+        )
+        return response.read()
@@ -0,0 +1,352 @@
+"""
+Dedicated model-server process for the Flask backend.
+
+The server owns every loaded STT model. API workers (the Flask processes) connect
+over a small control channel (multiprocessing.connection) and exchange audio and
+results through a pair of shared-memory ring buffers per connection, so waveforms
+never get pickled and inference never competes with request threads for the GIL.
+
+Start the server:
+    python inference_server.py --address 127.0.0.1:6100 --preload faster_whisper
+
+Then point the API workers at it:
+    INFERENCE_SERVER_ADDRESS=127.0.0.1:6100 python app.py
+"""
+import argparse
+import atexit
+import json
+import logging
+import os
+import queue
+import struct
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from multiprocessing import resource_tracker
+from multiprocessing.connection import Client, Listener
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+DEFAULT_ADDRESS = "127.0.0.1:6100"
+DEFAULT_AUTHKEY = "aya-inference"
+
+# ~4 minutes of 16 kHz float32 audio; longer inputs are streamed through the ring in pieces
+REQUEST_RING_BYTES = 16 * 1024 * 1024
+# transcriptions are small, results larger than this are streamed in pieces as well
+RESPONSE_RING_BYTES = 256 * 1024
+
+# ring header: capacity, total bytes written, total bytes read
+_COUNTER = struct.Struct("<Q")
+_CAPACITY_OFFSET = 0
+_WRITTEN_OFFSET = 8
+_READ_OFFSET = 16
+_HEADER_SIZE = 24
+
+
+def parse_address(address):
+    """
+    Turn "host:port" into a (host, port) tuple, anything else is used as a unix socket path
+    """
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit():
+        return (host or "127.0.0.1", int(port))
+    return address
+
+
+def get_authkey():
+    return os.getenv("INFERENCE_SERVER_AUTHKEY", DEFAULT_AUTHKEY).encode("utf-8")
+
+
+class SharedRingBuffer:
+    """
+    Single-producer / single-consumer byte ring stored in shared memory.
+
+    The header keeps the total number of bytes written and read so far. Only the
+    producer advances the write counter and only the consumer advances the read
+    counter, and the two sides take turns through the control channel, so no
+    additional locking is needed.
+    """
+
+    def __init__(self, name=None, size=REQUEST_RING_BYTES):
+        if name is None:
+            self.shm = SharedMemory(create=True, size=size + _HEADER_SIZE)
+            _COUNTER.pack_into(self.shm.buf, _CAPACITY_OFFSET, size)
+            _COUNTER.pack_into(self.shm.buf, _WRITTEN_OFFSET, 0)
+            _COUNTER.pack_into(self.shm.buf, _READ_OFFSET, 0)
+            self.owner = True
+        else:
+            self.shm = SharedMemory(name=name)
+            # the creating process unlinks the segment, don't let our tracker do it on exit
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+            self.owner = False
+        self.capacity = _COUNTER.unpack_from(self.shm.buf, _CAPACITY_OFFSET)[0]
+        self._data = self.shm.buf[_HEADER_SIZE:_HEADER_SIZE + self.capacity]
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def _get(self, offset):
+        return _COUNTER.unpack_from(self.shm.buf, offset)[0]
+
+    def _set(self, offset, value):
+        _COUNTER.pack_into(self.shm.buf, offset, value)
+
+    def available(self):
+        return self._get(_WRITTEN_OFFSET) - self._get(_READ_OFFSET)
+
+    def write(self, data):
+        """
+        Copy as much of data as fits into the ring and return the number of bytes written
+        """
+        view = memoryview(data).cast("B")
+        written = self._get(_WRITTEN_OFFSET)
+        n = min(len(view), self.capacity - (written - self._get(_READ_OFFSET)))
+        start = written % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = view[:first]
+        self._data[:n - first] = view[first:n]
+        self._set(_WRITTEN_OFFSET, written + n)
+        return n
+
+    def read_into(self, out):
+        """
+        Move up to len(out) bytes from the ring into the writable buffer out, return the count
+        """
+        view = memoryview(out).cast("B")
+        read = self._get(_READ_OFFSET)
+        n = min(len(view), self._get(_WRITTEN_OFFSET) - read)
+        start = read % self.capacity
+        first = min(n, self.capacity - start)
+        view[:first] = self._data[start:start + first]
+        view[first:n] = self._data[:n - first]
+        self._set(_READ_OFFSET, read + n)
+        return n
+
+    def discard(self):
+        """
+        Drop everything that is still unread (consumer side only)
+        """
+        self._set(_READ_OFFSET, self._get(_WRITTEN_OFFSET))
+
+    def close(self):
+        self._data.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def send_payload(conn, ring, data, **header):
+    """
+    Send data through ring, announcing every piece on conn.
+    Payloads larger than the ring are sent in several pieces; the receiver
+    acknowledges each piece once it has drained the ring.
+    """
+    view = memoryview(data).cast("B")
+    total = len(view)
+    offset = 0
+    while True:
+        n = ring.write(view[offset:])
+        offset += n
+        done = offset >= total
+        conn.send(dict(header, total=total, nbytes=n, done=done))
+        if done:
+            return
+        reply = conn.recv()
+        if reply.get("op") == "error":
+            raise RuntimeError(reply["error"])
+
+
+def recv_payload(conn, ring, first=None):
+    """
+    Receive a payload sent with send_payload. Returns the header and a bytearray with the data.
+    """
+    message = first if first is not None else conn.recv()
+    if message.get("op") == "error":
+        raise RuntimeError(message["error"])
+
+    payload = bytearray(message["total"])
+    view = memoryview(payload)
+    offset = 0
+    while True:
+        offset += ring.read_into(view[offset:offset + message["nbytes"]])
+        if message["done"]:
+            return message, payload
+        conn.send({"op": "ack"})
+        message = conn.recv()
+
+
+class InferenceServer:
+    """
+    Accepts API worker connections and runs transcribe_fn(audio, model_name, **options)
+    for every request, the result must be JSON serializable. Requests for the same model
+    are serialized, different models run concurrently.
+    """
+
+    def __init__(self, address, transcribe_fn, authkey=None):
+        self.address = parse_address(address)
+        self.authkey = authkey or get_authkey()
+        self.transcribe_fn = transcribe_fn
+        self._model_locks = defaultdict(threading.Lock)
+
+    def serve_forever(self):
+        with Listener(self.address, authkey=self.authkey) as listener:
+            logging.info(f"Inference server listening on {listener.address}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    logging.error(f"Failed to accept inference connection: {str(e)}")
+                    continue
+                threading.Thread(target=self._handle_connection, args=(conn,), daemon=True).start()
+
+    def _handle_connection(self, conn):
+        request_ring = response_ring = None
+        try:
+            hello = conn.recv()
+            request_ring = SharedRingBuffer(name=hello["request_ring"])
+            response_ring = SharedRingBuffer(name=hello["response_ring"])
+            conn.send({"op": "ready"})
+
+            while True:
+                try:
+                    message = conn.recv()
+                except EOFError:
+                    break
+                if message.get("op") == "close":
+                    break
+
+                try:
+                    header, payload = recv_payload(conn, request_ring, first=message)
+                    audio = np.frombuffer(payload, dtype=np.float32)
+                    model_name = header["model"]
+                    with self._model_locks[model_name]:
+                        result = self.transcribe_fn(audio, model_name, **header.get("options", {}))
+                    send_payload(conn, response_ring, json.dumps({"result": result}).encode("utf-8"), op="result")
+                except (EOFError, OSError):
+                    raise
+                except Exception as e:
+                    logging.error(f"Error in inference server request: {str(e)}")
+                    request_ring.discard()
+                    conn.send({"op": "error", "error": str(e)})
+        except (EOFError, OSError) as e:
+            logging.info(f"Inference connection closed: {str(e)}")
+        finally:
+            for ring in (request_ring, response_ring):
+                if ring is not None:
+                    ring.close()
+            conn.close()
+
+
+class InferenceClient:
+    """
+    One connection to the inference server with its own pair of ring buffers.
+    A client is not thread-safe, use InferenceClientPool to share clients between threads.
+    """
+
+    def __init__(self, address, authkey=None, request_ring_bytes=REQUEST_RING_BYTES):
+        self.conn = Client(parse_address(address), authkey=authkey or get_authkey())
+        self.request_ring = SharedRingBuffer(size=request_ring_bytes)
+        self.response_ring = SharedRingBuffer(size=RESPONSE_RING_BYTES)
+        self.conn.send({
+            "op": "hello",
+            "request_ring": self.request_ring.name,
+            "response_ring": self.response_ring.name
+        })
+        self.conn.recv()
+
+    def transcribe(self, audio, model_name, **options):
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        send_payload(self.conn, self.request_ring, audio, op="transcribe", model=model_name, options=options)
+        try:
+            _, payload = recv_payload(self.conn, self.response_ring)
+        except RuntimeError:
+            self.response_ring.discard()
+            raise
+        return json.loads(payload.decode("utf-8"))["result"]
+
+    def close(self):
+        try:
+            self.conn.send({"op": "close"})
+        except OSError:
+            pass
+        self.conn.close()
+        self.request_ring.close()
+        self.response_ring.close()
+
+
+class InferenceClientPool:
+    """
+    Thread-safe pool of InferenceClient connections used by the API workers.
+    Every request thread borrows a client for the duration of one transcription.
+    """
+
+    def __init__(self, address, max_clients=8):
+        self.address = address
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_clients)
+        atexit.register(self.close)
+
+    @contextmanager
+    def client(self):
+        self._slots.acquire()
+        try:
+            try:
+                client = self._idle.get_nowait()
+            except queue.Empty:
+                client = InferenceClient(self.address)
+            try:
+                yield client
+            except RuntimeError:
+                # the server reported an error, the connection itself is still usable
+                self._idle.put(client)
+                raise
+            except BaseException:
+                # broken or half-used connection, don't hand it out again
+                client.close()
+                raise
+            else:
+                self._idle.put(client)
+        finally:
+            self._slots.release()
+
+    def transcribe(self, audio, model_name, **options):
+        with self.client() as client:
+            return client.transcribe(audio, model_name, **options)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aya STT inference server")
+    parser.add_argument("--address", default=os.getenv("INFERENCE_SERVER_ADDRESS", DEFAULT_ADDRESS),
+                        help="host:port or unix socket path to listen on")
+    parser.add_argument("--preload", nargs="*", default=[], help="models to load before accepting connections")
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads for inference")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    import torch
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    # importing app doesn't start its job workers, the API processes run the job queue
+    import app as api
+    # models run in this process, never forward requests back to a server
+    api.inference_pool = None
+    for model_name in args.preload:
+        api.load_model(model_name)
+
+    server = InferenceServer(args.address, api.run_transcription)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""
+Asynchronous transcription jobs for bulk and long audio.
+
+Jobs are persisted in a local SQLite database together with the uploaded audio,
+so they survive restarts. Every model gets its own pool of worker threads that
+claim queued jobs by priority, transcribe them chunk batch by chunk batch and
+store the partial segments after every batch. A job interrupted by a restart
+resumes from the last finished batch.
+
+Workers step aside while live /stream-audio inference is running (see LiveTrafficGate)
+so bulk transcription doesn't add latency to the interactive path.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from longform import LONG_FORM_BATCH_SIZE, plan_chunks
+
+JOBS_DIR = os.getenv("JOBS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "jobs"))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TERMINAL_STATES = (DONE, FAILED, CANCELLED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    size TEXT,
+    profile TEXT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    filename TEXT,
+    audio_path TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    chunks TEXT,
+    done_chunks INTEGER NOT NULL DEFAULT 0,
+    segments TEXT NOT NULL DEFAULT '[]',
+    error TEXT
+)
+"""
+
+
+class JobStore:
+    """
+    SQLite-backed job queue. Every call opens its own connection so the store can be
+    shared between request threads and worker threads.
+    """
+
+    def __init__(self, jobs_dir=JOBS_DIR):
+        self.jobs_dir = jobs_dir
+        self.audio_dir = os.path.join(jobs_dir, "audio")
+        os.makedirs(self.audio_dir, exist_ok=True)
+        self.db_path = os.path.join(jobs_dir, "jobs.db")
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(_SCHEMA)
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, model, priority, created_at)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def _to_dict(row):
+        if row is None:
+            return None
+        job = dict(row)
+        job["chunks"] = json.loads(job["chunks"]) if job["chunks"] else None
+        job["segments"] = json.loads(job["segments"])
+        return job
+
+    def create(self, file_storage, model, size=None, profile=None, priority=0):
+        """
+        Save an uploaded file (werkzeug FileStorage) and queue a job for it, returns the job id
+        """
+        job_id = str(uuid.uuid4())
+        extension = os.path.splitext(file_storage.filename or "")[1] or ".webm"
+        audio_path = os.path.join(self.audio_dir, f"{job_id}{extension}")
+        file_storage.save(audio_path)
+
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, model, size, profile, priority, status, filename, audio_path, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, model, size, profile, priority, QUEUED, file_storage.filename, audio_path, now, now)
+            )
+        return job_id
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row)
+
+    def list(self, limit=100):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def claim(self, model):
+        """
+        Atomically move the highest-priority queued job of a model to running and return it
+        """
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? AND model = ? ORDER BY priority DESC, created_at LIMIT 1",
+                (QUEUED, model)
+            ).fetchone()
+            if row is None:
+                return None
+            # several API processes may share the database, only one of them wins the job
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (RUNNING, time.time(), row["id"], QUEUED)
+            )
+            if cursor.rowcount == 0:
+                return None
+        job = self._to_dict(row)
+        job["status"] = RUNNING
+        return job
+
+    def _update(self, job_id, **fields):
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def set_chunks(self, job_id, chunks):
+        self._update(job_id, chunks=json.dumps(chunks))
+
+    def save_progress(self, job_id, done_chunks, segments):
+        self._update(job_id, done_chunks=done_chunks, segments=json.dumps(segments))
+
+    def _finish_running(self, job_id, status, error=None):
+        # a job cancelled while it was running stays cancelled
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (status, error, time.time(), job_id, RUNNING)
+            )
+        return cursor.rowcount > 0
+
+    def finish(self, job_id):
+        return self._finish_running(job_id, DONE)
+
+    def fail(self, job_id, error):
+        return self._finish_running(job_id, FAILED, error)
+
+    def cancel(self, job_id):
+        """
+        Cancel a job that hasn't finished yet, running jobs stop after their current batch
+        """
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ? AND status IN (?, ?)",
+                (CANCELLED, time.time(), job_id, QUEUED, RUNNING)
+            )
+        return cursor.rowcount > 0
+
+    def requeue_interrupted(self):
+        """
+        Put jobs that were running when the process stopped back in the queue, keeping their partial results
+        """
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE status = ?",
+                (QUEUED, time.time(), RUNNING)
+            )
+        return cursor.rowcount
+
+
+class LiveTrafficGate:
+    """
+    Tracks live (streaming) inference so background jobs can wait for it to finish
+    """
+
+    def __init__(self):
+        self._active = 0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def active(self):
+        with self._condition:
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._active -= 1
+                self._condition.notify_all()
+
+    def wait_until_idle(self, timeout):
+        """
+        Block until no live inference is running or timeout seconds have passed
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._active == 0, timeout=timeout)
+
+
+def job_summary(job):
+    """
+    Public view of a job without the audio path and the chunk plan
+    """
+    total_chunks = len(job["chunks"]) if job["chunks"] is not None else None
+    return {
+        "id": job["id"],
+        "status": job["status"],
+        "model": job["model"],
+        "size": job["size"],
+        "profile": job["profile"],
+        "priority": job["priority"],
+        "filename": job["filename"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+        "done_chunks": job["done_chunks"],
+        "total_chunks": total_chunks,
+        "progress": job["done_chunks"] / total_chunks if total_chunks else (1.0 if job["status"] == DONE else 0.0),
+        "error": job["error"]
+    }
+
+
+class JobWorkerPool:
+    """
+    Worker threads per model that process the job queue.
+
+    Args:
+        store: JobStore with the queued jobs
+        prepare_audio: callable(audio_path) -> preprocessed 16 kHz mono float32 waveform
+        transcribe_chunks: callable(audio, chunks, model, size, profile) -> list of segments
+        workers_per_model: dict model name -> number of worker threads
+        live_traffic: LiveTrafficGate the workers yield to
+        batch_size: chunks transcribed (and persisted) per step
+        max_yield_seconds: longest a worker waits for live traffic before continuing anyway
+    """
+
+    def __init__(self, store, prepare_audio, transcribe_chunks, workers_per_model, live_traffic=None,
+                 batch_size=LONG_FORM_BATCH_SIZE, max_yield_seconds=5.0, poll_seconds=2.0):
+        self.store = store
+        self.prepare_audio = prepare_audio
+        self.transcribe_chunks = transcribe_chunks
+        self.workers_per_model = workers_per_model
+        self.live_traffic = live_traffic
+        self.batch_size = batch_size
+        self.max_yield_seconds = max_yield_seconds
+        self.poll_seconds = poll_seconds
+        # one event per model, so a submitted job wakes a worker that can claim it
+        self._wakeups = {model: threading.Event() for model in workers_per_model}
+        self._threads = []
+
+    def start(self):
+        if self._threads:
+            return
+        requeued = self.store.requeue_interrupted()
+        if requeued:
+            logging.info(f"Resuming {requeued} interrupted transcription jobs")
+
+        for model, count in self.workers_per_model.items():
+            for i in range(count):
+                thread = threading.Thread(target=self._run, args=(model,), name=f"job-worker-{model}-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def notify(self, model=None):
+        """
+        Wake the workers of model up after a job was submitted for it, all workers if model is None
+        """
+        if model is None:
+            for wakeup in self._wakeups.values():
+                wakeup.set()
+        elif model in self._wakeups:
+            self._wakeups[model].set()
+
+    def _run(self, model):
+        wakeup = self._wakeups[model]
+        while True:
+            job = self.store.claim(model)
+            if job is None:
+                wakeup.wait(timeout=self.poll_seconds)
+                wakeup.clear()
+                continue
+            try:
+                self._process(job)
+            except Exception as e:
+                logging.error(f"Transcription job {job['id']} failed: {str(e)}")
+                self.store.fail(job["id"], str(e))
+
+    def _process(self, job):
+        job_id = job["id"]
+        logging.info(f"Processing transcription job {job_id} with {job['model']}")
+        audio = self.prepare_audio(job["audio_path"])
+
+        # the chunk plan is stored with the job so a resumed job continues on the same boundaries
+        chunks = job["chunks"]
+        if chunks is None:
+            chunks = plan_chunks(audio).tolist()
+            self.store.set_chunks(job_id, chunks)
+
+        segments = job["segments"]
+        for i in range(job["done_chunks"], len(chunks), self.batch_size):
+            current = self.store.get(job_id)
+            if current is None or current["status"] == CANCELLED:
+                logging.info(f"Transcription job {job_id} was cancelled")
+                return
+
+            if self.live_traffic is not None:
+                self.live_traffic.wait_until_idle(self.max_yield_seconds)
+
+            batch = chunks[i:i + self.batch_size]
+            new_segments = self.transcribe_chunks(audio, batch, job["model"], job["size"], job["profile"])
+            segments.extend(segment for segment in new_segments if segment["text"])
+            self.store.save_progress(job_id, i + len(batch), segments)
+
+        self.store.finish(job_id)
+        logging.info(f"Transcription job {job_id} finished")
+
+
+def parse_worker_counts(value, default_models):
+    """
+    Parse "model=count,model=count", models missing from value get one worker
+    """
+    counts = {model: 1 for model in default_models}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        model, _, count = item.partition("=")
+        counts[model.strip()] = int(count)
+    return {model: count for model, count in counts.items() if count > 0}
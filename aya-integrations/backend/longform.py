@@ -0,0 +1,155 @@
+"""
+Long-form transcription for large /transcribe uploads.
+
+The waveform is split on VAD boundaries into chunks of bounded length, the chunks
+are transcribed in batches through the backend's transcribe_batch (padded batches for
+wav2vec2, batch_size for NeMo, parallel workers for faster-whisper) and the results are
+stitched back in order with timestamps. Peak memory is bounded by the batch instead of
+the whole file.
+"""
+import os
+
+import numpy as np
+
+from stt_backend import shift_segment
+from vad import detect_speech_segments
+
+SAMPLE_RATE = 16000
+
+# whisper decodes 30 s windows, keep chunks (plus padding) inside one window
+MAX_CHUNK_SECONDS = 28.0
+# pauses shorter than this don't count as chunk boundaries
+MIN_SILENCE_MS = 300
+# audio kept around each chunk so words at the boundary aren't clipped
+CHUNK_PADDING_MS = 200
+
+# uploads longer than this are transcribed in long-form mode unless the request says otherwise
+LONG_FORM_THRESHOLD_SECONDS = float(os.getenv("LONG_FORM_THRESHOLD_S", "60"))
+LONG_FORM_BATCH_SIZE = int(os.getenv("LONG_FORM_BATCH_SIZE", "8"))
+
+
+def speech_regions(audio, sr=SAMPLE_RATE, frame_duration_ms=30, aggressiveness=2):
+    """
+    Speech regions of the waveform as an (n, 2) array of start/end sample indices
+    """
+    return detect_speech_segments(audio, sr, frame_duration_ms, aggressiveness)
+
+
+def plan_chunks(audio, sr=SAMPLE_RATE, max_chunk_seconds=MAX_CHUNK_SECONDS, min_silence_ms=MIN_SILENCE_MS,
+                padding_ms=CHUNK_PADDING_MS, regions=None):
+    """
+    Group speech regions into chunks of at most max_chunk_seconds that start and end in pauses.
+
+    Returns:
+        (n, 2) int64 array of start/end sample indices in the original waveform
+    """
+    max_length = int(max_chunk_seconds * sr)
+    min_gap = int(min_silence_ms * sr / 1000)
+    padding = int(padding_ms * sr / 1000)
+
+    if regions is None:
+        regions = speech_regions(audio, sr)
+    if len(regions) == 0:
+        # no speech detected (music, very noisy input): fall back to fixed windows
+        regions = np.array([[0, len(audio)]])
+
+    # merge regions separated by short pauses
+    merged = []
+    for start, end in regions:
+        if merged and start - merged[-1][1] < min_gap:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+
+    # split regions that are longer than a chunk on their own
+    pieces = []
+    for start, end in merged:
+        while end - start > max_length:
+            pieces.append([start, start + max_length])
+            start += max_length
+        pieces.append([start, end])
+
+    # pack neighbouring pieces into chunks
+    chunks = []
+    for start, end in pieces:
+        if chunks and end - chunks[-1][0] <= max_length:
+            chunks[-1][1] = end
+        else:
+            chunks.append([start, end])
+
+    # pad without overlapping the neighbouring chunks
+    for i, chunk in enumerate(chunks):
+        previous_end = chunks[i - 1][1] if i > 0 else 0
+        next_start = chunks[i + 1][0] if i + 1 < len(chunks) else len(audio)
+        chunk[0] = max(chunk[0] - padding, previous_end)
+        chunk[1] = min(chunk[1] + padding, next_start)
+
+    return np.array(chunks, dtype=np.int64).reshape(-1, 2)
+
+
+def _batches(items, batch_size):
+    for i in range(0, len(items), batch_size):
+        yield items[i:i + batch_size]
+
+
+def transcribe_chunks(model_name, model, audio, chunks, sr=SAMPLE_RATE, batch_size=LONG_FORM_BATCH_SIZE, settings=None,
+                      word_timestamps=False, tgt_lang=None):
+    """
+    Transcribe the planned chunks of audio with an already loaded backend (see stt_backend.py).
+
+    Args:
+        model_name: name of the model as used by app.load_model
+        model: the loaded STTBackend
+        audio: 16 kHz mono float32 waveform
+        chunks: (n, 2) start/end sample indices from plan_chunks
+        batch_size: chunks per batch of the backend
+        settings: runtime profile settings (beam_size, num_workers)
+        word_timestamps: add per-word times to the segments (faster-whisper and whisper)
+        tgt_lang: target language of the translation (Seamless only), None for the model's default
+
+    Returns:
+        list of {"start", "end", "text"} segments in order, times in seconds
+    """
+    settings = settings or {}
+    chunks = [(int(start), int(end)) for start, end in chunks]
+    options = {
+        "batch_size": batch_size,
+        "beam_size": settings.get("beam_size", 5),
+        "num_workers": settings.get("num_workers", 1),
+        "word_timestamps": word_timestamps,
+        "tgt_lang": tgt_lang
+    }
+
+    results = model.transcribe_batch([audio[start:end] for start, end in chunks], sr, options)
+    return [
+        shift_segment(segment, start / sr)
+        for (start, end), result in zip(chunks, results)
+        for segment in result["segments"]
+    ]
+
+
+def iter_long_form(model_name, model, audio, sr=SAMPLE_RATE, batch_size=LONG_FORM_BATCH_SIZE, settings=None,
+                   word_timestamps=False, tgt_lang=None):
+    """
+    Plan the chunks of a long waveform and yield the non-empty segments in order,
+    one batch of chunks at a time
+    """
+    chunks = plan_chunks(audio, sr)
+    for batch in _batches(chunks, batch_size):
+        for segment in transcribe_chunks(model_name, model, audio, batch, sr, batch_size, settings, word_timestamps,
+                                         tgt_lang):
+            if segment["text"]:
+                yield segment
+
+
+def transcribe_long_form(model_name, model, audio, sr=SAMPLE_RATE, batch_size=LONG_FORM_BATCH_SIZE, settings=None,
+                         tgt_lang=None, word_timestamps=False):
+    """
+    Transcribe a long waveform and stitch the text back together
+    """
+    segments = list(iter_long_form(model_name, model, audio, sr, batch_size, settings,
+                                   word_timestamps=word_timestamps, tgt_lang=tgt_lang))
+    return {
+        "transcription": " ".join(segment["text"] for segment in segments),
+        "segments": segments
+    }
@@ -1,65 +1,187 @@
 from pathlib import Path
+import gc
+import logging
 import os
+import threading
 
+from runtime_profiles import get_profile, resolve_profile
 
-def transcribe(audio_path, model="whisper", model_size="base"):
-    """ 
-    Transcribe audio using various models.
-    
-    Parameters:
-    - audio_path: Path to the audio file.
-    - model: Model type to use (e.g., whisper, wav2vec2, nemo, seamless, groq).
-    - model_size: Size/variant of the model (e.g., base, large).
+# loaded engines shared by every call in the process, keyed by (model, variant)
+_engines = {}
+_engines_lock = threading.Lock()
+# one lock per key being loaded, so concurrent first calls load the engine only once
+_loading_locks = {}
+
+STT_ENGINES = ("faster_whisper", "whisper", "wav2vec2", "nemo", "seamless")
+TTS_ENGINES = ("speecht5", "vits")
+
+
+def _engine_key(model, model_size, settings):
+    """
+    The variant of an engine: what its loading depends on
     """
-    if model == "whisper":
-        from stt_audio.whisper_inference import load_model, transcribe_audio
-        model = load_model(model_size)
-        return transcribe_audio(model=model, audio_path=audio_path)["text"]
-    
+    if model in ("whisper", "nemo"):
+        return (model, model_size)
+    if model == "faster_whisper":
+        return (model, model_size, settings["compute_type"], settings["cpu_threads"], settings["num_workers"],
+                settings["beam_size"])
+    if model == "wav2vec2":
+        return (model, model_size, settings["quantize"])
+    if model == "seamless":
+        return (model,)
+    if model == "speecht5":
+        return (model, settings["quantize"])
+    if model == "vits":
+        from tts_audio.vits_inference import DEFAULT_MODEL_NAME
+        return (model, model_size or DEFAULT_MODEL_NAME, settings["quantize"])
+    raise ValueError(f"No loadable engine for model: {model}")
+
+
+def _load_engine(key, settings):
+    model = key[0]
+    # STT engines are STTBackends (see stt_backend.py)
+    if model == "faster_whisper":
+        from stt_audio.faster_whisper_inference import load_backend
+        return load_backend(
+            key[1],
+            device="cpu",  # Use "cuda" if you have a compatible GPU
+            compute_type=settings["compute_type"],
+            cpu_threads=settings["cpu_threads"],
+            num_workers=settings["num_workers"],
+            beam_size=settings["beam_size"]
+        )
+
+    elif model == "whisper":
+        from stt_audio.whisper_inference import load_backend
+        return load_backend(key[1])
+
     elif model == "wav2vec2":
-        from stt_audio.wav2vec2_inference import load_model, transcribe_audio
-        tokenizer, model = load_model(model_size)
-        return transcribe_audio(tokenizer, model, audio_path)
-    
+        from stt_audio.wav2vec2_inference import load_backend
+        return load_backend(key[1], quantize=settings["quantize"])
+
     elif model == "nemo":
-        from stt_audio.nemo_inference import load_model, transcribe_audio
-        model = load_model(model_size)
-        result = transcribe_audio(model, audio_path)
-        return result.text if hasattr(result, "text") else result
+        from stt_audio.nemo_inference import load_backend
+        return load_backend(key[1])
 
     elif model == "seamless":
         from stt_audio.seamless_inference import load_model, get_seamless_default_config
         model_config = get_seamless_default_config()
         # model_config["device"] = "cpu"  # Optional: force CPU usage
-        wrapper = load_model(model_config=model_config)
-        return wrapper.transcribe_file(file_path=audio_path)
+        return load_model(model_config=model_config)
+
+    elif model == "speecht5":
+        from tts_audio.speech_t5_inference import load_model
+        return load_model(quantize=settings["quantize"])
+
+    elif model == "vits":
+        from tts_audio.vits_inference import load_model_and_tokenizer
+        return load_model_and_tokenizer(key[1], quantize=settings["quantize"])
+
+
+def get_engine(model, model_size=None, profile=None):
+    """
+    Return the loaded engine for a model variant, loading it on first use.
+
+    Parameters:
+    - model: One of STT_ENGINES or TTS_ENGINES.
+    - model_size: Size/variant of the model (model name for vits, None for its default).
+    - profile: Runtime profile (latency, throughput, accuracy), see runtime_profiles.py.
+    """
+    settings = get_profile(resolve_profile(model, profile))
+    key = _engine_key(model, model_size, settings)
+
+    with _engines_lock:
+        if key in _engines:
+            return _engines[key]
+        loading_lock = _loading_locks.setdefault(key, threading.Lock())
+
+    with loading_lock:
+        with _engines_lock:
+            if key in _engines:
+                return _engines[key]
+        logging.info(f"Loading engine {key}")
+        engine = _load_engine(key, settings)
+        with _engines_lock:
+            _engines[key] = engine
+            _loading_locks.pop(key, None)
+    return engine
+
+
+def warmup(model, model_size=None, profile=None):
+    """
+    Load an engine ahead of the first request, e.g. at startup
+    """
+    get_engine(model, model_size, profile)
 
-    elif model == "groqasr":
-        from groq import Groq
-        import os
 
-        # Load API key from environment variable for security
-        api_key = os.getenv("GROQ_API_KEY")
-        if not api_key:
-            raise EnvironmentError("GROQ_API_KEY not set in environment variables.")
+def release(model=None):
+    """
+    Drop the cached engines of a model (all engines if model is None) so their memory can be reclaimed.
+    Returns the number of engines released.
+    """
+    with _engines_lock:
+        keys = [key for key in _engines if model is None or key[0] == model]
+        for key in keys:
+            del _engines[key]
+    if keys:
+        gc.collect()
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+    return len(keys)
+
+
+def loaded_engines():
+    with _engines_lock:
+        return list(_engines.keys())
+
+
+def transcribe(audio_path, model="whisper", model_size="base", profile=None):
+    """
+    Transcribe audio using various models.
 
-        client = Groq(api_key=api_key)
+    Parameters:
+    - audio_path: Path to the audio file.
+    - model: Model type to use (e.g., faster_whisper, whisper, wav2vec2, nemo, seamless, groqasr).
+    - model_size: Size/variant of the model (e.g., base, large).
+    - profile: Runtime profile (latency, throughput, accuracy), see runtime_profiles.py.
+    """
+    if model in STT_ENGINES:
+        from audio_decoding import load_audio_file
+        return transcribe_batch([load_audio_file(audio_path)], model, model_size, profile)[0]["text"]
 
+    elif model == "groqasr":
+        # shared client, see groq_client.py (GROQ_API_KEY is read from the environment)
+        import groq_client
         with open(audio_path, "rb") as file:
-            translation = client.audio.translations.create(
-                file=(audio_path, file.read()),
-                model="whisper-large-v3",
-                prompt="Specify context or spelling",  # Optional
-                response_format="json",
-                temperature=0.0
-            )
-            return translation.text
+            return groq_client.translate(file, filename=os.path.basename(audio_path))
 
     else:
         raise ValueError("Unsupported model selected")
 
 
-def synthesize_speech(text, model="groqtts", voice="Aaliyah-PlayAI", output_filename="speech.wav"):
+def transcribe_batch(audios, model="whisper", model_size="base", profile=None, sample_rate=16000, options=None):
+    """
+    Transcribe a list of waveforms with one of the local STT_ENGINES.
+
+    Parameters:
+    - audios: Mono float32 waveforms.
+    - sample_rate: Sample rate of the waveforms, they are resampled to 16 kHz.
+    - options: transcribe_batch options (batch_size, beam_size, tgt_lang, ...), see stt_backend.py.
+
+    Returns:
+    - One result dict (text, segments, language, timings) per waveform.
+    """
+    if model not in STT_ENGINES:
+        raise ValueError(f"Batch transcription needs a local STT engine: {', '.join(STT_ENGINES)}")
+    backend = get_engine(model, model_size, profile)
+    return backend.transcribe_batch(audios, sample_rate, options)
+
+
+def synthesize_speech(text, model="groqtts", voice="Aaliyah-PlayAI", output_filename="speech.wav", profile=None):
     """
     Synthesizes speech from text using the specified model.
 
@@ -68,38 +190,26 @@ def synthesize_speech(text, model="groqtts", voice="Aaliyah-PlayAI", output_file
     - model: Speech synthesis model/provider (e.g., 'groq').
     - voice: Voice to use (if supported by the model).
     - output_filename: Path to save the generated speech audio.
+    - profile: Runtime profile (latency, throughput, accuracy), see runtime_profiles.py.
 
     Returns:
     - Path to the synthesized audio file.
     """
     if model == "groqtts":
-        from groq import Groq
-
-        api_key = os.getenv("GROQ_API_KEY")
-        if not api_key:
-            raise EnvironmentError("GROQ_API_KEY not set in environment variables.")
-        
-        client = Groq(api_key=api_key)
+        import groq_client
         output_path = Path(output_filename)
-
-        response = client.audio.speech.create(
-            model="playai-tts",
-            voice=voice,
-            response_format="wav",
-            input=text,
-        )
-        response.write_to_file(output_path)
+        output_path.write_bytes(groq_client.synthesize(text, voice=voice))
         return str(output_path)
-    
+
     elif model == "speecht5":
-        from tts_audio.speech_t5_inference import load_model, synthesize_audio
-        t5_pipeline = load_model()
-        print("############### about to write the audio")
+        from tts_audio.speech_t5_inference import synthesize_audio
+        t5_pipeline = get_engine(model, profile=profile)
         return synthesize_audio(t5_pipeline, text, output_filename)
 
     elif model == "vits":
         from tts_audio.vits_inference import synthesize_audio
-        return synthesize_audio(text, output_path=output_filename)
+        tokenizer, engine = get_engine(model, profile=profile)
+        return synthesize_audio(text, output_path=output_filename, tokenizer=tokenizer, model=engine)
 
     else:
         raise ValueError("Unsupported speech synthesis model selected.")
@@ -0,0 +1,100 @@
+"""
+Optional process pool for the numpy preprocessing (denoise, VAD).
+
+The preprocessing is CPU-bound and partly holds the GIL, so bulk workloads run it in
+worker processes. A clip is copied once into a shared-memory block, the worker
+preprocesses it from that block and writes the result back into the same block
+(the output is never longer than the input), so no arrays are pickled.
+"""
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def _preprocess_shared(name, length, sr, preprocessing, apply_vad_filter):
+    """
+    Worker side: preprocess the clip in shared memory block `name` in place, returns the output length
+    """
+    from preprocessing_noisy_audio import preprocess
+
+    # spawned workers share the parent's resource tracker, whose registrations are a set,
+    # so attaching here doesn't add a second registration and the parent's unlink clears it
+    shm = SharedMemory(name=name)
+    audio = cleaned_audio = None
+    try:
+        audio = np.ndarray((length,), dtype=np.float32, buffer=shm.buf)
+        cleaned_audio = preprocess(audio, sr, preprocessing, apply_vad_filter)
+        output_length = len(cleaned_audio)
+        audio[:output_length] = cleaned_audio
+        return output_length
+    finally:
+        # views into the block must be gone before it can be closed
+        audio = cleaned_audio = None
+        shm.close()
+
+
+class PreprocessingPool:
+    """
+    Runs preprocessing_noisy_audio.preprocess in worker processes.
+
+    Args:
+        max_workers: number of worker processes, defaults to the number of cores
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or os.cpu_count()
+        # spawn: the API process runs threads, forking it isn't safe
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=get_context("spawn"))
+
+    def submit(self, audio, preprocessing="denoise", apply_vad_filter=True, sr=SAMPLE_RATE):
+        """
+        Preprocess a mono waveform in a worker, returns a Future with the float32 result
+        """
+        audio = np.asarray(audio, dtype=np.float32)
+        shm = SharedMemory(create=True, size=max(audio.nbytes, 1))
+        view = np.ndarray(audio.shape, dtype=np.float32, buffer=shm.buf)
+        view[:] = audio
+        del view
+
+        result = Future()
+
+        def collect(worker_future):
+            try:
+                output_length = worker_future.result()
+                view = np.ndarray((output_length,), dtype=np.float32, buffer=shm.buf)
+                result.set_result(view.copy())
+                del view
+            except BaseException as e:
+                result.set_exception(e)
+            finally:
+                shm.close()
+                shm.unlink()
+
+        try:
+            worker_future = self._executor.submit(
+                _preprocess_shared, shm.name, len(audio), sr, preprocessing, apply_vad_filter
+            )
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            raise
+        worker_future.add_done_callback(collect)
+        return result
+
+    def preprocess(self, audio, preprocessing="denoise", apply_vad_filter=True, sr=SAMPLE_RATE):
+        return self.submit(audio, preprocessing, apply_vad_filter, sr).result()
+
+    def map(self, clips, preprocessing="denoise", apply_vad_filter=True, sr=SAMPLE_RATE):
+        """
+        Preprocess many clips in parallel, results are returned in order
+        """
+        futures = [self.submit(clip, preprocessing, apply_vad_filter, sr) for clip in clips]
+        return [future.result() for future in futures]
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
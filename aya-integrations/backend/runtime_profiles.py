@@ -0,0 +1,81 @@
+"""
+Named CPU runtime profiles for the STT/TTS backends.
+
+A profile bundles the knobs that trade accuracy for speed on CPU:
+- compute_type, cpu_threads, num_workers: passed to faster-whisper (CTranslate2)
+- beam_size: decoding beam for faster-whisper
+- quantize: dynamic int8 quantization of the Linear layers of torch models
+  (Wav2Vec2ForCTC, VitsModel, SpeechT5)
+
+The profile used for a model is chosen per request, falling back to the per-model
+configuration in MODEL_PROFILES and then to DEFAULT_PROFILE.
+"""
+import os
+
+CPU_COUNT = os.cpu_count() or 1
+THROUGHPUT_WORKERS = max(1, min(4, CPU_COUNT // 2))
+
+PROFILES = {
+    # one request at a time as fast as possible
+    "latency": {
+        "compute_type": "int8",
+        "cpu_threads": CPU_COUNT,
+        "num_workers": 1,
+        "beam_size": 1,
+        "quantize": True
+    },
+    # several requests in parallel, the cores are split between the workers
+    "throughput": {
+        "compute_type": "int8_float32",
+        "cpu_threads": max(1, CPU_COUNT // THROUGHPUT_WORKERS),
+        "num_workers": THROUGHPUT_WORKERS,
+        "beam_size": 1,
+        "quantize": True
+    },
+    # full precision, matches the behaviour before profiles existed
+    "accuracy": {
+        "compute_type": "default",
+        "cpu_threads": 0,
+        "num_workers": 1,
+        "beam_size": 5,
+        "quantize": False
+    }
+}
+
+DEFAULT_PROFILE = os.getenv("RUNTIME_PROFILE", "accuracy")
+
+
+def parse_model_profiles(value):
+    """
+    Parse "model=profile,model=profile" into a dict, e.g. "faster_whisper=latency,vits=throughput"
+    """
+    model_profiles = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        model_name, _, profile = item.partition("=")
+        model_profiles[model_name.strip()] = profile.strip()
+    return model_profiles
+
+
+MODEL_PROFILES = parse_model_profiles(os.getenv("MODEL_PROFILES", ""))
+
+
+def resolve_profile(model_name, profile=None):
+    """
+    Return the profile name to use for model_name.
+    Precedence: explicit profile (per request) > MODEL_PROFILES (per model) > DEFAULT_PROFILE
+    """
+    name = profile or MODEL_PROFILES.get(model_name) or DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"Unknown runtime profile: {name}")
+    return name
+
+
+def get_profile(name):
+    """
+    Return a copy of the settings of the named profile
+    """
+    if name not in PROFILES:
+        raise ValueError(f"Unknown runtime profile: {name}")
+    return dict(PROFILES[name])
@@ -0,0 +1,20 @@
+"""
+Target languages of the Seamless speech-to-text translation (the text output languages of
+SeamlessM4T v2 / SeamlessStreaming), as accepted by the tgt_lang option.
+
+Kept apart from seamless_inference.py so requests can be validated without loading the model code.
+"""
+TGT_LANGS = frozenset("""
+afr amh arb ary arz asm azj bel ben bos bul cat ceb ces ckb cmn cmn_Hant cym dan deu ell eng est eus fin
+fra fuv gaz gle glg guj heb hin hrv hun hye ibo ind isl ita jav jpn kan kat kaz khk khm kir kor lao lit
+lug luo lvs mai mal mar mkd mlt mni mya nld nno nob npi nya ory pan pbt pes pol por ron rus slk slv sna
+snd som spa srp swe swh tam tel tgk tgl tha tur ukr urd uzn vie yor yue zlm zul
+""".split())
+
+
+def check_tgt_lang(tgt_lang):
+    """
+    Raise ValueError for a tgt_lang Seamless can't translate to, None (the default language) passes
+    """
+    if tgt_lang is not None and tgt_lang not in TGT_LANGS:
+        raise ValueError(f"Unsupported target language: {tgt_lang}")
@@ -0,0 +1,290 @@
+"""
+Lifecycle management for /stream-audio sessions.
+
+Every WebSocket connection owns an AudioBuffer registered with the SessionManager.
+The manager caps how much audio a single session may buffer, enforces a global
+audio-memory budget across all sessions and evicts sessions that stop sending
+audio (half-open connections) from a background reaper thread.
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from streaming_denoiser import StreamingDenoiser
+
+SAMPLE_RATE = 16000
+# buffered audio is kept as float32
+BYTES_PER_SAMPLE = 4
+
+OVERFLOW_POLICIES = ("drop", "flush")
+
+
+class AudioBuffer:
+    def __init__(self, sample_rate=SAMPLE_RATE, max_samples=None, overflow_policy="drop", denoiser=None):
+        self.buffer = np.array([], dtype=np.float32)
+        self.sample_rate = sample_rate
+        self.max_samples = max_samples
+        self.overflow_policy = overflow_policy
+        # optional StreamingDenoiser applied to the audio as it arrives
+        self.denoiser = denoiser
+        self.dropped_samples = 0
+        self.lock = threading.Lock()
+
+    def add_audio(self, audio_bytes):
+        with self.lock:
+            try:
+                # Use little-endian int16, which is what the client sends
+                audio_np = np.frombuffer(audio_bytes, dtype='<i2').astype(np.float32) / 32768.0
+                if self.denoiser is not None:
+                    audio_np = self.denoiser.process(audio_np)
+                self.buffer = np.concatenate((self.buffer, audio_np))
+                logging.debug(f"Added {len(audio_np)} samples to buffer")
+
+                # with the "drop" policy only the newest max_samples are kept. With "flush" the excess
+                # is handed to inference by get_audio(max_samples), but a session that sends faster
+                # than inference drains it still never holds more than two pieces
+                if self.max_samples and len(self.buffer) > self.limit_samples:
+                    excess = len(self.buffer) - self.limit_samples
+                    self.buffer = self.buffer[excess:].copy()
+                    self.dropped_samples += excess
+                    logging.debug(f"Dropped {excess} samples over the session buffer limit")
+            except Exception as e:
+                logging.error(f"Failed to decode audio bytes: {e}")
+
+    @property
+    def limit_samples(self):
+        """
+        Most samples the buffer holds before the oldest audio is dropped
+        """
+        if not self.max_samples:
+            return None
+        return self.max_samples if self.overflow_policy == "drop" else 2 * self.max_samples
+
+    def get_audio(self, clear=True, max_samples=None):
+        with self.lock:
+            if max_samples is None or len(self.buffer) <= max_samples:
+                audio = self.buffer.copy()
+                if clear:
+                    self.buffer = np.array([], dtype=np.float32)
+            else:
+                audio = self.buffer[:max_samples].copy()
+                if clear:
+                    self.buffer = self.buffer[max_samples:].copy()
+            return audio
+
+    def get_length_seconds(self):
+        with self.lock:
+            return len(self.buffer) / self.sample_rate
+
+    @property
+    def nbytes(self):
+        return self.buffer.nbytes
+
+
+class Session:
+    def __init__(self, session_id, buffer):
+        self.session_id = session_id
+        self.buffer = buffer
+        self.created_at = time.time()
+        self.last_active = self.created_at
+        # preprocessing chosen for the last transcribed window
+        self.preprocessing = None
+        # model-side streaming state (e.g. a Seamless session), released together with the session
+        self.stream = None
+        self._release_stream = None
+
+    def attach_stream(self, stream, release):
+        """
+        Keep model streaming state for this session, release(stream) is called when the session ends
+        """
+        self.stream = stream
+        self._release_stream = release
+
+    def detach_stream(self):
+        stream, release = self.stream, self._release_stream
+        self.stream = self._release_stream = None
+        if stream is not None and release is not None:
+            try:
+                release(stream)
+            except Exception as e:
+                logging.error(f"Error releasing stream of session {self.session_id}: {str(e)}")
+
+    def touch(self):
+        self.last_active = time.time()
+
+    @property
+    def idle_seconds(self):
+        return time.time() - self.last_active
+
+
+class SessionManager:
+    """
+    Registry of live streaming sessions.
+
+    Args:
+        idle_timeout: seconds without audio after which a session is evicted.
+        max_buffer_seconds: maximum amount of audio a single session may hold.
+        overflow_policy: "drop" discards the oldest audio over the limit,
+            "flush" lets inference consume the buffer in max_buffer_seconds pieces and only
+            drops the oldest audio once twice max_buffer_seconds are buffered.
+        memory_budget_bytes: upper bound for the audio buffered by all sessions together.
+            Chunks that would exceed it are rejected.
+        reap_interval: seconds between two passes of the reaper thread.
+        denoise: give every session a StreamingDenoiser with its own running noise estimate.
+    """
+
+    def __init__(self, idle_timeout=60.0, max_buffer_seconds=30.0, overflow_policy="drop",
+                 memory_budget_bytes=256 * 1024 * 1024, reap_interval=10.0, sample_rate=SAMPLE_RATE,
+                 denoise=False):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+
+        self.idle_timeout = idle_timeout
+        self.max_buffer_seconds = max_buffer_seconds
+        self.overflow_policy = overflow_policy
+        self.memory_budget_bytes = memory_budget_bytes
+        self.reap_interval = reap_interval
+        self.sample_rate = sample_rate
+        self.denoise = denoise
+
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._reaper = None
+
+        # counters exposed through stats()
+        self._created_total = 0
+        self._evicted_total = 0
+        self._rejected_chunks = 0
+        self._rejected_bytes = 0
+        self._dropped_samples_released = 0
+
+    @classmethod
+    def from_env(cls):
+        """
+        Build a manager configured through SESSION_* environment variables
+        """
+        return cls(
+            idle_timeout=float(os.getenv("SESSION_IDLE_TIMEOUT_S", "60")),
+            max_buffer_seconds=float(os.getenv("SESSION_MAX_BUFFER_S", "30")),
+            overflow_policy=os.getenv("SESSION_OVERFLOW_POLICY", "drop"),
+            memory_budget_bytes=int(float(os.getenv("SESSION_MEMORY_BUDGET_MB", "256")) * 1024 * 1024),
+            reap_interval=float(os.getenv("SESSION_REAP_INTERVAL_S", "10")),
+            denoise=os.getenv("SESSION_DENOISE", "true").lower() in ("1", "true", "yes")
+        )
+
+    @property
+    def max_buffer_samples(self):
+        if not self.max_buffer_seconds:
+            return None
+        return int(self.max_buffer_seconds * self.sample_rate)
+
+    def create(self, session_id=None):
+        session_id = session_id or str(uuid.uuid4())
+        buffer = AudioBuffer(
+            sample_rate=self.sample_rate,
+            max_samples=self.max_buffer_samples,
+            overflow_policy=self.overflow_policy,
+            denoiser=StreamingDenoiser() if self.denoise else None
+        )
+        session = Session(session_id, buffer)
+        with self._lock:
+            self._sessions[session_id] = session
+            self._created_total += 1
+        return session
+
+    def get(self, session_id):
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def release(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is not None:
+                self._dropped_samples_released += session.buffer.dropped_samples
+        if session is not None:
+            session.detach_stream()
+        return session
+
+    def buffered_bytes(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return sum(session.buffer.nbytes for session in sessions)
+
+    def add_audio(self, session_id, audio_bytes):
+        """
+        Append client audio to a session buffer.
+        Returns False if the session is unknown or the chunk was rejected by the memory budget.
+        """
+        session = self.get(session_id)
+        if session is None:
+            return False
+        session.touch()
+
+        incoming = (len(audio_bytes) // 2) * BYTES_PER_SAMPLE
+        if self.memory_budget_bytes and self.buffered_bytes() + incoming > self.memory_budget_bytes:
+            with self._lock:
+                self._rejected_chunks += 1
+                self._rejected_bytes += incoming
+            logging.warning(f"Audio memory budget exhausted, dropping {incoming} bytes for session {session_id}")
+            return False
+
+        session.buffer.add_audio(audio_bytes)
+        return True
+
+    def reap(self):
+        """
+        Evict sessions that have been idle for longer than idle_timeout, returns the evicted ids
+        """
+        with self._lock:
+            expired = [
+                session_id for session_id, session in self._sessions.items()
+                if session.idle_seconds > self.idle_timeout
+            ]
+            evicted = [self._sessions.pop(session_id) for session_id in expired]
+            for session in evicted:
+                self._dropped_samples_released += session.buffer.dropped_samples
+            self._evicted_total += len(expired)
+
+        for session in evicted:
+            session.detach_stream()
+            logging.info(f"Evicted idle session {session.session_id}")
+        return expired
+
+    def start_reaper(self):
+        if self._reaper is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(self.reap_interval)
+                try:
+                    self.reap()
+                except Exception as e:
+                    logging.error(f"Error reaping sessions: {str(e)}")
+
+        self._reaper = threading.Thread(target=run, name="session-reaper", daemon=True)
+        self._reaper.start()
+
+    def stats(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            counters = {
+                "created_total": self._created_total,
+                "evicted_total": self._evicted_total,
+                "rejected_chunks": self._rejected_chunks,
+                "rejected_bytes": self._rejected_bytes,
+                "dropped_samples": self._dropped_samples_released
+            }
+        counters["dropped_samples"] += sum(session.buffer.dropped_samples for session in sessions)
+        buffered_bytes = sum(session.buffer.nbytes for session in sessions)
+        return {
+            "active_sessions": len(sessions),
+            "buffered_bytes": buffered_bytes,
+            "buffered_seconds": buffered_bytes / BYTES_PER_SAMPLE / self.sample_rate,
+            "memory_budget_bytes": self.memory_budget_bytes,
+            **counters
+        }
@@ -0,0 +1,109 @@
+"""
+Streaming spectral subtraction for /stream-audio sessions.
+
+The offline denoiser (preprocessing_noisy_audio.noise_reduction_with_estimation) needs
+the whole clip to find its quietest frames. This one processes overlapping STFT frames
+as chunks arrive: sqrt-Hann analysis and synthesis windows at 50% overlap reconstruct
+the signal exactly with overlap-add, and the noise spectrum is a running estimate that
+is updated with an exponential moving average on frames classified as non-speech.
+The work per chunk only depends on the chunk size, and the output lags the input by
+frame_size - hop_length samples.
+"""
+import numpy as np
+from scipy import fft as sp_fft
+
+from framing import frame_energy, frame_signal, hann_window
+
+
+class StreamingDenoiser:
+    """
+    Stateful spectral subtraction, one instance per stream.
+
+    Args:
+        frame_size: STFT frame length in samples (512 = 32 ms at 16 kHz)
+        hop_length: frame advance, must be frame_size / 2
+        noise_alpha: smoothing of the running noise estimate, closer to 1 adapts slower
+        speech_ratio: frames with more than speech_ratio times the noise energy count as speech
+            and don't update the noise estimate
+        gain_floor: lower bound of the spectral gain, > 0 leaves some residual noise
+            instead of musical artifacts
+    """
+
+    def __init__(self, frame_size=512, hop_length=256, noise_alpha=0.95, speech_ratio=3.0, gain_floor=0.0):
+        if frame_size != 2 * hop_length:
+            raise ValueError("StreamingDenoiser needs 50% overlap (frame_size == 2 * hop_length)")
+
+        self.frame_size = frame_size
+        self.hop_length = hop_length
+        self.noise_alpha = noise_alpha
+        self.speech_ratio = speech_ratio
+        self.gain_floor = gain_floor
+        # periodic Hann, its square root applied twice sums to one at 50% overlap
+        self.window = np.sqrt(hann_window(frame_size))
+
+        self.noise = None
+        self._pending = np.zeros(frame_size - hop_length, dtype=np.float32)
+        self._overlap = np.zeros(frame_size - hop_length, dtype=np.float32)
+
+    def _update_noise(self, magnitude):
+        energy = frame_energy(magnitude)
+        noise_energy = float(self.noise @ self.noise) if self.noise is not None else 0.0
+
+        if noise_energy == 0.0:
+            # no estimate yet (or only digital silence so far): start from the quietest quarter of the frames
+            quiet = magnitude[energy <= np.percentile(energy, 25)]
+            self.noise = quiet.mean(axis=0)
+            return
+
+        quiet = magnitude[energy < self.speech_ratio * noise_energy]
+        if len(quiet) == 0:
+            return
+        # the EMA over the quiet frames in order, in closed form
+        alpha = self.noise_alpha
+        weights = (1.0 - alpha) * alpha ** np.arange(len(quiet) - 1, -1, -1, dtype=np.float32)
+        self.noise = np.float32(alpha ** len(quiet)) * self.noise + weights @ quiet
+
+    def process(self, chunk):
+        """
+        Denoise the next chunk of float32 samples. Returns the cleaned samples that are
+        complete so far, a multiple of hop_length long.
+        """
+        buffer = np.concatenate((self._pending, np.asarray(chunk, dtype=np.float32)))
+        if len(buffer) < self.frame_size:
+            self._pending = buffer
+            return np.zeros(0, dtype=np.float32)
+
+        frames = frame_signal(buffer, self.frame_size, self.hop_length)
+        num_frames = len(frames)
+
+        # single precision throughout: float32 frames, complex64 spectrum
+        spectrum = sp_fft.rfft(frames * self.window, axis=1)
+        magnitude = np.abs(spectrum)
+        self._update_noise(magnitude)
+
+        # gain max(1 - N / |X|, floor), computed in the magnitude buffer
+        np.divide(self.noise, magnitude, out=magnitude, where=magnitude > 0)
+        np.subtract(1.0, magnitude, out=magnitude)
+        np.maximum(magnitude, self.gain_floor, out=magnitude)
+        spectrum *= magnitude
+
+        cleaned_frames = sp_fft.irfft(spectrum, n=self.frame_size, axis=1)
+        cleaned_frames *= self.window
+
+        # overlap-add: every hop is the first half of a frame plus the second half of the previous one
+        hop = self.hop_length
+        tails = np.vstack((self._overlap[np.newaxis], cleaned_frames[:-1, hop:]))
+        output = (cleaned_frames[:, :hop] + tails).ravel()
+
+        self._overlap = cleaned_frames[-1, hop:].copy()
+        self._pending = buffer[num_frames * hop:].copy()
+        return output
+
+    def flush(self):
+        """
+        Return the samples still held back at the end of the stream (followed by some zero padding)
+        """
+        output = self.process(np.zeros(self.frame_size, dtype=np.float32))
+        self._pending = np.zeros(self.frame_size - self.hop_length, dtype=np.float32)
+        self._overlap = np.zeros(self.frame_size - self.hop_length, dtype=np.float32)
+        return output
@@ -0,0 +1,109 @@
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from faster_whisper import WhisperModel
+
+from stt_backend import STTBackend, make_result
+
+# waveforms longer than one whisper window are decoded with BatchedInferencePipeline when it's available
+BATCHED_PIPELINE_MIN_SECONDS = 30.0
+
+def load_model(model_size="base", device="cpu", compute_type="default", cpu_threads=0, num_workers=1):
+    print(f"[INFO] Loading faster-whisper model: {model_size}")
+    return WhisperModel(
+        model_size,
+        device=device,
+        compute_type=compute_type,
+        cpu_threads=cpu_threads,
+        num_workers=num_workers
+    )
+
+def segment_dict(segment, offset=0.0, word_timestamps=False):
+    """
+    Convert a faster-whisper Segment into a plain dict, shifting its times by offset seconds
+    """
+    result = {"start": offset + segment.start, "end": offset + segment.end, "text": segment.text.strip()}
+    if word_timestamps and segment.words:
+        result["words"] = [
+            {"start": offset + word.start, "end": offset + word.end, "word": word.word, "probability": word.probability}
+            for word in segment.words
+        ]
+    return result
+
+class FasterWhisperBackend(STTBackend):
+    """
+    The waveforms of a batch are decoded concurrently, WhisperModel(num_workers=N) runs up to N
+    transcriptions in parallel. Long waveforms are additionally split into batched windows by
+    BatchedInferencePipeline (faster-whisper >= 1.1).
+    """
+    name = "faster_whisper"
+
+    def __init__(self, model, beam_size=5, num_workers=1):
+        self.model = model
+        self.beam_size = beam_size
+        self.num_workers = num_workers
+        try:
+            from faster_whisper import BatchedInferencePipeline
+            self.batched_pipeline = BatchedInferencePipeline(model=model)
+        except ImportError:
+            self.batched_pipeline = None
+
+    def _decode(self, audio, options):
+        kwargs = dict(
+            beam_size=options.get("beam_size", self.beam_size),
+            word_timestamps=options.get("word_timestamps", False),
+            language=options.get("language")
+        )
+        if self.batched_pipeline is not None and len(audio) / 16000 > BATCHED_PIPELINE_MIN_SECONDS:
+            return self.batched_pipeline.transcribe(audio, batch_size=options.get("batch_size") or 8, **kwargs)
+        return self.model.transcribe(audio, **kwargs)
+
+    def iter_segments(self, audio, options=None):
+        """
+        Yield the segment dicts of one 16 kHz waveform as they are decoded
+        """
+        options = options or {}
+        segments, _ = self._decode(audio, options)
+        for segment in segments:
+            yield segment_dict(segment, word_timestamps=options.get("word_timestamps", False))
+
+    def _transcribe_one(self, audio, options):
+        segments, info = self._decode(audio, options)
+        segments = [segment_dict(segment, word_timestamps=options.get("word_timestamps", False)) for segment in segments]
+        text = " ".join(segment["text"] for segment in segments)
+        return make_result(text, segments, info.language, len(audio) / 16000)
+
+    def _transcribe_batch(self, audios, options):
+        num_workers = max(1, options.get("num_workers", self.num_workers))
+        if num_workers == 1 or len(audios) == 1:
+            return [self._transcribe_one(audio, options) for audio in audios]
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            return list(executor.map(lambda audio: self._transcribe_one(audio, options), audios))
+
+def load_backend(model_size="base", device="cpu", compute_type="default", cpu_threads=0, num_workers=1, beam_size=5):
+    model = load_model(model_size, device, compute_type, cpu_threads, num_workers)
+    return FasterWhisperBackend(model, beam_size=beam_size, num_workers=num_workers)
+
+def main():
+    parser = argparse.ArgumentParser(description="faster-whisper STT Inference")
+    parser.add_argument("audio", nargs="+", help="Path to audio files, transcribed as one batch")
+    parser.add_argument("--model", default="base", help="Model size: tiny, base, small, medium, large-v3")
+    parser.add_argument("--num-workers", type=int, default=1, help="files decoded in parallel")
+
+    args = parser.parse_args()
+
+    missing = [path for path in args.audio if not os.path.isfile(path)]
+    if missing:
+        print(f"[ERROR] File not found: {', '.join(missing)}")
+        return
+
+    from audio_decoding import load_audio_file
+    backend = load_backend(args.model, num_workers=args.num_workers)
+    results = backend.transcribe_batch([load_audio_file(path) for path in args.audio], options={"num_workers": args.num_workers})
+    for path, result in zip(args.audio, results):
+        print(f"\n--- {path} ({result['language']}) ---")
+        print(result["text"])
+
+if __name__ == "__main__":
+    main()
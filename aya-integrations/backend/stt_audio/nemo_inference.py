@@ -1,9 +1,14 @@
 import argparse
 import os
+import tempfile
+import uuid
+import soundfile as sf
 import torch
 import torchaudio
 from nemo.collections.asr.models import ASRModel
 
+from stt_backend import STTBackend, make_result
+
 def load_model(model_name="stt_en_conformer_ctc_small"):
     print(f"[INFO] Loading NeMo ASR model: {model_name}")
     model = ASRModel.from_pretrained(model_name=model_name)
@@ -22,6 +27,37 @@ def preprocess_audio(audio_path):
 
     return audio_path
 
+class NemoBackend(STTBackend):
+    """
+    NeMo batches file paths, the waveforms are written to temporary wav files and transcribed with batch_size
+    """
+    name = "nemo"
+
+    def __init__(self, model):
+        self.model = model
+
+    def _transcribe_batch(self, audios, options):
+        temp_dir = tempfile.gettempdir()
+        paths = []
+        try:
+            for audio in audios:
+                path = os.path.join(temp_dir, f"{uuid.uuid4()}_batch.wav")
+                sf.write(path, audio, 16000)
+                paths.append(path)
+            transcriptions = self.model.transcribe(paths, batch_size=len(paths))
+        finally:
+            for path in paths:
+                if os.path.exists(path):
+                    os.remove(path)
+
+        return [
+            make_result(result.text if hasattr(result, "text") else result, duration=len(audio) / 16000)
+            for audio, result in zip(audios, transcriptions)
+        ]
+
+def load_backend(model_name="stt_en_conformer_ctc_small"):
+    return NemoBackend(load_model(model_name))
+
 def transcribe_audio(model, audio_path):
     processed_path = preprocess_audio(audio_path)
     print(f"[INFO] Transcribing: {processed_path}")
@@ -1,77 +1,107 @@
-import librosa
 import numpy as np
 import soundfile as sf
-import webrtcvad
-import torch
 
-def load_audio(path, sr=16000):
-    audio, _ = librosa.load(path, sr=sr)
-    return audio, sr
+from audio_decoding import DEFAULT_RESAMPLE_QUALITY, load_audio_file
+from framing import frame_energy, frame_signal, scratch_buffer, stft, stft_frame_count, istft
+from vad import detect_speech_segments, speech_samples
 
-def estimate_noise_profile(audio, sr, frame_size=2048, hop_length=512):
-    energy = np.array([
-        np.sum(np.square(audio[i:i+frame_size]))
-        for i in range(0, len(audio) - frame_size, hop_length)
-    ])
+def load_audio(path, sr=16000, resample_quality=DEFAULT_RESAMPLE_QUALITY):
+    # soundfile/ffmpeg front end, 16 kHz mono files skip resampling entirely
+    return load_audio_file(path, sr, resample_quality), sr
+
+def _noise_profile_from_magnitude(magnitude):
+    # frame energies straight from the (frames, bins) spectrogram, the quietest quarter of the frames is noise
+    energy = frame_energy(magnitude)
     threshold = np.percentile(energy, 25)
-    low_energy_indices = np.where(energy < threshold)[0]
+    low_energy = energy < threshold
+    if not low_energy.any():
+        low_energy = energy <= threshold
+    return magnitude.mean(axis=0, where=low_energy[:, np.newaxis])
+
+def _spectrogram(audio, frame_size, hop_length):
+    # float32 magnitude and complex64 spectrum in scratch buffers reused across calls
+    shape = (stft_frame_count(len(audio), frame_size, hop_length), frame_size // 2 + 1)
+    stft_audio = stft(audio, frame_size, hop_length, out=scratch_buffer("denoise_spectrum", shape, np.complex64))
+    magnitude = np.abs(stft_audio, out=scratch_buffer("denoise_magnitude", shape, np.float32))
+    return stft_audio, magnitude
 
-    stft = librosa.stft(audio, n_fft=frame_size, hop_length=hop_length)
-    low_energy_mag = np.abs(stft[:, low_energy_indices])
-    noise_profile = np.mean(low_energy_mag, axis=1)
-    return noise_profile
+def estimate_noise_profile(audio, sr, frame_size=2048, hop_length=512):
+    _, magnitude = _spectrogram(np.asarray(audio, dtype=np.float32), frame_size, hop_length)
+    return _noise_profile_from_magnitude(magnitude)
 
 def noise_reduction_with_estimation(audio, sr, frame_size=2048, hop_length=512):
-    noise_profile = estimate_noise_profile(audio, sr, frame_size, hop_length)
-
-    stft_audio = librosa.stft(audio, n_fft=frame_size, hop_length=hop_length)
-    magnitude, phase = np.abs(stft_audio), np.angle(stft_audio)
-
-    cleaned_magnitude = np.maximum(magnitude - noise_profile[:, np.newaxis], 0)
-    cleaned_audio = librosa.istft(cleaned_magnitude * np.exp(1j * phase), hop_length=hop_length)
+    audio = np.asarray(audio, dtype=np.float32)
+    # one STFT serves both the noise estimate and the subtraction
+    stft_audio, magnitude = _spectrogram(audio, frame_size, hop_length)
+    noise_profile = _noise_profile_from_magnitude(magnitude)
+
+    # max(|X| - N, 0) * e^(j*phase) == X * max(1 - N / |X|, 0), computed in place in the magnitude buffer;
+    # bins with |X| == 0 get gain 0 after the division overflows, which doesn't change them
+    with np.errstate(divide="ignore", over="ignore"):
+        np.maximum(magnitude, np.finfo(np.float32).tiny, out=magnitude)
+        np.divide(noise_profile, magnitude, out=magnitude)
+    np.subtract(np.float32(1.0), magnitude, out=magnitude)
+    np.maximum(magnitude, np.float32(0.0), out=magnitude)
+    stft_audio *= magnitude
+
+    cleaned_audio = istft(stft_audio, hop_length, length=len(audio))
     return cleaned_audio
 
-def apply_vad(audio, sr, frame_duration_ms=30):
-    if sr not in (8000, 16000, 32000, 48000):
-        raise ValueError(f"Unsupported sample rate {sr} for VAD")
-
-    vad = webrtcvad.Vad(2)
-    samples = (audio * 32768).astype(np.int16) 
-    bytes_audio = samples.tobytes()
-
-    frame_length = int(sr * frame_duration_ms / 1000) 
-    byte_length = frame_length * 2 
-
-    speech_bytes = bytearray()
-    for i in range(0, len(bytes_audio) - byte_length + 1, byte_length):
-        frame = bytes_audio[i : i + byte_length]
-        if len(frame) == byte_length and vad.is_speech(frame, sr):
-            speech_bytes.extend(frame)
+def estimate_snr(audio, sr, frame_duration_ms=20):
+    # loud frames (90th percentile energy) against the noise floor (10th percentile), in dB
+    frame_length = int(sr * frame_duration_ms / 1000)
+    frames = frame_signal(np.asarray(audio, dtype=np.float32), frame_length)
+    if len(frames) < 10:
+        return None
+
+    energy = frame_energy(frames) / frame_length
+    noise_floor, signal = np.percentile(energy, [10, 90])
+    return float(10 * np.log10((signal + 1e-10) / (noise_floor + 1e-10)))
+
+def choose_preprocessing(snr_db, clean_snr_db=30.0, noisy_snr_db=15.0):
+    # "none" for clean audio, "vad" to only drop the pauses, "denoise" for spectral subtraction plus VAD
+    if snr_db is None or snr_db < noisy_snr_db:
+        return "denoise"
+    if snr_db < clean_snr_db:
+        return "vad"
+    return "none"
 
-    if len(speech_bytes) == 0:
+def apply_vad(audio, sr, frame_duration_ms=30):
+    # plain per-frame decisions (no smoothing or hangover), the speech is sliced from the original samples
+    segments = detect_speech_segments(audio, sr, frame_duration_ms, smoothing_ms=0, hangover_ms=0, min_speech_ms=0)
+    if len(segments) == 0:
         return audio
 
-    speech_int16 = np.frombuffer(speech_bytes, dtype=np.int16)
-    return speech_int16.astype(np.float32) / 32768.0
+    return speech_samples(audio, segments).astype(np.float32)
 
-def extract_mfcc(audio, sr, n_mfcc=13, hop_length=160):
-    mfccs = librosa.feature.mfcc(y=audio, sr=sr, n_mfcc=n_mfcc, hop_length=hop_length)
+def preprocess(audio, sr, preprocessing="denoise", apply_vad_filter=True):
+    # "denoise": spectral subtraction then VAD, "vad": VAD only, "none": unchanged
+    cleaned_audio = np.asarray(audio, dtype=np.float32)
+    if preprocessing == "denoise":
+        cleaned_audio = noise_reduction_with_estimation(cleaned_audio, sr)
+    if apply_vad_filter and preprocessing != "none":
+        cleaned_audio = apply_vad(cleaned_audio, sr)
+    return cleaned_audio.astype(np.float32, copy=False)
+
+def extract_mfcc(audio, sr, n_mfcc=13, hop_length=160, n_fft=2048):
+    import librosa
+    # same power spectrogram librosa would compute, but framed with the shared STFT
+    power = np.abs(stft(audio, n_fft, hop_length)).T ** 2
+    mel = librosa.feature.melspectrogram(S=power, sr=sr, n_fft=n_fft)
+    mfccs = librosa.feature.mfcc(S=librosa.power_to_db(mel), sr=sr, n_mfcc=n_mfcc)
     return mfccs
 
 def frame_audio(audio, frame_size, hop_size):
-    num_frames = 1 + int((len(audio) - frame_size) / hop_size)
-    frames = np.stack([
-        audio[i * hop_size : i * hop_size + frame_size] for i in range(num_frames)
-    ])
-    return frames
+    # read-only view, frames share memory with audio
+    return frame_signal(audio, frame_size, hop_size)
 
-def save_audio(audio_path, output_path="temp_cleaned_audio.wav", apply_vad_filter=True):
+def save_audio(audio_path, output_path="temp_cleaned_audio.wav", apply_vad_filter=True, adaptive=False):
     audio, sr = load_audio(audio_path, sr=16000)
 
-    cleaned_audio = noise_reduction_with_estimation(audio, sr)
+    # adaptive mode skips the stages the clip's SNR doesn't need
+    mode = choose_preprocessing(estimate_snr(audio, sr)) if adaptive else "denoise"
 
-    if apply_vad_filter:
-        cleaned_audio = apply_vad(cleaned_audio, sr)
+    cleaned_audio = preprocess(audio, sr, mode, apply_vad_filter)
 
     sf.write(output_path, cleaned_audio, sr)
     return output_path
@@ -4,18 +4,24 @@
 import numpy as np
 import torchaudio
 import torch
-import queue
 import math
+import threading
 import logging
 
-from typing import Union, List
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Union, List
 from simuleval import options
 from simuleval.utils.arguments import cli_argument_list
 from simuleval.data.segments import Segment, TextSegment, SpeechSegment
 from seamless_communication.streaming.agents.seamless_streaming_s2t import SeamlessStreamingS2TVADAgent
 
+from seamless_languages import check_tgt_lang
+from stt_backend import STTBackend, make_result
+
 MODEL_SAMPLE_RATE_HERTZ = 16000
 TASK="s2tt"
+MAX_IDLE_SESSIONS = 4 # released sessions (states + front end) kept per wrapper for reuse
+MAX_FLUSH_STEPS = 1000 # upper bound for the pushpop calls that drain the system after the end of the input
 
 
 class AudioFrontEnd:
@@ -24,110 +30,124 @@ class AudioFrontEnd:
         """ This class is responsible for loading, preprocessing, storing input audio data to be provided to inference system at a later stage.
         During inference, the inference system will keep calling send_segment to get a new segment of audio data.
 
+        Input audio is mono-mixed and resampled to MODEL_SAMPLE_RATE_HERTZ once per put_audio_data call and appended to one
+        contiguous buffer. Segments are views into that buffer, samples that were handed out are never overwritten.
+
         Args:
             segment_size_ms: size in milliseconds of the audio segment to be provided to the inference system.
         """
-        self.input_queue = queue.Queue() # queue to store input data before providing it to the inference system
         self.segment_size_ms = segment_size_ms
-    
+        self.segment_size_samples = math.ceil(segment_size_ms / 1000 * MODEL_SAMPLE_RATE_HERTZ)
+        self._lock = threading.Lock()
+        self._buffer = np.empty(0, dtype=np.float32) # resampled mono audio at MODEL_SAMPLE_RATE_HERTZ
+        self._read_pos = 0  # start of the next segment in _buffer
+        self._write_pos = 0 # end of the valid audio in _buffer
+
     def put_audio_data_from_file(self, file_path: str, **kwargs):
-        """ function reads audio data from file and stores it in the input queue 
+        """ function reads audio data from file and stores it in the input buffer
         Args:
             file_path: path to input file
             kwargs: kwargs to read the input file
         """
         import soundfile as sf
+        kwargs.setdefault("dtype", "float32")
         data, sample_rate = sf.read(file_path, **kwargs)
         self.put_audio_data(input_sample_rate=sample_rate, input_audio_data=data)
-    
+
     @staticmethod
     def is_stereo_data(data: np.array):
         """ function check if the provided data is stereo audio """
         return (data.ndim == 2) and (data.shape[1] == 2)
-        
-    def put_audio_data(self, input_sample_rate: int, input_audio_data: np.array):
-        """ function adds input data to the input queue
+
+    @staticmethod
+    def to_model_input(input_sample_rate: int, input_audio_data: np.array) -> np.array:
+        """ mono-mix the input and resample it to the sample rate of the inference system in one pass """
+        input_audio_data = np.asarray(input_audio_data, dtype=np.float32)
+        if input_audio_data.ndim == 2:
+            input_audio_data = input_audio_data.mean(axis=1, dtype=np.float32)
+
+        assert input_audio_data.ndim == 1
+
+        if input_sample_rate != MODEL_SAMPLE_RATE_HERTZ and len(input_audio_data) > 0:
+            input_audio_data = torchaudio.functional.resample(
+                torch.from_numpy(np.ascontiguousarray(input_audio_data)),
+                orig_freq=input_sample_rate,
+                new_freq=MODEL_SAMPLE_RATE_HERTZ
+            ).numpy()
+        return input_audio_data
+
+    def put_audio_data(self, input_sample_rate: int, input_audio_data: np.array, pad_last_segment: bool = True):
+        """ function adds input data to the input buffer
 
         Args:
             input_sample_rate: sample rate (frequency) of the input audio data
             input_audio_data: np array holding audio data
-        
+            pad_last_segment: pad the buffered audio with zeros to a whole number of segments. When False, a partial
+                last segment stays buffered until more audio arrives.
         """
-
-        if self.is_stereo_data(input_audio_data):
-            input_audio_data = np.mean(input_audio_data, axis=1)
-
-        assert input_audio_data.ndim == 1
-
         assert self.segment_size_ms is not None
 
-        segment_size_samples = math.ceil(self.segment_size_ms / 1000 * input_sample_rate)
-        audio_input_length = input_audio_data.shape[0]
-
-        # if the size of input data is the expected size of 1 segment, add it directly to the queue
-        if segment_size_samples == audio_input_length:
-            self.input_queue.put_nowait((input_sample_rate, input_audio_data))
-
-        # if the size of the input data is smaller than the size of 1 segment, pad it with zeros, then add it to the queue
-        elif segment_size_samples > audio_input_length:
-            pad_size = segment_size_samples - audio_input_length
-            input_audio_data = np.pad(input_audio_data, (0, pad_size), 'constant', constant_values=0)
-            self.input_queue.put_nowait((input_sample_rate, input_audio_data))
-
-        else:
-            # this should be the normal case
-            # if the size of the input data is greater than the size of 1 segment, 
-            #   pad it with zeros so that it is divisible by the size of the segment
-            #   add each segment to the input queue
-
-            num_splits, remainder = divmod(audio_input_length, segment_size_samples)
-
-            # division has a remainder -> indicating that padding is needed to complete the last segment
-            if remainder > 0:
-                pad_size = segment_size_samples - remainder
-                input_audio_data = np.pad(input_audio_data, (0, pad_size), 'constant', constant_values=0)
-                num_splits = num_splits + 1
-            
-            # split the data into segments and add it to the queue
-            audio_segments = np.split(input_audio_data, indices_or_sections=num_splits)
-            for s in audio_segments:
-                self.input_queue.put_nowait((input_sample_rate, s))
-                
-    
+        samples = self.to_model_input(input_sample_rate, input_audio_data)
+
+        with self._lock:
+            pending = self._write_pos - self._read_pos
+            needed = pending + len(samples)
+            if pad_last_segment:
+                needed = math.ceil(needed / self.segment_size_samples) * self.segment_size_samples
+
+            if self._write_pos - pending + needed > len(self._buffer):
+                # move the pending samples to a new buffer, segments already sent keep referencing the old one
+                buffer = np.empty(max(needed, 2 * len(self._buffer) - self._read_pos), dtype=np.float32)
+                buffer[:pending] = self._buffer[self._read_pos:self._write_pos]
+                self._buffer, self._read_pos, self._write_pos = buffer, 0, pending
+
+            self._buffer[self._write_pos:self._write_pos + len(samples)] = samples
+            self._write_pos += len(samples)
+            if pad_last_segment:
+                end = self._read_pos + needed
+                self._buffer[self._write_pos:end] = 0.0
+                self._write_pos = end
+
+    def flush(self):
+        """ pad a buffered partial segment with zeros so that it can be sent, used at the end of a stream """
+        self.put_audio_data(input_sample_rate=MODEL_SAMPLE_RATE_HERTZ, input_audio_data=np.empty(0, dtype=np.float32))
+
+    def clear(self):
+        """ drop the buffered audio. The buffer itself is kept for the next input, only call this once the
+        inference states that referenced earlier segments have been reset """
+        with self._lock:
+            self._read_pos = self._write_pos = 0
+
+    def _next_segment_samples(self):
+        """ view of the next complete segment in the buffer, None if there isn't one """
+        with self._lock:
+            if self._write_pos - self._read_pos < self.segment_size_samples:
+                return None
+            samples = self._buffer[self._read_pos:self._read_pos + self.segment_size_samples]
+            self._read_pos += self.segment_size_samples
+            return samples
+
     def send_segment(self):
-        """ main function that is called every time by the inference system to get new data"""
-        segment = None
-
-        # check if input queue is empty
-        if not self.input_queue.empty():
-            sample_rate, samples = self.input_queue.get()
-
-            # downsample the sample rate of the input data to the one expected by the inference system
-            if sample_rate > MODEL_SAMPLE_RATE_HERTZ:
-                samples = torchaudio.functional.resample(torch.from_numpy(samples), orig_freq=sample_rate, new_freq=MODEL_SAMPLE_RATE_HERTZ).numpy()
-                sample_rate = MODEL_SAMPLE_RATE_HERTZ
-            
-            assert sample_rate == MODEL_SAMPLE_RATE_HERTZ, f"sample rate of input data {sample_rate} does not match the sample rate expected by the inference engine {MODEL_SAMPLE_RATE_HERTZ}"
-
-            # create a speech segment from the audio data
-            segment = SpeechSegment(
-                    content=samples,
-                    sample_rate=sample_rate,
-                    finished=False,
-                    is_empty=False
-                )
-        
-        else:
-            # if the input queue is empty, provide a speech segment with zeros
-            silence_segment_size = math.ceil(self.segment_size_ms / 1000 * MODEL_SAMPLE_RATE_HERTZ)
-            segment = SpeechSegment(
-                content=np.zeros(silence_segment_size),
+        """ main function that is called every time by the inference system to get new data.
+        Returns None when no complete segment is buffered, silence is never synthesized. """
+        samples = self._next_segment_samples()
+        if samples is None:
+            return None
+
+        # create a speech segment from the audio data
+        return SpeechSegment(
+                content=samples,
                 sample_rate=MODEL_SAMPLE_RATE_HERTZ,
-                finished=True, # indicate that the input data is finished
-                is_empty=True  # indicate that the speech segment has invalid data
-            ) 
-        
-        return segment
+                finished=False,
+                is_empty=False
+            )
+
+    def iter_segments(self) -> Iterator[SpeechSegment]:
+        """ yield the buffered complete segments """
+        segment = self.send_segment()
+        while segment is not None:
+            yield segment
+            segment = self.send_segment()
 
 
 class OutputSegments:
@@ -145,9 +165,40 @@ class OutputSegments:
     def finished(self):
         return all(segment.finished for segment in self.segments)
 
-class SeamlessStreamingWrapper(object):
+class SeamlessSession:
+
+    def __init__(self, system, segment_size_ms: int, tgt_lang: str = "eng"):
+        """ Lightweight per-stream inference state. The agent pipeline (and its model weights) is shared by all sessions,
+        each session only owns the pipeline states and the audio front end that feeds them.
+
+        Args:
+            system: SeamlessStreamingS2TVADAgent the states are built for
+            segment_size_ms: size in milliseconds of the audio segments provided to the inference system
+            tgt_lang: target language to translate the input audio to
+        """
+        self.states = system.build_states()
+        self.audio_frontend = AudioFrontEnd(segment_size_ms=segment_size_ms)
+        self.tgt_lang = tgt_lang
+        # pushed repeatedly to drain the pipeline once the input ended. It carries no audio and is reused
+        # for every stream of the session (speech segments aren't, the agents may still queue them)
+        self.end_of_source = SpeechSegment(
+            content=np.empty(0, dtype=np.float32),
+            sample_rate=MODEL_SAMPLE_RATE_HERTZ,
+            finished=True, # indicate that the input data is finished
+            is_empty=True  # indicate that the speech segment has no data
+        )
+
+    def reset(self):
+        """ reset the pipeline states and drop the buffered audio """
+        SeamlessStreamingWrapper.reset_states(self.states)
+        self.audio_frontend.clear()
+
+
+class SeamlessStreamingWrapper(STTBackend):
 
-    def __init__(self, model_config: dict, audio_frontend: AudioFrontEnd, tgt_lang: str = "eng"):
+    name = "seamless"
+
+    def __init__(self, model_config: dict, tgt_lang: str = "eng", max_idle_sessions: int = MAX_IDLE_SESSIONS):
         """ This is a wrapper class used to run the seamless streaming model. It is the primary class used for inference.
         It wraps the SeamlessStreamingS2TVADAgent from seamless_communication library. SeamlessStreamingS2TVADAgent is the seamless streaming inference system. It has 5 stages which are run in pipeline to produce the output segments
 
@@ -157,25 +208,30 @@ class SeamlessStreamingWrapper(object):
         - MMASpeechToTextDecoderAgent -> model that converts encodings into text tokens
         - DetokenizerAgent -> final stage that convert the text tokens into text (output segments)
 
+        The system is built once and shared. Every inference runs on a SeamlessSession (states + audio front end) taken from
+        a pool, so concurrent callers don't mix their audio or states and no extra copies of the model are loaded.
+        The target language is a property of the session, so one model serves every supported output language.
+
         Args:
             model_config: dictionary with seamless model configuration that will be used to create an instance of seamless inference system.
-            audio_frontend: frontend use to retrive input data
-            tgt_lang: target language to translate the input audio to.
-        
+            tgt_lang: default target language to translate the input audio to.
+            max_idle_sessions: number of released sessions kept for reuse, per target language
         """
 
-        #  seamless system used for inference
+        #  seamless system used for inference, shared by all sessions
         self._system =  self.build_system_from_config(model_config)
 
-        # seamless system states used during inference
-        self._system_states = self._system.build_states()
+        # size of the audio segments fed to the system
+        self.segment_size_ms = model_config["source_segment_size"]
 
-        # audio frontend to get input data from
-        self._audio_frontend = audio_frontend
-
-        # target language fro translation
+        # default target language fro translation
         self.tgt_lang = tgt_lang
 
+        # released sessions per target language, reset and ready to be reused
+        self.max_idle_sessions = max_idle_sessions
+        self._idle_sessions: Dict[str, List[SeamlessSession]] = {}
+        self._pool_lock = threading.Lock()
+
     @staticmethod
     def reset_states(states):
         """ reset the states used in the inference system"""
@@ -199,72 +255,125 @@ class SeamlessStreamingWrapper(object):
         system = SeamlessStreamingS2TVADAgent.from_args(args)
         return system
 
-
-    def _run_inference_pipeline(self, return_partial_predictions: bool = False) -> Union[str, List[str]]:
-        """ This is primary function used for inference. It takes input from the audio_frontend and produces the predicted text
+    def acquire_session(self, tgt_lang: Optional[str] = None) -> SeamlessSession:
+        """ take a session for tgt_lang (default: the wrapper's tgt_lang) from the pool, a new one is built when none is idle """
+        tgt_lang = tgt_lang or self.tgt_lang
+        # idle sessions are pooled per language, only supported languages get a pool
+        check_tgt_lang(tgt_lang)
+        with self._pool_lock:
+            idle_sessions = self._idle_sessions.get(tgt_lang)
+            if idle_sessions:
+                return idle_sessions.pop()
+        return SeamlessSession(self._system, self.segment_size_ms, tgt_lang)
+
+    def release_session(self, session: SeamlessSession):
+        """ reset the session and return it to the pool of its target language """
+        session.reset()
+        with self._pool_lock:
+            idle_sessions = self._idle_sessions.setdefault(session.tgt_lang, [])
+            if len(idle_sessions) < self.max_idle_sessions:
+                idle_sessions.append(session)
+
+    @contextmanager
+    def session(self, tgt_lang: Optional[str] = None):
+        """ context manager around acquire_session / release_session """
+        session = self.acquire_session(tgt_lang)
+        try:
+            yield session
+        finally:
+            self.release_session(session)
+
+
+    def _pushpop(self, session: SeamlessSession, input_segment: Segment):
+        """ run one input segment through the system, returns the texts it produced and whether the output finished """
+        # set target language
+        input_segment.tgt_lang = session.tgt_lang
+
+        # Run inference sysetem
+        output_segments = OutputSegments(self._system.pushpop(input_segment, session.states))
+
+        texts: List[str] = []
+        if not output_segments.is_empty:
+            # keep the segments that have text
+            texts = [segment.content for segment in output_segments.segments if isinstance(segment, TextSegment)]
+
+        # if the system finished producing output for the provided input, reset it states
+        if output_segments.finished:
+            self.reset_states(session.states)
+
+        return texts, output_segments.finished
+
+    def _iter_predictions(self, session: SeamlessSession) -> Iterator[str]:
+        """ push the session's buffered segments, then end the source and drain the system until its output is finished.
+        Yields the predicted texts as they are produced. """
+        for input_segment in session.audio_frontend.iter_segments():
+            texts, _ = self._pushpop(session, input_segment)
+            yield from texts
+
+        # indicate the end of the input to the inference system once, then only drain it
+        session.states[0].source_finished = True
+        for _ in range(MAX_FLUSH_STEPS):
+            texts, output_finished = self._pushpop(session, session.end_of_source)
+            yield from texts
+            if output_finished:
+                return
+
+        logging.warning(f"Seamless output not finished after {MAX_FLUSH_STEPS} flush steps, resetting the states")
+        self.reset_states(session.states)
+
+    def _run_inference_pipeline(self, session: SeamlessSession, return_partial_predictions: bool = False) -> Union[str, List[str]]:
+        """ This is primary function used for inference. It takes input from the session's audio front end and produces the predicted text
         
         Args:
+            session: session whose audio front end and states are used
             return_partial_predictions: return the partial predictions produced by the model instead of one combined single text
         """
-        # list of predicted texts
-        prediction_lists: List[str] = []
-
-        # current delay, variable only used for display purposes
-        curr_delay = 0
-
-        while True:
-            # read data from front end
-            input_segment = self._audio_frontend.send_segment()
-            # set target language
-            input_segment.tgt_lang = self.tgt_lang
-            curr_delay += len(input_segment.content) / MODEL_SAMPLE_RATE_HERTZ * 1000
-            # if audio_frontend finished producing data, indicate this to inference system
-            if input_segment.finished:
-                self._system_states[0].source_finished = True
-
-            # Run inference sysetem
-            output_segments = OutputSegments(self._system.pushpop(input_segment, self._system_states))
-
-            # if output segments are produces
-            if not output_segments.is_empty:
-                for segment in output_segments.segments:
-                    # check if each segment has text
-                    if isinstance(segment, TextSegment):
-                        # add text to the predicted texts and print also print it.
-                        prediction_lists.append(segment.content)
-                        # logging.info(f"{curr_delay} {segment.content}")
-            
-            # if the system finished producing output for the provided input, reset it states
-            if output_segments.finished:
-                self.reset_states(self._system_states)
-            
-            # if audio_frontend finished producing input data, and inference system finished producing output, break
-            if input_segment.finished and output_segments.finished:
-                # once source_finished=True, generate until output translation is finished
-                break
+        prediction_lists = list(self._iter_predictions(session))
 
         if return_partial_predictions:
             return prediction_lists
-        
-        else:
-            text = " ".join(prediction_lists)
 
-        return text
-    
-
-    def run_inference(self, input_sample_rate: int, input_audio_data: np.array, return_partial_predictions: bool = False):
-        """ run inference on the provided data sample """
-        self._audio_frontend.put_audio_data(input_sample_rate=input_sample_rate, 
-                                                input_audio_data=input_audio_data)
-        preds = self._run_inference_pipeline(return_partial_predictions) 
-        
-        return preds
+        return " ".join(prediction_lists)
+
+    def push_audio(self, session: SeamlessSession, input_sample_rate: int, input_audio_data: np.array) -> Iterator[str]:
+        """ incremental streaming: add a chunk of audio to the session and run every complete segment through the system
+        without finishing the source, so the encoder/decoder context carries over to the next chunk.
+        Yields the text of every TextSegment as soon as it is produced. """
+        session.audio_frontend.put_audio_data(input_sample_rate=input_sample_rate,
+                                              input_audio_data=input_audio_data,
+                                              pad_last_segment=False)
+        for input_segment in session.audio_frontend.iter_segments():
+            texts, _ = self._pushpop(session, input_segment)
+            yield from texts
+
+    def finish_stream(self, session: SeamlessSession) -> Iterator[str]:
+        """ end of a stream started with push_audio: send the buffered remainder, finish the source and yield the remaining text """
+        session.audio_frontend.flush()
+        yield from self._iter_predictions(session)
+
+    def run_inference(self, input_sample_rate: int, input_audio_data: np.array, return_partial_predictions: bool = False,
+                      tgt_lang: Optional[str] = None):
+        """ run inference on the provided data sample, translating to tgt_lang (default: the wrapper's tgt_lang) """
+        with self.session(tgt_lang) as session:
+            session.audio_frontend.put_audio_data(input_sample_rate=input_sample_rate,
+                                                  input_audio_data=input_audio_data)
+            return self._run_inference_pipeline(session, return_partial_predictions)
     
-    def transcribe_file(self, file_path, return_partial_predictions: bool = False):
-        """ run inference on the audio data provided in the file """
-        self._audio_frontend.put_audio_data_from_file(file_path=file_path)
-        preds = self._run_inference_pipeline(return_partial_predictions)
-        return preds
+    def _transcribe_batch(self, audios: List[np.array], options: dict) -> List[dict]:
+        """ STTBackend interface. The streaming system runs one stream per session, the waveforms of a batch are
+        translated one after the other on one pooled session each """
+        tgt_lang = options.get("tgt_lang") or self.tgt_lang
+        return [
+            make_result(self.run_inference(MODEL_SAMPLE_RATE_HERTZ, audio, tgt_lang=tgt_lang),
+                        language=tgt_lang, duration=len(audio) / MODEL_SAMPLE_RATE_HERTZ)
+            for audio in audios
+        ]
+
+    def transcribe_file(self, file_path, return_partial_predictions: bool = False, tgt_lang: Optional[str] = None):
+        """ run inference on the audio data provided in the file, translating to tgt_lang (default: the wrapper's tgt_lang) """
+        with self.session(tgt_lang) as session:
+            session.audio_frontend.put_audio_data_from_file(file_path=file_path)
+            return self._run_inference_pipeline(session, return_partial_predictions)
 
 def get_seamless_default_config() -> dict:
     tgt_lang = "eng"
@@ -285,8 +394,7 @@ def get_seamless_default_config() -> dict:
     return model_config
 
 def load_model(model_config: dict) -> SeamlessStreamingWrapper:
-    audio_frontend = AudioFrontEnd(segment_size_ms=model_config["source_segment_size"])
-    wrapper = SeamlessStreamingWrapper(model_config=model_config, audio_frontend=audio_frontend, tgt_lang=model_config["tgt_lang"])
+    wrapper = SeamlessStreamingWrapper(model_config=model_config, tgt_lang=model_config["tgt_lang"])
     return wrapper
 
 if __name__ == "__main__":
@@ -294,6 +402,7 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description="Seamless Inference")
     parser.add_argument("audio", help="Path to audio file")
+    parser.add_argument("--tgt-lang", default="eng", help="target language code, e.g. eng, fra, spa")
 
     args = parser.parse_args()
 
@@ -301,7 +410,8 @@ if __name__ == "__main__":
     model_config["device"] = "cpu"
     wrapper = load_model(model_config=model_config)
     text = wrapper.transcribe_file(
-        file_path=args.audio
+        file_path=args.audio,
+        tgt_lang=args.tgt_lang
     )
     print(text)
 
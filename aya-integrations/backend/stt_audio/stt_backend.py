@@ -0,0 +1,92 @@
+"""
+Common interface of the speech-to-text backends (stt_audio/*_inference.py).
+
+Every backend transcribes a batch of mono float32 waveforms and returns one result per waveform:
+
+    {
+        "text": "the whole transcription",
+        "segments": [{"start": 0.0, "end": 2.4, "text": "..."}],   # seconds from the start of the waveform
+        "language": "en",                                          # None when the model doesn't tell
+        "timings": {"audio_s": 2.4, "batch_s": 0.31, "batch_size": 8}
+    }
+
+transcribe_batch splits the input into batches of options["batch_size"] and each backend runs a batch
+the way its model batches natively (padded forward passes, batch_size, concurrent decoders).
+batch_s is the wall time of the batch a waveform was part of.
+
+Options are a plain dict, backends ignore the keys that don't apply to them:
+    batch_size, beam_size, num_workers, word_timestamps, language, tgt_lang
+"""
+import time
+
+import numpy as np
+
+from audio_decoding import resample
+
+SAMPLE_RATE = 16000
+DEFAULT_BATCH_SIZE = 8
+
+
+def prepare_audio(audio, sample_rate=SAMPLE_RATE):
+    """
+    Mono float32 waveform at SAMPLE_RATE, multi-channel input is (samples, channels)
+    """
+    audio = np.asarray(audio, dtype=np.float32)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1, dtype=np.float32)
+    return resample(audio, sample_rate, SAMPLE_RATE)
+
+
+def make_result(text, segments=None, language=None, duration=0.0):
+    """
+    Result dict of one waveform, a single segment covering the waveform is used when segments is None
+    """
+    text = text.strip()
+    if segments is None:
+        segments = [{"start": 0.0, "end": duration, "text": text}] if text else []
+    return {"text": text, "segments": segments, "language": language, "timings": {"audio_s": duration}}
+
+
+def shift_segment(segment, offset):
+    """
+    Copy of a segment (and its words) with the times shifted by offset seconds
+    """
+    shifted = {**segment, "start": offset + segment["start"], "end": offset + segment["end"]}
+    if "words" in segment:
+        shifted["words"] = [{**word, "start": offset + word["start"], "end": offset + word["end"]} for word in segment["words"]]
+    return shifted
+
+
+class STTBackend:
+    """
+    Base class of the backends, subclasses implement _transcribe_batch on SAMPLE_RATE input
+    """
+    name = None
+
+    def transcribe_batch(self, audios, sample_rate=SAMPLE_RATE, options=None):
+        """
+        Transcribe a list of waveforms, returns the result dicts in the same order
+        """
+        options = dict(options or {})
+        audios = [prepare_audio(audio, sample_rate) for audio in audios]
+        batch_size = max(1, int(options.get("batch_size") or DEFAULT_BATCH_SIZE))
+
+        results = []
+        for i in range(0, len(audios), batch_size):
+            batch = audios[i:i + batch_size]
+            start = time.perf_counter()
+            batch_results = self._transcribe_batch(batch, options)
+            elapsed = time.perf_counter() - start
+            for result in batch_results:
+                result["timings"].update(batch_s=elapsed, batch_size=len(batch))
+            results.extend(batch_results)
+        return results
+
+    def transcribe(self, audio, sample_rate=SAMPLE_RATE, options=None):
+        """
+        Transcribe a single waveform
+        """
+        return self.transcribe_batch([audio], sample_rate, options)[0]
+
+    def _transcribe_batch(self, audios, options):
+        raise NotImplementedError
@@ -4,12 +4,45 @@ import torchaudio
 from transformers import Wav2Vec2ForCTC, Wav2Vec2Tokenizer
 import torch
 
-def load_model(model_name="facebook/wav2vec2-base-960h"):
+from stt_backend import STTBackend, make_result
+
+def load_model(model_name="facebook/wav2vec2-base-960h", quantize=False):
     print(f"[INFO] Loading Wav2Vec2 model: {model_name}")
     tokenizer = Wav2Vec2Tokenizer.from_pretrained(model_name)
     model = Wav2Vec2ForCTC.from_pretrained(model_name)
+    model.eval()
+    if quantize:
+        # dynamic int8 quantization of the Linear layers for faster CPU inference
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
     return tokenizer, model
 
+class Wav2Vec2Backend(STTBackend):
+    """
+    Padded CTC batches, every waveform is decoded up to its own number of output frames
+    """
+    name = "wav2vec2"
+
+    def __init__(self, tokenizer, model):
+        self.tokenizer = tokenizer
+        self.model = model
+
+    def _transcribe_batch(self, audios, options):
+        input_values = self.tokenizer(audios, return_tensors="pt", padding=True).input_values
+        with torch.no_grad():
+            logits = self.model(input_values).logits
+            output_lengths = self.model._get_feat_extract_output_lengths(
+                torch.tensor([len(audio) for audio in audios])
+            )
+        predicted_ids = torch.argmax(logits, dim=-1)
+        return [
+            make_result(self.tokenizer.decode(ids[:int(length)]), duration=len(audio) / 16000)
+            for audio, ids, length in zip(audios, predicted_ids, output_lengths)
+        ]
+
+def load_backend(model_name="facebook/wav2vec2-base-960h", quantize=False):
+    tokenizer, model = load_model(model_name, quantize=quantize)
+    return Wav2Vec2Backend(tokenizer, model)
+
 def transcribe_audio(tokenizer, model, audio_path):
     print(f"[INFO] Transcribing: {audio_path}")
     waveform, sample_rate = torchaudio.load(audio_path)
@@ -34,6 +67,7 @@ def main():
     parser = argparse.ArgumentParser(description="Wav2Vec2 STT Inference")
     parser.add_argument("audio", help="Path to audio file (must be WAV format)")
     parser.add_argument("--model", default="facebook/wav2vec2-base-960h", help="Hugging Face model name")
+    parser.add_argument("--quantize", action="store_true", help="Apply dynamic int8 quantization")
 
     args = parser.parse_args()
 
@@ -41,7 +75,7 @@ def main():
         print(f"[ERROR] File not found: {args.audio}")
         return
 
-    tokenizer, model = load_model(args.model)
+    tokenizer, model = load_model(args.model, quantize=args.quantize)
     transcribe_audio(tokenizer, model, args.audio)
 
 if __name__ == "__main__":
@@ -2,10 +2,49 @@ import whisper
 import argparse
 import os
 
+from stt_backend import STTBackend, make_result
+
 def load_model(model_size="base"):
     print(f"[INFO] Loading Whisper model: {model_size}")
     return whisper.load_model(model_size)
 
+def segment_dict(segment, word_timestamps=False):
+    """
+    Plain segment dict of an openai-whisper segment, with its words when word_timestamps is set
+    """
+    result = {"start": segment["start"], "end": segment["end"], "text": segment["text"].strip()}
+    if word_timestamps and segment.get("words"):
+        result["words"] = [
+            {"start": word["start"], "end": word["end"], "word": word["word"], "probability": word["probability"]}
+            for word in segment["words"]
+        ]
+    return result
+
+class WhisperBackend(STTBackend):
+    """
+    openai-whisper decodes one waveform per call, a batch is transcribed waveform by waveform
+    """
+    name = "whisper"
+
+    def __init__(self, model):
+        self.model = model
+
+    def _transcribe_batch(self, audios, options):
+        results = []
+        for audio in audios:
+            result = self.model.transcribe(
+                audio,
+                fp16=self.model.device.type == "cuda",
+                language=options.get("language"),
+                word_timestamps=options.get("word_timestamps", False)
+            )
+            segments = [segment_dict(segment, options.get("word_timestamps", False)) for segment in result["segments"]]
+            results.append(make_result(result["text"], segments, result.get("language"), len(audio) / 16000))
+        return results
+
+def load_backend(model_size="base"):
+    return WhisperBackend(load_model(model_size))
+
 def transcribe_audio(model, audio_path):
     print(f"[INFO] Transcribing: {audio_path}")
     result = model.transcribe(audio_path)
@@ -0,0 +1,177 @@
+import os
+import sys
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+import pytest
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+import inference_server
+from inference_server import (
+    REQUEST_RING_BYTES,
+    InferenceClient,
+    InferenceClientPool,
+    InferenceServer,
+    SharedRingBuffer,
+    recv_payload,
+    send_payload
+)
+
+AUTHKEY = b"test"
+
+
+@pytest.fixture
+def ring():
+    ring = SharedRingBuffer(size=64)
+    yield ring
+    ring.close()
+
+
+def test_ring_wraps_around(ring):
+    out = bytearray(64)
+    for i in range(10):
+        # 40 bytes per round moves the write position across the end of the ring
+        data = bytes((i + j) % 256 for j in range(40))
+        assert ring.write(data) == 40
+        assert ring.available() == 40
+        assert ring.read_into(memoryview(out)[:40]) == 40
+        assert bytes(out[:40]) == data
+        assert ring.available() == 0
+
+
+def test_ring_write_stops_when_full(ring):
+    assert ring.write(bytes(100)) == 64
+    assert ring.write(b"x") == 0
+    ring.discard()
+    assert ring.available() == 0
+    assert ring.write(b"x") == 1
+
+
+@pytest.fixture
+def connection_pair(tmp_path):
+    address = str(tmp_path / "conn.sock")
+    with Listener(address, authkey=AUTHKEY) as listener:
+        accepted = {}
+        thread = threading.Thread(target=lambda: accepted.update(conn=listener.accept()))
+        thread.start()
+        client = Client(address, authkey=AUTHKEY)
+        thread.join()
+        yield client, accepted["conn"]
+        client.close()
+        accepted["conn"].close()
+
+
+def test_payload_larger_than_ring_round_trips(connection_pair):
+    sender, receiver = connection_pair
+    producer = SharedRingBuffer(size=4096)
+    consumer = SharedRingBuffer(name=producer.name)
+    data = np.random.default_rng(0).standard_normal(10_000).astype(np.float32)
+
+    received = {}
+    thread = threading.Thread(target=lambda: received.update(result=recv_payload(receiver, consumer)))
+    thread.start()
+    send_payload(sender, producer, data, op="transcribe", model="m")
+    thread.join()
+    consumer.close()
+    producer.close()
+
+    header, payload = received["result"]
+    assert header["op"] == "transcribe" and header["model"] == "m"
+    assert header["total"] == data.nbytes
+    np.testing.assert_array_equal(np.frombuffer(payload, dtype=np.float32), data)
+
+
+def test_error_reply_raises(connection_pair):
+    sender, receiver = connection_pair
+    ring = SharedRingBuffer(size=64)
+    receiver.send({"op": "error", "error": "model failed"})
+    with pytest.raises(RuntimeError, match="model failed"):
+        recv_payload(sender, ring)
+    ring.close()
+
+
+def _transcribe(audio, model_name, **options):
+    if model_name == "broken":
+        raise ValueError("broken model")
+    return {"model": model_name, "samples": len(audio), "sum": float(np.sum(audio, dtype=np.float64)), **options}
+
+
+@pytest.fixture
+def server_address(tmp_path):
+    address = str(tmp_path / "inference.sock")
+    server = InferenceServer(address, _transcribe, authkey=AUTHKEY)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    for _ in range(100):
+        if os.path.exists(address):
+            break
+        time.sleep(0.05)
+    return address
+
+
+def test_server_round_trips_audio_larger_than_request_ring(server_address):
+    client = InferenceClient(server_address, authkey=AUTHKEY)
+    try:
+        audio = np.random.default_rng(1).standard_normal(REQUEST_RING_BYTES // 4 + 12345).astype(np.float32)
+        result = client.transcribe(audio, "tiny", language="en")
+        assert result["model"] == "tiny" and result["language"] == "en"
+        assert result["samples"] == len(audio)
+        assert result["sum"] == pytest.approx(float(np.sum(audio, dtype=np.float64)))
+    finally:
+        client.close()
+
+
+def test_server_error_keeps_connection_usable(server_address):
+    client = InferenceClient(server_address, authkey=AUTHKEY, request_ring_bytes=4096)
+    try:
+        with pytest.raises(RuntimeError, match="broken model"):
+            client.transcribe(np.ones(3000, dtype=np.float32), "broken")
+        result = client.transcribe(np.ones(3000, dtype=np.float32), "tiny")
+        assert result["samples"] == 3000 and result["sum"] == 3000.0
+    finally:
+        client.close()
+
+
+class FakeClient:
+    def __init__(self, address):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(inference_server, "InferenceClient", FakeClient)
+    return InferenceClientPool("unused", max_clients=2)
+
+
+def test_pool_reuses_client_after_runtime_error(pool):
+    with pytest.raises(RuntimeError):
+        with pool.client() as client:
+            raise RuntimeError("server reported an error")
+    assert not client.closed
+    with pool.client() as reused:
+        assert reused is client
+
+
+def test_pool_closes_client_after_os_error(pool):
+    with pytest.raises(OSError):
+        with pool.client() as client:
+            raise OSError("connection reset")
+    assert client.closed
+    with pool.client() as fresh:
+        assert fresh is not client
+
+
+def test_pool_releases_slot_on_failure(pool):
+    for _ in range(3):
+        with pytest.raises(OSError):
+            with pool.client():
+                raise OSError("connection reset")
+    # both slots are free again
+    with pool.client() as first, pool.client() as second:
+        assert first is not second
@@ -0,0 +1,110 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+from jobs import CANCELLED, DONE, FAILED, QUEUED, RUNNING, JobStore, JobWorkerPool
+
+
+class Upload:
+    """
+    Minimal stand-in for a werkzeug FileStorage
+    """
+
+    def __init__(self, filename="clip.wav"):
+        self.filename = filename
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(b"audio")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path))
+
+
+def test_claim_by_priority_then_age(store):
+    first = store.create(Upload(), "whisper")
+    urgent = store.create(Upload(), "whisper", priority=5)
+    second = store.create(Upload(), "whisper")
+    other = store.create(Upload(), "seamless")
+
+    assert [store.claim("whisper")["id"] for _ in range(3)] == [urgent, first, second]
+    assert store.claim("whisper") is None
+    assert store.get(first)["status"] == RUNNING
+    assert store.get(other)["status"] == QUEUED
+
+
+def test_cancel_only_unfinished_jobs(store):
+    queued = store.create(Upload(), "whisper")
+    finished = store.create(Upload(), "whisper")
+    store.claim("whisper")
+    store.claim("whisper")
+    store.finish(finished)
+
+    assert store.cancel(queued)
+    assert store.get(queued)["status"] == CANCELLED
+    assert not store.cancel(finished)
+    assert store.get(finished)["status"] == DONE
+    assert not store.cancel("missing")
+
+
+def test_cancelled_running_job_stays_cancelled(store):
+    job_id = store.create(Upload(), "whisper")
+    store.claim("whisper")
+    store.cancel(job_id)
+
+    assert not store.finish(job_id)
+    assert not store.fail(job_id, "late error")
+    job = store.get(job_id)
+    assert job["status"] == CANCELLED and job["error"] is None
+
+
+def test_fail_records_error(store):
+    job_id = store.create(Upload(), "whisper")
+    store.claim("whisper")
+    assert store.fail(job_id, "decoder crashed")
+    job = store.get(job_id)
+    assert job["status"] == FAILED and job["error"] == "decoder crashed"
+
+
+def test_interrupted_jobs_resume_with_progress(store):
+    job_id = store.create(Upload(), "whisper")
+    store.claim("whisper")
+    store.set_chunks(job_id, [[0, 16000], [16000, 32000]])
+    store.save_progress(job_id, 1, [{"start": 0.0, "end": 1.0, "text": "hello"}])
+
+    # a new store on the same database, as after a restart
+    restarted = JobStore(store.jobs_dir)
+    assert restarted.requeue_interrupted() == 1
+    job = restarted.claim("whisper")
+    assert job["id"] == job_id
+    assert job["chunks"] == [[0, 16000], [16000, 32000]]
+    assert job["done_chunks"] == 1
+    assert job["segments"] == [{"start": 0.0, "end": 1.0, "text": "hello"}]
+
+
+def test_notify_wakes_the_submitted_models_worker(store):
+    pool = JobWorkerPool(
+        store,
+        prepare_audio=lambda path: np.zeros(16000, dtype=np.float32),
+        transcribe_chunks=lambda audio, chunks, model, size, profile: [],
+        workers_per_model={"whisper": 1, "seamless": 1},
+        poll_seconds=30.0
+    )
+    pool.start()
+    # let both workers find the queue empty and go to sleep
+    time.sleep(0.2)
+
+    job_id = store.create(Upload(), "seamless")
+    pool.notify("seamless")
+    deadline = time.time() + 5.0
+    while store.get(job_id)["status"] != DONE and time.time() < deadline:
+        time.sleep(0.05)
+    assert store.get(job_id)["status"] == DONE
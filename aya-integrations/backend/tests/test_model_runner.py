@@ -0,0 +1,72 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+import model_runner
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """
+    Replace the real loaders, records every (key) that gets loaded
+    """
+    calls = []
+
+    def fake_load(key, settings):
+        calls.append(key)
+        time.sleep(0.05)
+        return object()
+
+    monkeypatch.setattr(model_runner, "_load_engine", fake_load)
+    model_runner.release()
+    yield calls
+    model_runner.release()
+
+
+def test_engine_is_loaded_once(loads):
+    engines = []
+    threads = [threading.Thread(target=lambda: engines.append(model_runner.get_engine("whisper", "base")))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loads == [("whisper", "base")]
+    assert all(engine is engines[0] for engine in engines)
+
+
+def test_profile_variants_are_cached_separately(loads):
+    latency = model_runner.get_engine("faster_whisper", "base", "latency")
+    accuracy = model_runner.get_engine("faster_whisper", "base", "accuracy")
+    assert latency is not accuracy
+    assert model_runner.get_engine("faster_whisper", "base", "latency") is latency
+    # whisper's loading doesn't depend on the profile
+    assert model_runner.get_engine("whisper", "base", "latency") is model_runner.get_engine("whisper", "base", "accuracy")
+    assert len(loads) == 3
+
+
+def test_warmup_and_release(loads):
+    model_runner.warmup("wav2vec2", "facebook/wav2vec2-base-960h", "latency")
+    model_runner.warmup("whisper", "base")
+    assert len(model_runner.loaded_engines()) == 2
+
+    assert model_runner.release("wav2vec2") == 1
+    assert [key[0] for key in model_runner.loaded_engines()] == ["whisper"]
+    model_runner.get_engine("wav2vec2", "facebook/wav2vec2-base-960h", "latency")
+    assert len(loads) == 3
+
+
+def test_api_models_share_the_cache(loads):
+    app = pytest.importorskip("app")
+    engine = app.load_model("faster_whisper", "tiny", "latency")
+    assert model_runner.get_engine("faster_whisper", "tiny", "latency") is engine
+    assert loads == [model_runner._engine_key("faster_whisper", "tiny", model_runner.get_profile("latency"))]
+    with pytest.raises(ValueError):
+        app.load_model("groqtts")
@@ -0,0 +1,94 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+librosa = pytest.importorskip("librosa")
+
+from framing import istft, stft, stft_frame_count
+from preprocessing_noisy_audio import estimate_noise_profile, noise_reduction_with_estimation
+
+SAMPLE_RATE = 16000
+FRAME_SIZE = 2048
+HOP_LENGTH = 512
+
+
+def noisy_speech_like(seconds=3.0, seed=0):
+    """
+    Bursts of harmonics over stationary noise, so there are clearly quiet frames
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    bursts = (np.sin(2 * np.pi * 1.5 * t) > 0).astype(np.float64)
+    voice = sum(np.sin(2 * np.pi * f * t) / k for k, f in enumerate((220, 440, 660, 880), start=1))
+    return (0.2 * bursts * voice + 0.02 * rng.standard_normal(len(t))).astype(np.float32)
+
+
+def reference_noise_reduction(audio):
+    """
+    The spectral subtraction in double precision on librosa's STFT
+    """
+    spectrum = librosa.stft(audio.astype(np.float64), n_fft=FRAME_SIZE, hop_length=HOP_LENGTH)
+    magnitude = np.abs(spectrum)
+    energy = np.sum(magnitude ** 2, axis=0)
+    threshold = np.percentile(energy, 25)
+    low_energy = energy < threshold
+    if not low_energy.any():
+        low_energy = energy <= threshold
+    noise_profile = magnitude[:, low_energy].mean(axis=1)
+
+    cleaned = np.maximum(magnitude - noise_profile[:, np.newaxis], 0) * np.exp(1j * np.angle(spectrum))
+    return noise_profile, librosa.istft(cleaned, hop_length=HOP_LENGTH, length=len(audio))
+
+
+@pytest.mark.parametrize("num_samples", [16000, 16000 * 3 + 123])
+def test_stft_matches_librosa(num_samples):
+    audio = noisy_speech_like()[:num_samples]
+    spectrum = stft(audio, FRAME_SIZE, HOP_LENGTH)
+    expected = librosa.stft(audio, n_fft=FRAME_SIZE, hop_length=HOP_LENGTH).T
+
+    assert spectrum.dtype == np.complex64
+    assert spectrum.shape == expected.shape == (stft_frame_count(num_samples, FRAME_SIZE, HOP_LENGTH), FRAME_SIZE // 2 + 1)
+    np.testing.assert_allclose(spectrum, expected, atol=1e-3 * np.abs(expected).max())
+
+
+@pytest.mark.parametrize("num_samples", [16000, 16000 * 3 + 123])
+def test_istft_round_trip(num_samples):
+    audio = noisy_speech_like()[:num_samples]
+    spectrum = stft(audio, FRAME_SIZE, HOP_LENGTH)
+    restored = istft(spectrum, HOP_LENGTH, length=len(audio))
+    expected = librosa.istft(spectrum.T, hop_length=HOP_LENGTH, length=len(audio))
+
+    assert restored.dtype == np.float32 and restored.shape == audio.shape
+    np.testing.assert_allclose(restored, audio, atol=1e-5)
+    np.testing.assert_allclose(restored, expected, atol=1e-5)
+
+
+def test_noise_reduction_matches_librosa_reference():
+    audio = noisy_speech_like()
+    expected_profile, expected = reference_noise_reduction(audio)
+
+    profile = estimate_noise_profile(audio, SAMPLE_RATE)
+    np.testing.assert_allclose(profile, expected_profile, rtol=1e-3, atol=1e-5)
+
+    cleaned = noise_reduction_with_estimation(audio, SAMPLE_RATE)
+    assert cleaned.dtype == np.float32 and cleaned.shape == audio.shape
+    np.testing.assert_allclose(cleaned, expected, atol=1e-4)
+
+
+def test_scratch_buffers_dont_leak_between_calls():
+    long_audio = noisy_speech_like(seconds=3.0, seed=1)
+    short_audio = noisy_speech_like(seconds=1.0, seed=2)
+
+    first = noise_reduction_with_estimation(long_audio, SAMPLE_RATE)
+    noise_reduction_with_estimation(short_audio, SAMPLE_RATE)
+    again = noise_reduction_with_estimation(long_audio, SAMPLE_RATE)
+    np.testing.assert_array_equal(first, again)
+
+    # a short clip after a long one reuses the larger buffers without picking up stale frames
+    _, expected = reference_noise_reduction(short_audio)
+    np.testing.assert_allclose(noise_reduction_with_estimation(short_audio, SAMPLE_RATE), expected, atol=1e-4)
@@ -0,0 +1,103 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+from session_manager import BYTES_PER_SAMPLE, AudioBuffer, SessionManager
+
+
+def pcm(samples, value=1000):
+    return np.full(samples, value, dtype="<i2").tobytes()
+
+
+def test_drop_policy_keeps_newest_samples():
+    buffer = AudioBuffer(max_samples=100, overflow_policy="drop")
+    buffer.add_audio(pcm(80, 1000))
+    buffer.add_audio(pcm(50, 2000))
+
+    audio = buffer.get_audio()
+    assert len(audio) == 100
+    assert buffer.dropped_samples == 30
+    # the 30 oldest samples of the first chunk are gone
+    np.testing.assert_allclose(audio[:50], 1000 / 32768.0)
+    np.testing.assert_allclose(audio[50:], 2000 / 32768.0)
+
+
+def test_flush_policy_hands_out_bounded_pieces():
+    buffer = AudioBuffer(max_samples=100, overflow_policy="flush")
+    buffer.add_audio(pcm(150))
+    assert buffer.dropped_samples == 0
+
+    assert len(buffer.get_audio(max_samples=100)) == 100
+    assert len(buffer.get_audio(max_samples=100)) == 50
+    assert len(buffer.get_audio(max_samples=100)) == 0
+
+
+def test_flush_policy_caps_undrained_buffer():
+    buffer = AudioBuffer(max_samples=100, overflow_policy="flush")
+    for i in range(10):
+        buffer.add_audio(pcm(50, 1000 + i))
+
+    assert len(buffer.buffer) == 200
+    assert buffer.dropped_samples == 300
+    # the newest chunk is kept
+    np.testing.assert_allclose(buffer.get_audio()[-50:], 1009 / 32768.0)
+
+
+def test_memory_budget_rejects_chunks():
+    manager = SessionManager(max_buffer_seconds=None, memory_budget_bytes=1000 * BYTES_PER_SAMPLE)
+    first = manager.create()
+    second = manager.create()
+
+    assert manager.add_audio(first.session_id, pcm(600))
+    assert not manager.add_audio(second.session_id, pcm(600))
+    assert manager.add_audio(second.session_id, pcm(400))
+    assert manager.buffered_bytes() == 1000 * BYTES_PER_SAMPLE
+
+    stats = manager.stats()
+    assert stats["rejected_chunks"] == 1
+    assert stats["rejected_bytes"] == 600 * BYTES_PER_SAMPLE
+
+    # draining a session frees budget for the others
+    first.buffer.get_audio()
+    assert manager.add_audio(second.session_id, pcm(600))
+
+
+def test_add_audio_to_unknown_session():
+    manager = SessionManager()
+    assert not manager.add_audio("missing", pcm(10))
+
+
+def test_reap_evicts_idle_sessions_and_releases_streams():
+    manager = SessionManager(idle_timeout=5.0)
+    idle = manager.create()
+    active = manager.create()
+    released = []
+    idle.attach_stream("stream", released.append)
+    idle.last_active -= 10.0
+
+    assert manager.reap() == [idle.session_id]
+    assert released == ["stream"]
+    assert manager.get(idle.session_id) is None
+    assert manager.get(active.session_id) is active
+
+    stats = manager.stats()
+    assert stats["active_sessions"] == 1
+    assert stats["evicted_total"] == 1
+
+
+def test_dropped_samples_survive_release():
+    manager = SessionManager(max_buffer_seconds=100 / 16000, denoise=False)
+    session = manager.create()
+    manager.add_audio(session.session_id, pcm(150))
+    manager.release(session.session_id)
+    assert manager.stats()["dropped_samples"] == 50
+
+
+def test_unknown_overflow_policy():
+    with pytest.raises(ValueError):
+        SessionManager(overflow_policy="spill")
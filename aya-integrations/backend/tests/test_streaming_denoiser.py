@@ -0,0 +1,92 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+from streaming_denoiser import StreamingDenoiser
+
+SAMPLE_RATE = 16000
+
+
+def tone_with_noise(seconds=2.0, seed=0):
+    """
+    Tone plus noise, no digital silence anywhere
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    tone = 0.3 * np.sin(2 * np.pi * 440 * t) * (1 + 0.5 * np.sin(2 * np.pi * 3 * t))
+    return (tone + 0.05 * rng.standard_normal(len(t))).astype(np.float32)
+
+
+def fixed_noise_denoiser(noise_level):
+    # noise_alpha=1 freezes the noise estimate, so the output doesn't depend on chunk boundaries
+    denoiser = StreamingDenoiser(noise_alpha=1.0)
+    denoiser.noise = np.full(denoiser.frame_size // 2 + 1, noise_level, dtype=np.float32)
+    return denoiser
+
+
+def run(denoiser, audio, chunk_sizes=None):
+    if chunk_sizes is None:
+        outputs = [denoiser.process(audio)]
+    else:
+        outputs, offset = [], 0
+        for size in chunk_sizes:
+            outputs.append(denoiser.process(audio[offset:offset + size]))
+            offset += size
+        assert offset >= len(audio)
+    outputs.append(denoiser.flush())
+    return np.concatenate(outputs)
+
+
+def random_chunk_sizes(total, seed):
+    rng = np.random.default_rng(seed)
+    sizes = []
+    while sum(sizes) < total:
+        sizes.append(int(rng.integers(1, 3000)))
+    return sizes
+
+
+def test_sqrt_hann_satisfies_cola():
+    denoiser = StreamingDenoiser()
+    hop = denoiser.hop_length
+    # analysis and synthesis windows together are a Hann window, which sums to one at 50% overlap
+    np.testing.assert_allclose(denoiser.window[:hop] ** 2 + denoiser.window[hop:] ** 2, 1.0, atol=1e-6)
+
+
+def test_reconstruction_without_noise_is_delayed_input():
+    audio = tone_with_noise()
+    denoiser = fixed_noise_denoiser(1e-12)
+    lag = denoiser.frame_size - denoiser.hop_length
+    output = run(denoiser, audio, random_chunk_sizes(len(audio), seed=1))
+
+    assert len(output) % denoiser.hop_length == 0
+    assert len(output) >= len(audio) + lag
+    np.testing.assert_allclose(output[lag:lag + len(audio)], audio, atol=1e-5)
+
+
+@pytest.mark.parametrize("seed", [2, 3, 4])
+def test_chunked_matches_single_call(seed):
+    audio = tone_with_noise(seed=seed)
+    whole = run(fixed_noise_denoiser(0.5), audio)
+    chunked = run(fixed_noise_denoiser(0.5), audio, random_chunk_sizes(len(audio), seed))
+
+    assert chunked.shape == whole.shape
+    np.testing.assert_allclose(chunked, whole, atol=1e-5)
+    # the subtraction actually changed the signal
+    lag = StreamingDenoiser().hop_length
+    assert not np.allclose(whole[lag:lag + len(audio)], audio, atol=1e-3)
+
+
+def test_short_chunks_are_held_back():
+    denoiser = StreamingDenoiser()
+    assert len(denoiser.process(np.ones(100, dtype=np.float32))) == 0
+    assert len(denoiser.process(np.ones(200, dtype=np.float32))) == denoiser.hop_length
+
+
+def test_rejects_other_overlaps():
+    with pytest.raises(ValueError):
+        StreamingDenoiser(frame_size=512, hop_length=128)
@@ -0,0 +1,101 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+from transcription_cache import AUDIO, TranscriptionCache, cache_key
+
+
+def disk_size(cache_dir):
+    return sum(entry.stat().st_size for entry in os.scandir(cache_dir) if entry.is_file())
+
+
+def audio(samples, value=0.5):
+    return np.full(samples, value, dtype=np.float32)
+
+
+def test_cache_key_depends_on_audio_and_params():
+    clip = audio(100)
+    assert cache_key(clip, model="a") == cache_key(clip.copy(), model="a")
+    assert cache_key(clip, model="a") != cache_key(clip, model="b")
+    assert cache_key(clip, model="a") != cache_key(audio(100, 0.25), model="a")
+
+
+def test_memory_results_lru():
+    cache = TranscriptionCache(cache_dir=None, max_results=2)
+    cache.put_result("a", {"text": "a"})
+    cache.put_result("b", {"text": "b"})
+    cache.get_result("a")
+    cache.put_result("c", {"text": "c"})
+
+    assert cache.get_result("b") is None
+    assert cache.get_result("a") == {"text": "a"}
+    assert cache.get_result("c") == {"text": "c"}
+
+
+def test_memory_audio_byte_budget():
+    cache = TranscriptionCache(cache_dir=None, max_audio_bytes=3 * 4000)
+    for key in ("a", "b", "c"):
+        cache.put_audio(key, audio(1000))
+    cache.get_audio("a")
+    cache.put_audio("d", audio(1000))
+
+    assert cache.get_audio("b") is None
+    assert cache.stats()[AUDIO]["memory_bytes"] == 3 * 4000
+    # larger than the whole budget, not kept in memory at all
+    cache.put_audio("huge", audio(4000))
+    assert cache.get_audio("huge") is None
+
+
+def test_overwrite_keeps_sizes_exact(tmp_path):
+    cache = TranscriptionCache(cache_dir=str(tmp_path))
+    for samples in (1000, 4000, 2000, 2000):
+        cache.put_audio("clip", audio(samples))
+
+    stats = cache.stats()
+    assert stats[AUDIO]["memory_entries"] == 1
+    assert stats[AUDIO]["memory_bytes"] == 2000 * 4
+    assert stats["disk_bytes"] == disk_size(tmp_path)
+    assert len(os.listdir(tmp_path)) == 1
+    np.testing.assert_array_equal(cache.get_audio("clip"), audio(2000))
+
+
+def test_disk_lru_eviction(tmp_path):
+    entry_bytes = 1000 * 4 + 128  # float32 samples plus the .npy header
+    cache = TranscriptionCache(cache_dir=str(tmp_path), max_audio_bytes=0, max_disk_bytes=int(3.5 * entry_bytes))
+    now = time.time()
+    for age, key in zip((300, 200, 100), ("a", "b", "c")):
+        cache.put_audio(key, audio(1000))
+        path = os.path.join(tmp_path, f"{key}.npy")
+        os.utime(path, (now - age, now - age))
+    assert cache.stats()["disk_bytes"] == 3 * entry_bytes
+
+    # reading from disk refreshes an entry, "b" is now the least recently used
+    assert cache.get_audio("a") is not None
+    cache.put_audio("d", audio(1000))
+
+    assert sorted(os.listdir(tmp_path)) == ["a.npy", "c.npy", "d.npy"]
+    assert cache.stats()["disk_bytes"] == disk_size(tmp_path) == 3 * entry_bytes
+    assert cache.get_audio("b") is None
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    TranscriptionCache(cache_dir=str(tmp_path)).put_result("key", {"text": "hello"})
+
+    cache = TranscriptionCache(cache_dir=str(tmp_path))
+    assert cache.stats()["disk_bytes"] == disk_size(tmp_path)
+    assert cache.get_result("key") == {"text": "hello"}
+    assert cache.stats()["results"]["disk_hits"] == 1
+    assert cache.get_result("key") == {"text": "hello"}
+    assert cache.stats()["results"]["memory_hits"] == 1
+
+
+def test_disk_tier_disabled(tmp_path):
+    cache = TranscriptionCache(cache_dir=str(tmp_path / "cache"), max_disk_bytes=0)
+    cache.put_result("key", {"text": "hello"})
+    assert not os.path.exists(tmp_path / "cache")
+    assert cache.stats()["disk_bytes"] == 0
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+pytest.importorskip("webrtcvad")
+
+from audio_decoding import load_audio_file
+from vad import detect_speech_segments
+
+SAMPLE_RATE = 16000
+
+
+def test_detect_speech_segments_on_harvard():
+    audio = load_audio_file(os.path.join(BACKEND_DIR, "stt_audio", "harvard.wav"), SAMPLE_RATE)
+    segments = detect_speech_segments(audio, SAMPLE_RATE)
+
+    assert segments.ndim == 2 and segments.shape[1] == 2 and len(segments) > 0
+    assert np.all(segments[:, 0] < segments[:, 1])
+    assert np.all(segments[1:, 0] >= segments[:-1, 1])
+    assert segments[-1, 1] <= len(audio)
+    # harvard.wav is read speech with short pauses, most of it is speech
+    speech = int(np.sum(segments[:, 1] - segments[:, 0]))
+    assert 0.5 * len(audio) < speech <= len(audio)
+
+
+def test_detect_speech_segments_on_silence():
+    segments = detect_speech_segments(np.zeros(SAMPLE_RATE, dtype=np.float32), SAMPLE_RATE)
+    assert segments.shape == (0, 2)
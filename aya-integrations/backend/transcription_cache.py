@@ -0,0 +1,248 @@
+"""
+Content-addressed cache for /transcribe.
+
+Entries are keyed by a hash of the decoded 16 kHz PCM together with everything that
+changes the output (model, size, runtime profile, preprocessing settings), so a
+resubmitted clip skips the whole pipeline. Two kinds of entries are stored:
+
+- results: the finished transcription of a request
+- preprocessed audio: the denoised waveform, shared by all models, so transcribing
+  the same clip with another model skips the noise reduction
+
+Both live in an in-memory LRU tier backed by an on-disk LRU tier that survives restarts.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+CACHE_DIR = os.getenv(
+    "TRANSCRIPTION_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+)
+
+RESULTS = "results"
+AUDIO = "preprocessed_audio"
+_EXTENSIONS = {RESULTS: ".json", AUDIO: ".npy"}
+
+
+def cache_key(audio, **params):
+    """
+    Hash a waveform (as float32 PCM) and the parameters that affect its transcription
+    """
+    pcm = np.ascontiguousarray(audio, dtype=np.float32)
+    digest = hashlib.blake2b(memoryview(pcm).cast("B"), digest_size=20)
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class _MemoryTier:
+    """
+    LRU bounded by number of entries and total bytes
+    """
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._items = OrderedDict()
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is None:
+            return None
+        self._items.move_to_end(key)
+        return item[0]
+
+    def put(self, key, value, nbytes):
+        if nbytes > self.max_bytes or self.max_entries <= 0:
+            return
+        if key in self._items:
+            self.bytes -= self._items.pop(key)[1]
+        self._items[key] = (value, nbytes)
+        self.bytes += nbytes
+        while len(self._items) > self.max_entries or self.bytes > self.max_bytes:
+            _, (_, evicted_bytes) = self._items.popitem(last=False)
+            self.bytes -= evicted_bytes
+
+    def __len__(self):
+        return len(self._items)
+
+
+class TranscriptionCache:
+    """
+    Two-tier (memory, disk) LRU cache for transcription results and preprocessed audio.
+
+    Args:
+        cache_dir: directory of the disk tier, None disables it
+        max_results: transcription results kept in memory
+        max_audio_bytes: memory budget for preprocessed waveforms
+        max_disk_bytes: size budget of the disk tier, least recently used files are removed first
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_results=256, max_audio_bytes=256 * 1024 * 1024,
+                 max_disk_bytes=1024 * 1024 * 1024):
+        self.cache_dir = cache_dir if max_disk_bytes > 0 else None
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = {
+            RESULTS: _MemoryTier(max_results, float("inf")),
+            AUDIO: _MemoryTier(float("inf"), max_audio_bytes)
+        }
+        self._counters = {kind: {"memory_hits": 0, "disk_hits": 0, "misses": 0} for kind in _EXTENSIONS}
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, _, size in self._disk_files())
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            cache_dir=CACHE_DIR,
+            max_results=int(os.getenv("TRANSCRIPTION_CACHE_ENTRIES", "256")),
+            max_audio_bytes=int(float(os.getenv("TRANSCRIPTION_CACHE_AUDIO_MB", "256")) * 1024 * 1024),
+            max_disk_bytes=int(float(os.getenv("TRANSCRIPTION_CACHE_DISK_MB", "1024")) * 1024 * 1024)
+        )
+
+    # ---------------- Disk tier ----------------
+    def _path(self, kind, key):
+        return os.path.join(self.cache_dir, key + _EXTENSIONS[kind])
+
+    def _disk_files(self):
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(tuple(_EXTENSIONS.values())):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.path, stat.st_size))
+        return files
+
+    def _read_disk(self, kind, key):
+        path = self._path(kind, key)
+        try:
+            if kind == RESULTS:
+                with open(path, "r", encoding="utf-8") as f:
+                    value = json.load(f)
+            else:
+                value = np.load(path)
+            # the modification time doubles as the LRU timestamp
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable cache entry {path}: {str(e)}")
+            return None
+
+    def _write_disk(self, kind, key, value):
+        path = self._path(kind, key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            if kind == RESULTS:
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(value, f)
+            else:
+                with open(temp_path, "wb") as f:
+                    np.save(f, value)
+            size = os.path.getsize(temp_path)
+            # the size of an entry that gets overwritten leaves the budget, under the lock so
+            # concurrent writes of the same key don't both subtract it
+            with self._lock:
+                try:
+                    replaced_size = os.path.getsize(path)
+                except FileNotFoundError:
+                    replaced_size = 0
+                os.replace(temp_path, path)
+                self._disk_bytes += size - replaced_size
+                over_budget = self._disk_bytes > self.max_disk_bytes
+        except OSError as e:
+            logging.warning(f"Could not write cache entry {path}: {str(e)}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+
+        if over_budget:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        """
+        Remove the least recently used files until the disk tier is back under 90% of its budget
+        """
+        with self._lock:
+            files = sorted(self._disk_files())
+            total = sum(size for _, _, size in files)
+            for _, path, size in files:
+                if total <= self.max_disk_bytes * 0.9:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+            self._disk_bytes = total
+
+    # ---------------- Lookup ----------------
+    def _get(self, kind, key):
+        with self._lock:
+            value = self._memory[kind].get(key)
+            if value is not None:
+                self._counters[kind]["memory_hits"] += 1
+                return value
+
+        value = self._read_disk(kind, key) if self.cache_dir else None
+        with self._lock:
+            if value is None:
+                self._counters[kind]["misses"] += 1
+                return None
+            self._counters[kind]["disk_hits"] += 1
+            self._memory[kind].put(key, value, self._nbytes(kind, value))
+        return value
+
+    def _put(self, kind, key, value):
+        with self._lock:
+            self._memory[kind].put(key, value, self._nbytes(kind, value))
+        if self.cache_dir:
+            self._write_disk(kind, key, value)
+
+    @staticmethod
+    def _nbytes(kind, value):
+        return value.nbytes if kind == AUDIO else 0
+
+    def get_result(self, key):
+        return self._get(RESULTS, key)
+
+    def put_result(self, key, result):
+        """
+        Store a JSON-serializable transcription result
+        """
+        self._put(RESULTS, key, result)
+
+    def get_audio(self, key):
+        """
+        Return a cached preprocessed waveform, the array is shared and must not be modified
+        """
+        return self._get(AUDIO, key)
+
+    def put_audio(self, key, audio):
+        audio = np.asarray(audio, dtype=np.float32)
+        audio.setflags(write=False)
+        self._put(AUDIO, key, audio)
+
+    def stats(self):
+        with self._lock:
+            stats = {}
+            for kind, counters in self._counters.items():
+                lookups = sum(counters.values())
+                hits = counters["memory_hits"] + counters["disk_hits"]
+                stats[kind] = {
+                    **counters,
+                    "hit_rate": hits / lookups if lookups else 0.0,
+                    "memory_entries": len(self._memory[kind])
+                }
+            stats[AUDIO]["memory_bytes"] = self._memory[AUDIO].bytes
+            stats["disk_bytes"] = self._disk_bytes if self.cache_dir else 0
+            return stats
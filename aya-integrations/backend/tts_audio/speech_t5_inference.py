@@ -109,14 +109,20 @@ DEFAULT_SPEAKER_EMBEDDING = [[-7.5731e-02, -2.7370e-02,  1.4933e-02,  4.5861e-02
          -1.2789e-02, -8.0640e-02,  3.7140e-02,  8.2634e-02,  2.2695e-02,
           4.4507e-02, -5.3924e-02]]
 
-def load_model():
+def load_model(quantize=False):
     """
     Loads the SpeechT5 text-to-speech model pipeline.
+
+    Parameters:
+    - quantize: Apply dynamic int8 quantization to the Linear layers of the model (CPU inference).
     
     Returns:
     - A HuggingFace pipeline object for text-to-speech synthesis.
     """
-    return pipeline("text-to-speech", model="microsoft/speecht5_tts")
+    t5_pipeline = pipeline("text-to-speech", model="microsoft/speecht5_tts")
+    if quantize:
+        t5_pipeline.model = torch.quantization.quantize_dynamic(t5_pipeline.model, {torch.nn.Linear}, dtype=torch.qint8)
+    return t5_pipeline
 
 def synthesize_audio(pipeline_model, text, output_path="speech.wav", speaker_embedding=None):
     """
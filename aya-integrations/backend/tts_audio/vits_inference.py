@@ -8,12 +8,13 @@ from transformers import VitsTokenizer, VitsModel
 
 DEFAULT_MODEL_NAME = "facebook/mms-tts-eng"
 
-def load_model_and_tokenizer(model_name=DEFAULT_MODEL_NAME):
+def load_model_and_tokenizer(model_name=DEFAULT_MODEL_NAME, quantize=False):
     """
     Loads the VITS tokenizer and model from HuggingFace.
 
     Parameters:
     - model_name: Model identifier or path.
+    - quantize: Apply dynamic int8 quantization to the Linear layers (CPU inference).
 
     Returns:
     - tokenizer, model
@@ -21,6 +22,8 @@ def load_model_and_tokenizer(model_name=DEFAULT_MODEL_NAME):
     tokenizer = VitsTokenizer.from_pretrained(model_name)
     model = VitsModel.from_pretrained(model_name)
     model.eval()
+    if quantize:
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
     return tokenizer, model
 
 def save_waveform(waveform, sample_rate=16000, output_dir="generated_audios"):
@@ -36,7 +39,7 @@ def save_waveform(waveform, sample_rate=16000, output_dir="generated_audios"):
     torchaudio.save(audio_path, waveform, sample_rate)
     return audio_path
 
-def synthesize_audio(text, model_name=DEFAULT_MODEL_NAME, output_path=None):
+def synthesize_audio(text, model_name=DEFAULT_MODEL_NAME, output_path=None, quantize=False, tokenizer=None, model=None):
     """
     Synthesizes speech from text using a VITS model.
 
@@ -44,11 +47,14 @@ def synthesize_audio(text, model_name=DEFAULT_MODEL_NAME, output_path=None):
     - text: The input text to synthesize.
     - model_name: Model name or path.
     - output_path: Optional full output path for the audio file.
+    - quantize: Use a dynamically int8-quantized model.
+    - tokenizer, model: Already loaded tokenizer and model (see load_model_and_tokenizer), loaded from model_name if None.
 
     Returns:
     - Path to generated audio file.
     """
-    tokenizer, model = load_model_and_tokenizer(model_name)
+    if tokenizer is None or model is None:
+        tokenizer, model = load_model_and_tokenizer(model_name, quantize=quantize)
     inputs = tokenizer(text, return_tensors="pt")
 
     with torch.no_grad():
@@ -0,0 +1,118 @@
+"""
+Frame-level voice activity detection on numpy buffers.
+
+The waveform is converted to int16 once and split into frames with framing.frame_signal,
+every frame is handed to webrtcvad as a read-only view of that buffer. The per-frame
+decisions are smoothed (majority vote), extended by a hangover so word endings
+aren't cut, and returned as an (n, 2) array of start/end sample indices. Callers
+slice the original waveform with those indices, which keeps the timing information.
+"""
+import numpy as np
+
+from framing import frame_signal, scratch_buffer
+
+VAD_SAMPLE_RATES = (8000, 16000, 32000, 48000)
+
+
+def frame_decisions(audio, sr=16000, frame_duration_ms=30, aggressiveness=2):
+    """
+    Run webrtcvad over every complete frame of audio (float in [-1, 1]).
+
+    Returns:
+        (bool array of per-frame speech decisions, frame length in samples)
+    """
+    import webrtcvad
+
+    if sr not in VAD_SAMPLE_RATES:
+        raise ValueError(f"Unsupported sample rate {sr} for VAD")
+
+    vad = webrtcvad.Vad(aggressiveness)
+    frame_length = int(sr * frame_duration_ms / 1000)
+    num_frames = len(audio) // frame_length
+
+    # one float32 -> int16 conversion through reused scratch buffers
+    scaled = np.multiply(audio[:num_frames * frame_length], np.float32(32767),
+                         out=scratch_buffer("vad_scaled", num_frames * frame_length))
+    np.clip(scaled, -32767, 32767, out=scaled)
+    samples = scratch_buffer("vad_samples", num_frames * frame_length, np.int16)
+    np.copyto(samples, scaled, casting="unsafe")
+    frames = frame_signal(samples, frame_length)
+
+    # webrtcvad takes the frame length from len() of the buffer, which has to be in bytes:
+    # the int16 rows are handed over as byte views instead of copies
+    decisions = np.fromiter(
+        (vad.is_speech(memoryview(frame).cast("B"), sr) for frame in frames),
+        dtype=bool,
+        count=num_frames
+    )
+    return decisions, frame_length
+
+
+def smooth_decisions(decisions, smoothing_frames=1, hangover_frames=0, min_speech_frames=1):
+    """
+    Majority-vote the decisions over smoothing_frames, keep speech on for hangover_frames
+    after it ends and drop speech runs shorter than min_speech_frames
+    """
+    decisions = np.asarray(decisions, dtype=bool)
+    if len(decisions) == 0:
+        return decisions
+
+    if smoothing_frames > 1:
+        votes = np.convolve(decisions, np.ones(smoothing_frames, dtype=np.int32), mode="same")
+        decisions = votes * 2 > smoothing_frames
+
+    if hangover_frames > 0:
+        # causal dilation: a frame is speech if any of the hangover_frames before it was
+        held = np.convolve(decisions, np.ones(hangover_frames + 1, dtype=np.int32))[:len(decisions)]
+        decisions = held > 0
+
+    if min_speech_frames > 1:
+        starts, ends = _runs(decisions)
+        for start, end in zip(starts, ends):
+            if end - start < min_speech_frames:
+                decisions[start:end] = False
+
+    return decisions
+
+
+def _runs(decisions):
+    edges = np.diff(np.concatenate(([0], decisions.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def detect_speech_segments(audio, sr=16000, frame_duration_ms=30, aggressiveness=2, smoothing_ms=90,
+                           hangover_ms=150, min_speech_ms=60):
+    """
+    Find the speech segments of a waveform.
+
+    Args:
+        audio: mono float waveform
+        sr: sample rate, one of VAD_SAMPLE_RATES
+        frame_duration_ms: webrtcvad frame length (10, 20 or 30 ms)
+        aggressiveness: webrtcvad mode 0-3, higher filters more non-speech
+        smoothing_ms: majority-vote window over the frame decisions
+        hangover_ms: how long speech stays on after the last speech frame
+        min_speech_ms: shorter speech runs are discarded as clicks/noise
+
+    Returns:
+        (n, 2) int64 array of start/end sample indices, end exclusive
+    """
+    decisions, frame_length = frame_decisions(audio, sr, frame_duration_ms, aggressiveness)
+    decisions = smooth_decisions(
+        decisions,
+        smoothing_frames=max(1, round(smoothing_ms / frame_duration_ms)),
+        hangover_frames=round(hangover_ms / frame_duration_ms),
+        min_speech_frames=max(1, round(min_speech_ms / frame_duration_ms))
+    )
+
+    starts, ends = _runs(decisions)
+    return np.stack([starts * frame_length, ends * frame_length], axis=1).astype(np.int64)
+
+
+def speech_samples(audio, segments):
+    """
+    Concatenate the speech segments of audio (a single copy of the speech only)
+    """
+    if len(segments) == 0:
+        return audio[:0]
+    return np.concatenate([audio[start:end] for start, end in segments])
@@ -0,0 +1,157 @@
+import os
+import sys
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# the Groq client lives in the Flask backend
+BACKEND_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "aya-integrations", "backend")
+)
+sys.path.insert(0, BACKEND_DIR)
+
+from groq_stand_in import silent_wav, start_stand_in
+
+
+# ---------------- Clients ----------------
+def shared_client(base_url, timeout_s, max_retries, max_concurrency):
+    """
+    groq_client.py: one pooled client, bounded concurrency
+    """
+    import groq_client
+    groq_client.configure(base_url=base_url, timeout_s=timeout_s, max_retries=max_retries,
+                          max_concurrency=max_concurrency)
+    return lambda audio: groq_client.translate(audio)
+
+
+def per_call_client(base_url, timeout_s, max_retries, max_concurrency):
+    """
+    The previous model_runner behavior: a new client (and connection) for every request
+    """
+    from groq import Groq
+
+    def translate(audio):
+        client = Groq(api_key=os.environ["GROQ_API_KEY"], base_url=base_url, timeout=timeout_s,
+                      max_retries=max_retries)
+        try:
+            return client.audio.translations.create(
+                file=("audio.wav", audio),
+                model="whisper-large-v3",
+                response_format="json",
+                temperature=0.0
+            ).text
+        finally:
+            client.close()
+
+    return translate
+
+
+CLIENTS = {
+    "shared": shared_client,
+    "per_call": per_call_client
+}
+
+
+# ---------------- Benchmark ----------------
+def _percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run(translate, audio, requests, concurrency):
+    def one(_):
+        start = time.perf_counter()
+        try:
+            translate(audio)
+            return time.perf_counter() - start, None
+        except Exception as e:
+            return time.perf_counter() - start, type(e).__name__
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(one, range(requests)))
+    wall = time.perf_counter() - start
+
+    latencies = [latency for latency, error in outcomes if error is None]
+    errors = {}
+    for _, error in outcomes:
+        if error is not None:
+            errors[error] = errors.get(error, 0) + 1
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "succeeded": len(latencies),
+        "errors": errors,
+        "throughput_rps": len(latencies) / wall,
+        "p50_s": _percentile(latencies, 0.5),
+        "p95_s": _percentile(latencies, 0.95),
+        "wall_s": wall
+    }
+
+
+def _format(value, spec):
+    return "-" if value is None else format(value, spec)
+
+
+def print_table(results):
+    print(f"\n{'client':<10}{'failures':>9}{'conc.':>7}{'ok':>6}{'req/s':>8}{'p50 (s)':>9}{'p95 (s)':>9}"
+          f"{'conns':>7}{'server reqs':>13}  errors")
+    for r in results:
+        print(f"{r['client']:<10}{r['failure_rate']:>9.2f}{r['concurrency']:>7}{r['succeeded']:>6}"
+              f"{r['throughput_rps']:>8.1f}{_format(r['p50_s'], '.3f'):>9}{_format(r['p95_s'], '.3f'):>9}"
+              f"{r['server']['connections']:>7}{r['server']['requests']:>13}  {r['errors'] or ''}")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Concurrency and failure behavior of the Groq client against the local stand-in")
+    parser.add_argument("--clients", nargs="+", default=list(CLIENTS.keys()), choices=list(CLIENTS.keys()))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32], help="caller threads")
+    parser.add_argument("--failure-rates", nargs="+", type=float, default=[0.0, 0.1, 0.3],
+                        help="share of requests the stand-in answers with a 500")
+    parser.add_argument("--requests", type=int, default=200, help="requests per run")
+    parser.add_argument("--audio-seconds", type=float, default=5.0, help="length of the uploaded clip")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="stand-in response time")
+    parser.add_argument("--server-limit", type=int, default=16, help="stand-in answers 429 above this many requests in flight")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="share of requests the stand-in never answers")
+    parser.add_argument("--max-concurrency", type=int, default=8, help="GROQ_MAX_CONCURRENCY of the shared client")
+    parser.add_argument("--timeout-s", type=float, default=5.0)
+    parser.add_argument("--max-retries", type=int, default=2)
+    parser.add_argument("--output", default="results/groq_benchmark_results.jsonl")
+    args = parser.parse_args()
+
+    # the stand-in doesn't check the key, the SDK only needs one to be set
+    os.environ.setdefault("GROQ_API_KEY", "stand-in")
+    server = start_stand_in(latency_ms=args.latency_ms, hang_rate=args.hang_rate,
+                            hang_s=args.timeout_s * 2, max_concurrency=args.server_limit)
+    audio = silent_wav(args.audio_seconds)
+
+    results = []
+    for failure_rate in args.failure_rates:
+        server.behavior["failure_rate"] = failure_rate
+        for name in args.clients:
+            translate = CLIENTS[name](server.base_url, args.timeout_s, args.max_retries, args.max_concurrency)
+            for concurrency in args.concurrency:
+                print(f"[{name}: failure rate {failure_rate:g}, {concurrency} threads]")
+                server.reset()
+                result = run(translate, audio, args.requests, concurrency)
+                result.update({
+                    "client": name,
+                    "failure_rate": failure_rate,
+                    "server": server.snapshot()
+                })
+                results.append(result)
+
+    print_table(results)
+    server.shutdown()
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        for result in results:
+            f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Local stand-in for the Groq audio endpoints, so groq_client.py can be exercised offline.
+
+    POST /openai/v1/audio/translations     multipart upload -> {"text": ...}
+    POST /openai/v1/audio/transcriptions   multipart upload -> {"text": ...}
+    POST /openai/v1/audio/speech           JSON {"input": ...} -> audio/wav
+    GET  /stats                            counters below, POST /stats resets them
+
+Latency, failures (500), rate limiting (429 above max_concurrency in-flight requests) and hung requests
+(to trigger client timeouts) are simulated. Point the backend at it with GROQ_BASE_URL=http://host:port.
+"""
+import io
+import json
+import random
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SAMPLE_RATE = 16000
+TRANSCRIPT = "The birch canoe slid on the smooth planks."
+
+
+def silent_wav(seconds, sample_rate=SAMPLE_RATE):
+    """
+    16-bit mono WAV of silence
+    """
+    data_size = int(seconds * sample_rate) * 2
+    buffer = io.BytesIO()
+    buffer.write(b"RIFF" + struct.pack("<I", 36 + data_size) + b"WAVE")
+    buffer.write(b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16))
+    buffer.write(b"data" + struct.pack("<I", data_size) + bytes(data_size))
+    return buffer.getvalue()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # keep-alive, so connection reuse by the client shows up in the stats
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.count("connections")
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type="application/json", headers=None):
+        if isinstance(body, dict):
+            body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.count(f"status_{status}")
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send(200, self.server.snapshot())
+        else:
+            self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path == "/stats":
+            self.server.reset()
+            self._send(200, {})
+            return
+        if self.path not in ("/openai/v1/audio/translations", "/openai/v1/audio/transcriptions",
+                             "/openai/v1/audio/speech"):
+            self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        if not self.server.enter():
+            self._send(429, {"error": {"message": "Rate limit reached", "type": "rate_limit"}},
+                       headers={"Retry-After": "0.1"})
+            return
+        try:
+            self._handle(body)
+        finally:
+            self.server.leave()
+
+    def _handle(self, body):
+        behavior = self.server.behavior
+        roll = random.random()
+        if roll < behavior["hang_rate"]:
+            # the client has given up by now, drop the connection without answering
+            time.sleep(behavior["hang_s"])
+            self.close_connection = True
+            return
+        if roll < behavior["hang_rate"] + behavior["failure_rate"]:
+            self._send(500, {"error": {"message": "Internal server error", "type": "server_error"}})
+            return
+        time.sleep(max(0.0, random.gauss(behavior["latency_ms"], behavior["jitter_ms"])) / 1000)
+
+        if self.path == "/openai/v1/audio/speech":
+            text = json.loads(body or b"{}").get("input", "")
+            self._send(200, silent_wav(min(10.0, 0.06 * len(text))), content_type="audio/wav")
+        elif b'name="file"' not in body:
+            self._send(400, {"error": {"message": "file is required", "type": "invalid_request_error"}})
+        else:
+            self._send(200, {"text": TRANSCRIPT})
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms=200.0, jitter_ms=50.0, failure_rate=0.0, hang_rate=0.0, hang_s=60.0,
+                 max_concurrency=0):
+        super().__init__(address, StandInHandler)
+        self.behavior = {
+            "latency_ms": latency_ms,
+            "jitter_ms": jitter_ms,
+            "failure_rate": failure_rate,
+            "hang_rate": hang_rate,
+            "hang_s": hang_s,
+            "max_concurrency": max_concurrency
+        }
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stats = {"connections": 0, "requests": 0, "peak_in_flight": 0}
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats)
+
+    def enter(self):
+        """
+        Admit a request, False when max_concurrency requests are already in flight (0 = no limit)
+        """
+        with self._lock:
+            self.stats["requests"] += 1
+            if self.behavior["max_concurrency"] and self._in_flight >= self.behavior["max_concurrency"]:
+                return False
+            self._in_flight += 1
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self._in_flight)
+            return True
+
+    def leave(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_stand_in(host="127.0.0.1", port=0, **behavior):
+    """
+    Run a stand-in server in a background thread (port 0 picks a free port), returns the server
+    """
+    server = StandInServer((host, port), **behavior)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Local stand-in for the Groq audio endpoints")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of requests answered with a 500")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="share of requests held for --hang-s")
+    parser.add_argument("--hang-s", type=float, default=60.0)
+    parser.add_argument("--max-concurrency", type=int, default=0, help="in-flight requests above this get a 429")
+    args = parser.parse_args()
+
+    server = StandInServer(
+        (args.host, args.port),
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate,
+        hang_rate=args.hang_rate,
+        hang_s=args.hang_s,
+        max_concurrency=args.max_concurrency
+    )
+    print(f"Groq stand-in listening on {server.base_url} (GROQ_BASE_URL={server.base_url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import subprocess
+import numpy as np
+import soundfile as sf
+
+# the decoding front end lives in the Flask backend
+BACKEND_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "aya-integrations", "backend")
+)
+sys.path.insert(0, BACKEND_DIR)
+
+from audio_decoding import RESAMPLE_QUALITIES, load_audio_file
+
+# (name, duration in seconds, sample rate, channels)
+CASES = [
+    ("1s_16k_mono", 1, 16000, 1),
+    ("1s_44k_stereo", 1, 44100, 2),
+    ("10min_16k_mono", 600, 16000, 1),
+    ("10min_44k_stereo", 600, 44100, 2)
+]
+
+
+# ---------------- Test files ----------------
+def write_test_file(directory, name, duration, sample_rate, channels, seed=0):
+    """
+    Tone plus noise written as 16-bit PCM wav, the typical upload format
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(duration * sample_rate)) / sample_rate
+    signal = 0.3 * np.sin(2 * np.pi * 220 * t) + 0.05 * rng.standard_normal(len(t))
+    signal = np.repeat(signal[:, np.newaxis], channels, axis=1) if channels > 1 else signal
+    path = os.path.join(directory, f"{name}.wav")
+    sf.write(path, signal.astype(np.float32), sample_rate, subtype="PCM_16")
+    return path
+
+
+# ---------------- Loaders ----------------
+def librosa_loader(path):
+    import librosa
+    audio, _ = librosa.load(path, sr=16000)
+    return audio
+
+
+def front_end_loader(quality):
+    return lambda path: load_audio_file(path, 16000, quality)
+
+
+def import_time(statement):
+    """
+    Cold import time in a fresh interpreter
+    """
+    start = time.time()
+    subprocess.run([sys.executable, "-c", statement], check=True, cwd=BACKEND_DIR)
+    return time.time() - start
+
+
+# ---------------- Benchmark ----------------
+def benchmark(loader, path, runs):
+    loader(path)  # warm-up (imports, page cache)
+    runtimes = []
+    for _ in range(runs):
+        start = time.time()
+        audio = loader(path)
+        runtimes.append(time.time() - start)
+    return 1000 * sum(runtimes) / len(runtimes), len(audio)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Compare librosa.load with the soundfile/ffmpeg decoding front end")
+    parser.add_argument("--runs", type=int, default=5, help="timed loads per file and loader (1 s files use 20x)")
+    parser.add_argument("--qualities", nargs="+", default=list(RESAMPLE_QUALITIES), choices=list(RESAMPLE_QUALITIES))
+    parser.add_argument("--skip-librosa", action="store_true", help="only benchmark the new front end")
+    parser.add_argument("--output", default="results/loader_benchmark_results.jsonl")
+    args = parser.parse_args()
+
+    loaders = {f"front_end[{quality}]": front_end_loader(quality) for quality in args.qualities}
+    if not args.skip_librosa:
+        loaders = {"librosa.load": librosa_loader, **loaders}
+
+    print("Cold import time:")
+    print(f"  audio_decoding: {import_time('import audio_decoding'):.2f} s")
+    if not args.skip_librosa:
+        print(f"  librosa:        {import_time('import librosa'):.2f} s")
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for name, duration, sample_rate, channels in CASES:
+            path = write_test_file(directory, name, duration, sample_rate, channels)
+            runs = args.runs * 20 if duration <= 1 else args.runs
+            for loader_name, loader in loaders.items():
+                load_ms, num_samples = benchmark(loader, path, runs)
+                results.append({
+                    "file": name,
+                    "loader": loader_name,
+                    "load_ms": load_ms,
+                    "x_realtime": duration / (load_ms / 1000) if load_ms > 0 else float("inf"),
+                    "samples": num_samples
+                })
+
+    print(f"\n{'file':<18}{'loader':<24}{'load (ms)':>12}{'x realtime':>14}")
+    for r in results:
+        print(f"{r['file']:<18}{r['loader']:<24}{r['load_ms']:>12.2f}{r['x_realtime']:>14.0f}")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        for result in results:
+            f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
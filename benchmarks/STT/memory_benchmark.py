@@ -0,0 +1,165 @@
+import os
+import sys
+import json
+import time
+import queue
+import resource
+import multiprocessing
+import numpy as np
+
+# preprocessing lives in the Flask backend
+BACKEND_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "aya-integrations", "backend")
+)
+sys.path.insert(0, BACKEND_DIR)
+
+SAMPLE_RATE = 16000
+
+
+# ---------------- Implementations ----------------
+def legacy_preprocess(audio, sr=SAMPLE_RATE, frame_size=2048, hop_length=512):
+    """
+    The previous librosa pipeline: two STFTs, float64/complex128 intermediates, int16 round trip in the VAD
+    """
+    import librosa
+    import webrtcvad
+
+    energy = np.array([
+        np.sum(np.square(audio[i:i + frame_size]))
+        for i in range(0, len(audio) - frame_size, hop_length)
+    ])
+    threshold = np.percentile(energy, 25)
+    low_energy_indices = np.where(energy < threshold)[0]
+    stft = librosa.stft(audio, n_fft=frame_size, hop_length=hop_length)
+    noise_profile = np.mean(np.abs(stft[:, low_energy_indices]), axis=1)
+
+    stft_audio = librosa.stft(audio, n_fft=frame_size, hop_length=hop_length)
+    magnitude, phase = np.abs(stft_audio), np.angle(stft_audio)
+    cleaned_magnitude = np.maximum(magnitude - noise_profile[:, np.newaxis], 0)
+    cleaned = librosa.istft(cleaned_magnitude * np.exp(1j * phase), hop_length=hop_length)
+
+    vad = webrtcvad.Vad(2)
+    bytes_audio = (cleaned * 32768).astype(np.int16).tobytes()
+    byte_length = int(sr * 30 / 1000) * 2
+    speech_bytes = bytearray()
+    for i in range(0, len(bytes_audio) - byte_length + 1, byte_length):
+        frame = bytes_audio[i:i + byte_length]
+        if vad.is_speech(frame, sr):
+            speech_bytes.extend(frame)
+    if len(speech_bytes) == 0:
+        return cleaned
+    return np.frombuffer(speech_bytes, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def current_preprocess(audio, sr=SAMPLE_RATE):
+    from preprocessing_noisy_audio import preprocess
+    return preprocess(audio, sr, "denoise", apply_vad_filter=True)
+
+
+IMPLEMENTATIONS = {
+    "legacy": legacy_preprocess,
+    "current": current_preprocess
+}
+
+
+# ---------------- Measurement ----------------
+def synthetic_recording(minutes, seed=0):
+    """
+    Speech-like bursts (modulated tones) separated by pauses, in background noise
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(minutes * 60 * SAMPLE_RATE), dtype=np.float32) / SAMPLE_RATE
+    bursts = (np.sin(2 * np.pi * 0.4 * t) > 0).astype(np.float32)
+    voice = 0.3 * np.sin(2 * np.pi * 180 * t) * (1 + 0.5 * np.sin(2 * np.pi * 4 * t)) * bursts
+    return (voice + 0.02 * rng.standard_normal(len(t)).astype(np.float32)).astype(np.float32)
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _measure(name, minutes, queue):
+    sys.path.insert(0, BACKEND_DIR)
+    preprocess = IMPLEMENTATIONS[name]
+
+    # warm up the imports on a short clip so they don't count towards the peak
+    preprocess(synthetic_recording(0.1))
+    audio = synthetic_recording(minutes)
+    baseline = _peak_rss_mb()
+
+    start = time.time()
+    preprocess(audio)
+    runtime = time.time() - start
+    queue.put({
+        "implementation": name,
+        "minutes": minutes,
+        "baseline_rss_mb": baseline,
+        "peak_rss_mb": _peak_rss_mb(),
+        "peak_increase_mb": _peak_rss_mb() - baseline,
+        "runtime_s": runtime
+    })
+
+
+def measure(name, minutes, timeout_s=None):
+    """
+    Run one implementation in a fresh process so the peak RSS isn't shared between runs.
+    A run whose process dies or exceeds timeout_s is reported with an "error" instead of a measurement.
+    """
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_measure, args=(name, minutes, results))
+    process.start()
+
+    start = time.time()
+    result = None
+    while result is None:
+        try:
+            result = results.get(timeout=1.0)
+        except queue.Empty:
+            if not process.is_alive():
+                # the result may have been queued just before the process exited
+                try:
+                    result = results.get(timeout=1.0)
+                except queue.Empty:
+                    result = {"implementation": name, "minutes": minutes,
+                              "error": f"process exited with code {process.exitcode}"}
+            elif timeout_s and time.time() - start > timeout_s:
+                process.terminate()
+                result = {"implementation": name, "minutes": minutes, "error": f"timed out after {timeout_s:g} s"}
+    process.join()
+    return result
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Peak RSS of the denoise + VAD preprocessing on long recordings")
+    parser.add_argument("--minutes", nargs="+", type=float, default=[10, 30, 60])
+    parser.add_argument("--implementations", nargs="+", default=list(IMPLEMENTATIONS.keys()),
+                        choices=list(IMPLEMENTATIONS.keys()))
+    parser.add_argument("--timeout", type=float, default=3600, help="seconds before a run is abandoned")
+    parser.add_argument("--output", default="results/memory_benchmark_results.jsonl")
+    args = parser.parse_args()
+
+    results = []
+    for minutes in args.minutes:
+        for name in args.implementations:
+            print(f"[{name}: {minutes:g} min]")
+            results.append(measure(name, minutes, args.timeout))
+
+    print(f"\n{'minutes':>8}  {'implementation':<16}{'peak increase (MB)':>20}{'runtime (s)':>14}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['minutes']:>8g}  {r['implementation']:<16}  failed: {r['error']}")
+        else:
+            print(f"{r['minutes']:>8g}  {r['implementation']:<16}{r['peak_increase_mb']:>20.0f}{r['runtime_s']:>14.1f}")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        for result in results:
+            f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
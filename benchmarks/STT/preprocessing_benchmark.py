@@ -0,0 +1,168 @@
+import os
+import sys
+import json
+import time
+import numpy as np
+from jiwer import wer
+
+# preprocessing lives in the Flask backend
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "aya-integrations", "backend")
+sys.path.insert(0, os.path.abspath(BACKEND_DIR))
+
+from preprocessing_noisy_audio import (
+    load_audio, noise_reduction_with_estimation, apply_vad, estimate_snr, choose_preprocessing
+)
+
+SAMPLE_RATE = 16000
+
+
+# ---------------- Preprocessing paths ----------------
+def run_path(path, audio):
+    """
+    Returns the preprocessed audio and the stage that actually ran
+    """
+    if path == "adaptive":
+        path = choose_preprocessing(estimate_snr(audio, SAMPLE_RATE))
+    if path == "none":
+        return audio, "none"
+    if path == "vad":
+        return apply_vad(audio, SAMPLE_RATE), "vad"
+    # "denoise" is the previous always-on behavior
+    return apply_vad(noise_reduction_with_estimation(audio, SAMPLE_RATE), SAMPLE_RATE), "denoise"
+
+
+PATHS = ["denoise", "vad", "none", "adaptive"]
+
+
+# ---------------- Audio ----------------
+def add_noise(audio, snr_db, seed=0):
+    """
+    Mix white noise into audio at the given SNR (None keeps the clean audio)
+    """
+    if snr_db is None:
+        return audio
+    rng = np.random.default_rng(seed)
+    noise = rng.standard_normal(len(audio)).astype(np.float32)
+    signal_power = np.mean(audio ** 2)
+    noise_power = signal_power / (10 ** (snr_db / 10))
+    return (audio + noise * np.sqrt(noise_power)).astype(np.float32)
+
+
+# ---------------- Benchmark ----------------
+def benchmark(model, audio, reference_text, path, runs):
+    run_path(path, audio)  # warm-up
+
+    runtimes = []
+    for _ in range(runs):
+        start = time.time()
+        cleaned, chosen = run_path(path, audio)
+        runtimes.append(time.time() - start)
+
+    # model is None with --skip-wer
+    hyp = model.transcribe(cleaned, SAMPLE_RATE, {"beam_size": 1})["text"] if model is not None else None
+    return {
+        "path": path,
+        "chosen": chosen,
+        "preprocess_ms": 1000 * sum(runtimes) / len(runtimes),
+        "kept_s": len(cleaned) / SAMPLE_RATE,
+        "WER": wer(reference_text.lower(), hyp.lower()) if hyp is not None else None,
+        "hypothesis": hyp
+    }
+
+
+def benchmark_pool(audio, clips, workers):
+    """
+    Throughput of denoising `clips` copies of audio serially and in the preprocessing process pool
+    """
+    from preprocessing_noisy_audio import preprocess
+    from preprocessing_pool import PreprocessingPool
+
+    batch = [audio] * clips
+    start = time.time()
+    for clip in batch:
+        preprocess(clip, SAMPLE_RATE)
+    serial = time.time() - start
+
+    pool = PreprocessingPool(max_workers=workers)
+    pool.map(batch[:workers])  # start the workers
+    start = time.time()
+    pool.map(batch)
+    pooled = time.time() - start
+    pool.shutdown()
+
+    duration = len(audio) / SAMPLE_RATE * clips
+    print(f"\nDenoise + VAD of {clips} clips ({duration:.0f} s of audio):")
+    print(f"  serial:            {serial:.2f} s ({duration / serial:.0f}x realtime)")
+    print(f"  pool ({workers} workers): {pooled:.2f} s ({duration / pooled:.0f}x realtime)")
+    return {"clips": clips, "workers": workers, "serial_s": serial, "pool_s": pooled}
+
+
+def print_table(results):
+    print(f"\n{'input':<10}{'est. SNR':>10}  {'path':<10}{'chosen':<10}{'prep (ms)':>11}{'kept (s)':>10}{'WER':>8}")
+    for r in results:
+        snr = "-" if r["estimated_snr_db"] is None else f"{r['estimated_snr_db']:.1f}"
+        error_rate = "-" if r["WER"] is None else f"{r['WER']:.3f}"
+        print(f"{r['input']:<10}{snr:>10}  {r['path']:<10}{r['chosen']:<10}{r['preprocess_ms']:>11.1f}"
+              f"{r['kept_s']:>10.1f}{error_rate:>8}")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Latency and WER of the preprocessing paths (always-on denoise vs SNR-adaptive)")
+    parser.add_argument("audio", help="Path to audio file")
+    parser.add_argument("reference", help="Ground truth transcript (text file)")
+    parser.add_argument("--snrs", nargs="+", default=["clean", "20", "10", "5"],
+                        help="input conditions: 'clean' or the SNR in dB of added white noise")
+    parser.add_argument("--paths", nargs="+", default=PATHS, choices=PATHS)
+    parser.add_argument("--model-size", default="base", help="faster-whisper model used for the WER")
+    parser.add_argument("--runs", type=int, default=5, help="timed preprocessing runs per path")
+    parser.add_argument("--skip-wer", action="store_true",
+                        help="only time the preprocessing, without loading faster-whisper (e.g. offline)")
+    parser.add_argument("--pool-workers", type=int, default=0,
+                        help="also compare serial preprocessing with the process pool using this many workers")
+    parser.add_argument("--pool-clips", type=int, default=32, help="clips preprocessed in the pool comparison")
+    parser.add_argument("--output", default="results/preprocessing_benchmark_results.jsonl")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.audio):
+        print(f" Audio file not found: {args.audio}")
+        return
+    if not os.path.isfile(args.reference):
+        print(f" Reference file not found: {args.reference}")
+        return
+
+    with open(args.reference, "r", encoding="utf-8") as f:
+        reference_text = f.read().strip()
+
+    model = None
+    if not args.skip_wer:
+        from stt_audio.faster_whisper_inference import load_backend
+        model = load_backend(args.model_size, device="cpu", compute_type="int8")
+
+    clean_audio, _ = load_audio(args.audio, sr=SAMPLE_RATE)
+
+    results = []
+    for condition in args.snrs:
+        audio = add_noise(clean_audio, None if condition == "clean" else float(condition))
+        estimated_snr = estimate_snr(audio, SAMPLE_RATE)
+        for path in args.paths:
+            print(f"\n[{condition}: {path}]")
+            result = benchmark(model, audio, reference_text, path, args.runs)
+            result.update({"input": condition, "estimated_snr_db": estimated_snr})
+            if result["hypothesis"] is not None:
+                print(result["hypothesis"])
+            results.append(result)
+
+    print_table(results)
+
+    if args.pool_workers > 0:
+        results.append(benchmark_pool(clean_audio, args.pool_clips, args.pool_workers))
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        for result in results:
+            f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
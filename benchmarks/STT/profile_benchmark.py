@@ -0,0 +1,120 @@
+import os
+import sys
+import json
+import time
+import torch
+import torchaudio
+from jiwer import wer, cer
+
+# runtime profiles and model_runner live in the Flask backend
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "aya-integrations", "backend")
+sys.path.insert(0, os.path.abspath(BACKEND_DIR))
+
+import model_runner
+from runtime_profiles import PROFILES, get_profile
+
+DEFAULT_SIZES = {
+    "faster_whisper": "base",
+    "wav2vec2": "facebook/wav2vec2-base-960h"
+}
+
+
+# ---------------- Audio ----------------
+def load_audio(audio_path):
+    waveform, sample_rate = torchaudio.load(audio_path)
+    if waveform.shape[0] > 1:
+        waveform = torch.mean(waveform, dim=0, keepdim=True)
+    if sample_rate != 16000:
+        waveform = torchaudio.transforms.Resample(orig_freq=sample_rate, new_freq=16000)(waveform)
+    return waveform.squeeze(0).numpy()
+
+
+# ---------------- Benchmark ----------------
+def benchmark_profile(model_name, model_size, profile, audio, reference_text, runs, batch_size=1):
+    """
+    Transcribe batch_size copies of the clip per run through model_runner.transcribe_batch, the RTF is per clip
+    """
+    settings = get_profile(profile)
+    options = {"batch_size": batch_size, "beam_size": settings["beam_size"], "num_workers": settings["num_workers"]}
+
+    start = time.time()
+    model_runner.warmup(model_name, model_size, profile)
+    load_time = time.time() - start
+
+    # warm-up run so the first-call overhead doesn't skew the RTF
+    model_runner.transcribe_batch([audio], model_name, model_size, profile, options=options)
+
+    runtimes = []
+    for _ in range(runs):
+        start = time.time()
+        hyp = model_runner.transcribe_batch([audio] * batch_size, model_name, model_size, profile,
+                                            options=options)[0]["text"]
+        runtimes.append(time.time() - start)
+    # one profile's engine at a time
+    model_runner.release(model_name)
+
+    duration = len(audio) / 16000 * batch_size
+    runtime = sum(runtimes) / len(runtimes)
+    return {
+        "model": model_name,
+        "size": model_size,
+        "profile": profile,
+        "batch_size": batch_size,
+        "load_time": load_time,
+        "runtime": runtime,
+        "RTF": runtime / duration if duration > 0 else 0.0,
+        "WER": wer(reference_text.lower(), hyp.lower()),
+        "CER": cer(reference_text.lower(), hyp.lower()),
+        "hypothesis": hyp
+    }
+
+
+def print_table(results):
+    print(f"\n{'model':<16}{'profile':<12}{'RTF':>8}{'WER':>8}{'CER':>8}{'load (s)':>10}")
+    for r in results:
+        print(f"{r['model']:<16}{r['profile']:<12}{r['RTF']:>8.3f}{r['WER']:>8.3f}{r['CER']:>8.3f}{r['load_time']:>10.1f}")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark the WER/RTF tradeoff of the CPU runtime profiles")
+    parser.add_argument("audio", help="Path to audio file")
+    parser.add_argument("reference", help="Ground truth transcript (text file)")
+    parser.add_argument("--models", nargs="+", default=list(DEFAULT_SIZES.keys()), choices=list(DEFAULT_SIZES.keys()))
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES.keys()), choices=list(PROFILES.keys()))
+    parser.add_argument("--runs", type=int, default=3, help="timed runs per model/profile")
+    parser.add_argument("--batch-size", type=int, default=1, help="copies of the clip transcribed per batch")
+    parser.add_argument("--output", default="results/profile_benchmark_results.jsonl")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.audio):
+        print(f" Audio file not found: {args.audio}")
+        return
+    if not os.path.isfile(args.reference):
+        print(f" Reference file not found: {args.reference}")
+        return
+
+    with open(args.reference, "r", encoding="utf-8") as f:
+        reference_text = f.read().strip()
+
+    audio = load_audio(args.audio)
+
+    results = []
+    for model_name in args.models:
+        for profile in args.profiles:
+            print(f"\n[{model_name}: {profile}]")
+            result = benchmark_profile(model_name, DEFAULT_SIZES[model_name], profile, audio, reference_text, args.runs,
+                                       args.batch_size)
+            print(result["hypothesis"])
+            results.append(result)
+
+    print_table(results)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        for result in results:
+            f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
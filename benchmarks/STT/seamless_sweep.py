@@ -0,0 +1,232 @@
+import gc
+import os
+import sys
+import json
+import time
+import itertools
+from jiwer import wer
+
+# the Seamless wrapper lives in the Flask backend
+BACKEND_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "aya-integrations", "backend")
+)
+sys.path.insert(0, BACKEND_DIR)
+
+from audio_decoding import load_audio_file
+
+SAMPLE_RATE = 16000
+BUNDLED_CLIPS = [
+    (os.path.join(BACKEND_DIR, "stt_audio", "harvard.wav"), os.path.join(BACKEND_DIR, "stt_audio", "harvard.wav_transcript.txt")),
+    (os.path.join(BACKEND_DIR, "stt_audio", "p232_006.wav"), os.path.join(BACKEND_DIR, "stt_audio", "p232_006_transcript.txt"))
+]
+AUDIO_EXTENSIONS = (".wav", ".flac", ".mp3", ".ogg", ".m4a", ".webm")
+
+
+# ---------------- Corpus ----------------
+def find_transcript(audio_path):
+    """
+    <clip>_transcript.txt, <clip>.wav_transcript.txt or <clip>.txt next to the clip, None if there is none
+    """
+    stem = os.path.splitext(audio_path)[0]
+    for candidate in (f"{stem}_transcript.txt", f"{audio_path}_transcript.txt", f"{stem}.txt"):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def load_corpus(corpus_dir=None, skip_bundled=False):
+    clips = [] if skip_bundled else list(BUNDLED_CLIPS)
+    if corpus_dir:
+        for name in sorted(os.listdir(corpus_dir)):
+            path = os.path.join(corpus_dir, name)
+            if name.lower().endswith(AUDIO_EXTENSIONS):
+                clips.append((path, find_transcript(path)))
+
+    corpus = []
+    for audio_path, transcript_path in clips:
+        reference = None
+        if transcript_path:
+            with open(transcript_path, "r", encoding="utf-8") as f:
+                reference = f.read().strip()
+        corpus.append({
+            "name": os.path.basename(audio_path),
+            "audio": load_audio_file(audio_path, SAMPLE_RATE),
+            "reference": reference
+        })
+    return corpus
+
+
+# ---------------- Streaming run ----------------
+def stream_clip(wrapper, audio, chunk_ms, tgt_lang):
+    """
+    Feed a clip to a Seamless session in chunk_ms pieces like /stream-audio does.
+
+    First-token latency is simulated for real-time input: a chunk can't be processed before it has been
+    spoken, and not before the previous chunk is done, so clock = max(clock, end of chunk) + compute time.
+    """
+    chunk_samples = int(chunk_ms / 1000 * SAMPLE_RATE)
+    texts = []
+    first_token_s = None
+    clock = 0.0
+
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    with wrapper.session(tgt_lang) as session:
+        for start in range(0, len(audio), chunk_samples):
+            chunk_start = time.perf_counter()
+            chunk_texts = list(wrapper.push_audio(session, SAMPLE_RATE, audio[start:start + chunk_samples]))
+            clock = max(clock, min(start + chunk_samples, len(audio)) / SAMPLE_RATE) + time.perf_counter() - chunk_start
+            if chunk_texts and first_token_s is None:
+                first_token_s = clock
+            texts.extend(chunk_texts)
+
+        flush_start = time.perf_counter()
+        final_texts = list(wrapper.finish_stream(session))
+        clock = max(clock, len(audio) / SAMPLE_RATE) + time.perf_counter() - flush_start
+        if final_texts and first_token_s is None:
+            first_token_s = clock
+        texts.extend(final_texts)
+    wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+
+    duration = len(audio) / SAMPLE_RATE
+    return {
+        "hypothesis": " ".join(text.strip() for text in texts if text.strip()),
+        "first_token_latency_s": first_token_s,
+        "end_to_end_latency_s": clock - duration,
+        "rtf": wall / duration,
+        "cpu_s": cpu,
+        "cpu_rtf": cpu / duration
+    }
+
+
+def run_config(config, corpus, chunk_ms, tgt_lang, device):
+    from stt_audio.seamless_inference import get_seamless_default_config, load_model
+
+    model_config = get_seamless_default_config()
+    model_config.update(config, device=device)
+    start = time.time()
+    wrapper = load_model(model_config=model_config)
+    load_time = time.time() - start
+
+    # warm-up so the first-call overhead doesn't skew the latencies
+    stream_clip(wrapper, corpus[0]["audio"][:SAMPLE_RATE * 2], chunk_ms, tgt_lang)
+
+    results = []
+    for clip in corpus:
+        result = stream_clip(wrapper, clip["audio"], chunk_ms, tgt_lang)
+        result.update({
+            **config,
+            "clip": clip["name"],
+            "load_s": load_time,
+            "WER": wer(clip["reference"].lower(), result["hypothesis"].lower()) if clip["reference"] else None
+        })
+        print(f"  {clip['name']}: {result['hypothesis']}")
+        results.append(result)
+
+    del wrapper
+    gc.collect()
+    return results
+
+
+# ---------------- Pareto table ----------------
+PARAMETERS = ["source_segment_size", "silence_limit_ms", "decision_threshold"]
+OBJECTIVES = ["first_token_latency_s", "rtf", "WER"]
+
+
+def _mean(values):
+    values = [value for value in values if value is not None]
+    return sum(values) / len(values) if values else None
+
+
+def summarize(results):
+    """
+    Average the clip results of every configuration and mark the ones on the Pareto front
+    of first-token latency, RTF and WER (lower is better for all three)
+    """
+    summaries = []
+    for config, group in itertools.groupby(results, key=lambda r: tuple(r[p] for p in PARAMETERS)):
+        group = list(group)
+        summary = dict(zip(PARAMETERS, config))
+        for key in OBJECTIVES + ["end_to_end_latency_s", "cpu_rtf"]:
+            summary[key] = _mean(r[key] for r in group)
+        summaries.append(summary)
+
+    def key(summary, objective):
+        # configurations that never produced text (or have no references) lose on that objective
+        return float("inf") if summary[objective] is None else summary[objective]
+
+    for summary in summaries:
+        summary["pareto"] = not any(
+            all(key(other, o) <= key(summary, o) for o in OBJECTIVES)
+            and any(key(other, o) < key(summary, o) for o in OBJECTIVES)
+            for other in summaries
+        )
+    return sorted(summaries, key=lambda s: (not s["pareto"], key(s, "first_token_latency_s")))
+
+
+def _format(value, spec):
+    return "-" if value is None else format(value, spec)
+
+
+def pareto_table(summaries):
+    lines = [
+        "| segment (ms) | silence limit (ms) | threshold | first token (s) | end-to-end (s) | RTF | CPU RTF | WER | Pareto |",
+        "|---|---|---|---|---|---|---|---|---|"
+    ]
+    for s in summaries:
+        lines.append(
+            f"| {s['source_segment_size']} | {s['silence_limit_ms']} | {s['decision_threshold']} "
+            f"| {_format(s['first_token_latency_s'], '.2f')} | {_format(s['end_to_end_latency_s'], '.2f')} "
+            f"| {_format(s['rtf'], '.3f')} | {_format(s['cpu_rtf'], '.3f')} | {_format(s['WER'], '.3f')} "
+            f"| {'*' if s['pareto'] else ''} |"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Sweep the Seamless streaming configuration for latency, RTF, CPU time and WER")
+    parser.add_argument("--corpus-dir", help="directory of extra clips, with <clip>_transcript.txt or <clip>.txt references")
+    parser.add_argument("--skip-bundled", action="store_true", help="don't include harvard.wav and p232_006.wav")
+    parser.add_argument("--segment-sizes", nargs="+", type=int, default=[320, 640, 1000, 2000],
+                        help="source_segment_size values in ms")
+    parser.add_argument("--silence-limits", nargs="+", type=int, default=[160, 320, 640],
+                        help="silence_limit_ms values")
+    parser.add_argument("--thresholds", nargs="+", type=float, default=[0.3, 0.5, 0.7],
+                        help="decision_threshold values")
+    parser.add_argument("--chunk-ms", type=int, default=250, help="size of the chunks fed to the stream")
+    parser.add_argument("--tgt-lang", default="eng")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--output", default="results/seamless_sweep_results.jsonl")
+    parser.add_argument("--table", default="results/seamless_sweep_pareto.md")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus_dir, args.skip_bundled)
+    if not corpus:
+        print(" No clips to benchmark")
+        return
+
+    results = []
+    grid = list(itertools.product(args.segment_sizes, args.silence_limits, args.thresholds))
+    for i, (segment_size, silence_limit, threshold) in enumerate(grid, 1):
+        config = {
+            "source_segment_size": segment_size,
+            "silence_limit_ms": silence_limit,
+            "decision_threshold": threshold
+        }
+        print(f"\n[{i}/{len(grid)}] {config}")
+        results.extend(run_config(config, corpus, args.chunk_ms, args.tgt_lang, args.device))
+
+    table = pareto_table(summarize(results))
+    print("\n" + table)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        for result in results:
+            f.write(json.dumps(result) + "\n")
+    os.makedirs(os.path.dirname(args.table) or ".", exist_ok=True)
+    with open(args.table, "w") as f:
+        f.write(table + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,99 +1,120 @@
-import torchaudio
+import os
+import sys
+import json
+import re
+
 import torchaudio.datasets as datasets
 from jiwer import wer, cer
-import torch
-import json
 from tqdm import tqdm
-import re
 
-torchaudio.set_audio_backend("sox_io")
+# the STT backends and model_runner live in the Flask backend
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "aya-integrations", "backend")
+sys.path.insert(0, os.path.abspath(BACKEND_DIR))
+
+import model_runner
 
-# Load pretrained Wav2Vec2 model
-bundle = torchaudio.pipelines.WAV2VEC2_ASR_BASE_960H
-model = bundle.get_model()
-model.eval()
-labels = bundle.get_labels()
+DEFAULT_SIZES = {
+    "faster_whisper": "base",
+    "whisper": "base",
+    "wav2vec2": "facebook/wav2vec2-base-960h",
+    "nemo": "stt_en_conformer_ctc_small"
+}
 
-# Greedy decoder function
-def greedy_decode(emission):
-    indices = torch.argmax(emission, dim=-1)
-    tokens = [labels[i] for i in indices]
-    return "".join([t if t != "|" else " " for t in tokens])  # "|" represents space
 
 # Normalize text
 def normalize_text(text):
     text = text.lower().strip()
     text = re.sub(r"[^a-z' ]", "", text)  # Remove punctuation but keep apostrophes
+    text = re.sub(r" +", " ", text)
     return text
 
-# Speech-to-text function
-def wav2vec2_stt_model(audio_waveform, sample_rate):
-    """Convert waveform to text using the Wav2Vec2 model."""
-    if sample_rate != 16000:
-        audio_waveform = torchaudio.transforms.Resample(sample_rate, 16000)(audio_waveform)
-
-    # Ensure the waveform is 2D: (batch, time)
-    if audio_waveform.dim() == 1:
-        audio_waveform = audio_waveform.unsqueeze(0)  # Add batch dimension if missing
-    elif audio_waveform.dim() == 3:
-        audio_waveform = audio_waveform.squeeze(0)  # Remove extra batch dim if present
-    
-    with torch.no_grad():
-        emission, _ = model(audio_waveform)  # Now it should be (batch, time)
-    
-    predicted_text = greedy_decode(emission[0])
-    return predicted_text
-
-
-# Load test dataset
-test_set = datasets.LIBRISPEECH("./data", url="test-clean", download=True)
-result_file = "results/Wav2Vec2_stt_benchmark_results.jsonl" # Adjust as needed
-
-num_samples = 100  # Adjust as needed
-wer_scores, cer_scores = [], []
-results = []
-
-for i in tqdm(range(num_samples), desc="Processing samples", unit="sample"):
-    waveform, sample_rate, transcript, _, _, _ = test_set[i]
-    
-    predicted_text = wav2vec2_stt_model(waveform, sample_rate)
-    
-    transcript = normalize_text(transcript)
-    predicted_text = normalize_text(predicted_text)
-
-    wer_score = wer(transcript, predicted_text)
-    cer_score = cer(transcript, predicted_text)
-    
-    wer_scores.append(wer_score)
-    cer_scores.append(cer_score)
-    
-    result = {
-        "sample": i+1,
-        "ground_truth": transcript,
-        "predicted": predicted_text,
-        "wer": wer_score,
-        "cer": cer_score
-    }
-    results.append(result)
-    
-    print(f"Sample {i+1}:")
-    print(f"  Ground Truth: {transcript}")
-    print(f"  Predicted:    {predicted_text}")
-    print(f"  WER: {wer_score:.4f}, CER: {cer_score:.4f}\n")
-
-
-average_wer = sum(wer_scores) / num_samples
-average_cer = sum(cer_scores) / num_samples
-
-results.append({
-    "sample": "average",
-    "wer": average_wer,
-    "cer": average_cer
-})
-
-with open(result_file, "w") as f:
-    for result in results:
-        f.write(json.dumps(result) + "\n")
-
-print(f"Average WER: {average_wer:.4f}")
-print(f"Average CER: {average_cer:.4f}")
\ No newline at end of file
+
+def transcribe_samples(test_set, num_samples, model, model_size, profile, batch_size):
+    """
+    Transcribe the first num_samples utterances batch_size at a time through model_runner.transcribe_batch,
+    yields (index, transcript, predicted text)
+    """
+    for start in range(0, num_samples, batch_size):
+        indices = range(start, min(start + batch_size, num_samples))
+        samples = [test_set[i] for i in indices]
+        # LibriSpeech is 16 kHz mono, every utterance of a batch has the same rate
+        waveforms = [waveform.mean(dim=0).numpy() for waveform, *_ in samples]
+        sample_rate = samples[0][1]
+        results = model_runner.transcribe_batch(waveforms, model, model_size, profile, sample_rate,
+                                                options={"batch_size": batch_size})
+        for i, sample, result in zip(indices, samples, results):
+            yield i, sample[2], result["text"]
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="WER/CER of an STT backend on LibriSpeech test-clean")
+    parser.add_argument("--model", default="wav2vec2", choices=list(DEFAULT_SIZES.keys()))
+    parser.add_argument("--size", default=None, help="model size/variant, defaults per model")
+    parser.add_argument("--profile", default=None, help="runtime profile (latency, throughput, accuracy)")
+    parser.add_argument("--num-samples", type=int, default=100, help="utterances to transcribe")
+    parser.add_argument("--batch-size", type=int, default=1, help="utterances per transcribe_batch call")
+    parser.add_argument("--data-dir", default="./data")
+    parser.add_argument("--output", default=None,
+                        help="defaults to results/Wav2Vec2_stt_benchmark_results.jsonl for wav2vec2, "
+                             "results/<model>_stt_benchmark_results.jsonl otherwise")
+    args = parser.parse_args()
+
+    model_size = args.size or DEFAULT_SIZES[args.model]
+    result_file = args.output or (
+        "results/Wav2Vec2_stt_benchmark_results.jsonl" if args.model == "wav2vec2"
+        else f"results/{args.model}_stt_benchmark_results.jsonl"
+    )
+
+    # Load test dataset
+    test_set = datasets.LIBRISPEECH(args.data_dir, url="test-clean", download=True)
+    num_samples = min(args.num_samples, len(test_set))
+
+    wer_scores, cer_scores = [], []
+    results = []
+    samples = transcribe_samples(test_set, num_samples, args.model, model_size, args.profile, args.batch_size)
+    for i, transcript, predicted_text in tqdm(samples, total=num_samples, desc="Processing samples", unit="sample"):
+        transcript = normalize_text(transcript)
+        predicted_text = normalize_text(predicted_text)
+
+        wer_score = wer(transcript, predicted_text)
+        cer_score = cer(transcript, predicted_text)
+
+        wer_scores.append(wer_score)
+        cer_scores.append(cer_score)
+
+        results.append({
+            "sample": i + 1,
+            "ground_truth": transcript,
+            "predicted": predicted_text,
+            "wer": wer_score,
+            "cer": cer_score
+        })
+
+        print(f"Sample {i+1}:")
+        print(f"  Ground Truth: {transcript}")
+        print(f"  Predicted:    {predicted_text}")
+        print(f"  WER: {wer_score:.4f}, CER: {cer_score:.4f}\n")
+
+    average_wer = sum(wer_scores) / num_samples
+    average_cer = sum(cer_scores) / num_samples
+
+    results.append({
+        "sample": "average",
+        "model": args.model,
+        "size": model_size,
+        "wer": average_wer,
+        "cer": average_cer
+    })
+
+    os.makedirs(os.path.dirname(result_file) or ".", exist_ok=True)
+    with open(result_file, "w") as f:
+        for result in results:
+            f.write(json.dumps(result) + "\n")
+
+    print(f"Average WER: {average_wer:.4f}")
+    print(f"Average CER: {average_cer:.4f}")
+
+
+if __name__ == "__main__":
+    main()